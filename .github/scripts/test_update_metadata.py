@@ -16,6 +16,7 @@ app folder actually contains a logo image; these fixtures deliberately ship none
 (``logo_url`` is then ``None``), so the stub is never exercised.
 """
 
+import hashlib
 import sys
 import types
 from pathlib import Path
@@ -285,6 +286,16 @@ def test_native_drops_supported_distro(tmp_path):
     assert "supported_distro" not in data
 
 
+def test_script_hashes_match_raw_bytes(tmp_path):
+    # The app store's script cache is keyed on these; they must be the hash
+    # of the file exactly as raw.githubusercontent.com serves it.
+    app = _make_app(tmp_path, "firefox", NATIVE)
+    data = update_metadata.get_app_metadata(app)
+    assert data["install_sha256"] == hashlib.sha256(NATIVE.encode()).hexdigest()
+    # no uninstall.sh in the fixture -> no hash rather than a bogus one
+    assert "uninstall_sha256" not in data
+
+
 def test_runtime_only_headers_are_not_parsed_as_metadata(tmp_path):
     # The sha256 / page_url / archtype / helper-call lines must never leak into
     # the parsed metadata under any of the six recognised keys.
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -155,6 +156,20 @@ def get_urls(app_folder_name, app_folder):
     }
 
 
+def get_script_hashes(app_folder):
+    """Return the sha256 of install.sh / uninstall.sh, as served raw.
+
+    The app store keys its script cache on these, so an unchanged script
+    is reused without a network round-trip.
+    """
+    hashes = {}
+    for script in ("install", "uninstall"):
+        path = app_folder / f"{script}.sh"
+        if path.exists():
+            hashes[f"{script}_sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return hashes
+
+
 def get_app_metadata(app_folder):
     """Get metadata for a single app."""
     description = read_file_content(app_folder, "description")
@@ -234,6 +249,7 @@ def get_app_metadata(app_folder):
         "categories": [cat.strip() for cat in categories_str.split(",")],
         **metadata,  # Include all metadata fields
         **urls,
+        **get_script_hashes(app_folder),
     }
 
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Micro-benchmark for ``ProgressEngine.process_line``.
+
+Replays the recorded apt, dnf and pacman install transcripts in
+``transcripts/`` through a fresh engine and reports lines per second.
+``progress.py`` is loaded straight from its file so the benchmark does
+not need GTK.
+
+Usage::
+
+    python3 appstore/benchmarks/progress_bench.py [--rounds N]
+"""
+
+import argparse
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+PROGRESS_PY = HERE.parent / "termux_appstore" / "tasks" / "progress.py"
+TRANSCRIPTS = HERE / "transcripts"
+
+
+def load_engine():
+    """Import ``ProgressEngine`` without importing the GTK-bound package."""
+    spec = importlib.util.spec_from_file_location("_bench_progress", PROGRESS_PY)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module.ProgressEngine
+
+
+def bench(engine_cls, lines, rounds):
+    """Return the best lines/sec over *rounds* replays of *lines*."""
+    rates = []
+    for _ in range(rounds):
+        engine = engine_cls(operation="install", app_type="native")
+        process_line = engine.process_line
+        start = time.perf_counter()
+        for line in lines:
+            process_line(line)
+        elapsed = time.perf_counter() - start
+        rates.append(len(lines) / elapsed)
+    return max(rates), statistics.median(rates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    engine_cls = load_engine()
+    print(f"{'transcript':<22} {'lines':>6} {'best l/s':>12} {'median l/s':>12}")
+    for path in sorted(TRANSCRIPTS.glob("*.log")):
+        lines = path.read_text().splitlines()
+        best, median = bench(engine_cls, lines, args.rounds)
+        print(f"{path.name:<22} {len(lines):>6} {best:>12,.0f} {median:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,8 @@ This is the top-level application object that manages the window
 lifecycle and sets up the GNOME desktop integration (icon, name).
 """
 
+import logging
+
 import gi
 
 gi.require_version("Gtk", "3.0")
@@ -12,6 +14,8 @@ from gi.repository import Gio, GLib, Gtk  # type: ignore # noqa: E402
 
 from termux_appstore.constants import APP_NAME
 
+logger = logging.getLogger(__name__)
+
 
 class AppStoreApplication(Gtk.Application):
     """The main Gtk.Application for Termux AppStore."""
@@ -35,7 +39,7 @@ class AppStoreApplication(Gtk.Application):
             icon = icon_theme.load_icon("org.gnome.Software", 128, 0)
             Gtk.Window.set_default_icon(icon)
         except Exception as e:
-            print(f"Failed to set application icon: {e}")
+            logger.error("Failed to set application icon: %s", e)
 
     def on_activate(self, app):
         """Called when the application is activated (or re-focused)."""
@@ -1,166 +1,202 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-"""App metadata loading and filtering.
+"""App metadata loading, filtering and search.
 
-Reads ``apps.json``, filters by architecture and distro compatibility,
-and exposes the resulting list plus extracted categories.
+Reads ``apps.json`` into :class:`~termux_appstore.backend.app_record.AppRecord`
+objects, filters them by architecture and distro compatibility, and
+exposes the resulting list plus extracted categories.
+:func:`search_apps` implements the search box for both front ends.
 """
 
 import json
-import os
+import logging
 
-from termux_appstore.constants import (
-    APPSTORE_JSON,
-    ARCH_COMPATIBILITY,
-    TERMUX_PREFIX,
-)
+from termux_appstore.backend.app_record import AppRecord
+from termux_appstore.backend.desktop_config import read_config
+from termux_appstore.constants import APPSTORE_JSON, ARCH_COMPATIBILITY
+from termux_appstore.fuzzysearch import find_near_matches
 from termux_appstore.utils import get_current_arch
 
-TERMUX_DESKTOP_CONFIG = os.path.join(
-    TERMUX_PREFIX, "etc", "termux-desktop", "configuration.conf"
-)
-
-
-def read_termux_desktop_config():
-    """Parse the Termux Desktop ``configuration.conf`` file.
-
-    Returns:
-        tuple: ``(distro_enabled: bool, selected_distro: str | None,
-                  selected_distro_type: str)``
-    """
-    distro_enabled = False
-    selected_distro = None
-    selected_distro_type = "proot"
-
-    if not os.path.exists(TERMUX_DESKTOP_CONFIG):
-        print("Warning: Termux Desktop configuration file not found")
-        return distro_enabled, selected_distro, selected_distro_type
-
-    try:
-        with open(TERMUX_DESKTOP_CONFIG, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith("#") or not line:
-                    continue
-
-                if line.startswith("distro_add_answer="):
-                    value = line.split("=", 1)[1].strip().strip('"').strip("'").lower()
-                    if value in ("y", "yes"):
-                        distro_enabled = True
-                    elif value in ("n", "no"):
-                        distro_enabled = False
-                    else:
-                        print(
-                            f"Warning: Unrecognized value for distro_add_answer: '{value}'"
-                        )
-                    print(
-                        f"Found distro_add_answer: {value} -> enabled: {distro_enabled}"
-                    )
-
-                elif line.startswith("selected_distro="):
-                    selected_distro = (
-                        line.split("=", 1)[1].strip().strip('"').strip("'").lower()
-                    )
-                    print(f"Found selected_distro: {selected_distro}")
-
-                elif line.startswith("selected_distro_type="):
-                    selected_distro_type = (
-                        line.split("=", 1)[1].strip().strip('"').strip("'").lower()
-                    )
-                    print(f"Found selected_distro_type: {selected_distro_type}")
-
-    except Exception as e:
-        print(f"Error reading Termux Desktop config: {e}")
-        import traceback
-
-        traceback.print_exc()
-
-    return distro_enabled, selected_distro, selected_distro_type
+logger = logging.getLogger(__name__)
 
 
 def load_app_metadata():
     """Load and filter app metadata from ``apps.json``.
 
     Reads the local ``apps.json``, filters apps by system architecture
-    and distro configuration, and returns the compatible app list plus
+    and distro configuration, and returns the compatible apps plus
     sorted category names.
 
     Returns:
-        tuple: ``(apps_data: list[dict], categories: list[str])``
+        tuple: ``(apps_data: list[AppRecord], categories: list[str])``
     """
     try:
         system_arch = get_current_arch()
         compatible_archs = ARCH_COMPATIBILITY.get(system_arch, [system_arch])
-        print(f"System architecture: {system_arch}")
-        print(f"Compatible architectures: {compatible_archs}")
+        logger.info("System architecture: %s", system_arch)
+        logger.debug("Compatible architectures: %s", compatible_archs)
 
-        distro_enabled, selected_distro, _ = read_termux_desktop_config()
-        print("Configuration status:")
-        print(f"Distro enabled: {distro_enabled}")
-        print(f"Selected distro: {selected_distro}")
+        config = read_config()
+        distro_enabled, selected_distro = config.distro_enabled, config.selected_distro
+        logger.debug(
+            "Distro enabled: %s, selected distro: %s", distro_enabled, selected_distro
+        )
 
         with open(APPSTORE_JSON) as f:
-            all_apps = json.load(f)
+            all_apps = [AppRecord(app) for app in json.load(f)]
 
         apps_data = _filter_apps(
-            all_apps, compatible_archs, distro_enabled, selected_distro
+            all_apps, frozenset(compatible_archs), distro_enabled, selected_distro
         )
 
-        categories = sorted(
-            list(set(cat for app in apps_data for cat in app["categories"]))
-        )
+        categories = sorted(set(cat for app in apps_data for cat in app.categories))
 
-        print(
-            f"Loaded {len(apps_data)} compatible apps out of {len(all_apps)} total apps"
+        logger.info(
+            "Loaded %s compatible apps out of %s total apps",
+            len(apps_data),
+            len(all_apps),
         )
         return apps_data, categories
 
     except FileNotFoundError:
-        print("No apps.json file found")
+        logger.warning("No apps.json file found")
         return [], []
     except Exception as e:
-        print(f"Error loading app metadata: {e}")
+        logger.error("Error loading app metadata: %s", e)
         return [], []
 
 
+def diff_apps(old_apps, new_apps):
+    """Compare two app lists by ``folder_name``.
+
+    Args:
+        old_apps: App records currently shown.
+        new_apps: App records from a newer ``apps.json``.
+
+    Returns:
+        tuple: ``(added, removed, changed)`` lists of folder names;
+        *changed* holds apps present in both whose metadata differs.
+    """
+    old = {app.folder_name: app for app in old_apps}
+    new = {app.folder_name: app for app in new_apps}
+    added = [folder for folder in new if folder not in old]
+    removed = [folder for folder in old if folder not in new]
+    changed = [
+        folder for folder, app in new.items() if folder in old and old[folder] != app
+    ]
+    return added, removed, changed
+
+
 def _filter_apps(all_apps, compatible_archs, distro_enabled, selected_distro):
-    """Filter apps by architecture and distro compatibility."""
+    """Filter app records by architecture and distro compatibility."""
     result = []
     for app in all_apps:
-        app_arch = app.get("supported_arch", "")
-        if not app_arch:
+        if app.archs is None:
             result.append(app)
             continue
 
-        supported_archs = [arch.strip().lower() for arch in app_arch.split(",")]
-
-        if not any(arch in compatible_archs for arch in supported_archs):
-            print(f"Skipped incompatible app: {app['app_name']} ({app_arch})")
+        if app.archs.isdisjoint(compatible_archs):
+            logger.debug(
+                "Skipped incompatible app: %s (%s)", app.app_name, app.supported_arch
+            )
             continue
 
         # Native apps pass through directly
-        if app.get("app_type") != "distro":
+        if not app.is_distro:
             result.append(app)
-            print(f"Added compatible app: {app['app_name']} ({app_arch})")
+            logger.debug(
+                "Added compatible app: %s (%s)", app.app_name, app.supported_arch
+            )
             continue
 
         # Distro apps need additional checks
         if not distro_enabled:
-            print(f"Skipping distro app {app['app_name']}: distro support disabled")
+            logger.debug(
+                "Skipping distro app %s: distro support disabled", app.app_name
+            )
             continue
 
-        supported_distro = app.get("supported_distro")
-        if supported_distro == "all":
+        if app.distros is None:
+            continue
+        if "all" in app.distros or selected_distro in app.distros:
             result.append(app)
-            print(f"Added compatible app: {app['app_name']} ({app_arch})")
-        elif supported_distro:
-            supported_distros = [d.strip().lower() for d in supported_distro.split(",")]
-            if selected_distro in supported_distros:
-                result.append(app)
-                print(f"Added compatible app: {app['app_name']} ({app_arch})")
-            else:
-                print(
-                    f"Skipping incompatible distro app {app['app_name']}: "
-                    f"requires one of {supported_distros}, but using {selected_distro}"
-                )
+            logger.debug(
+                "Added compatible app: %s (%s)", app.app_name, app.supported_arch
+            )
+        else:
+            logger.debug(
+                "Skipping incompatible distro app %s: requires one of %s, but using %s",
+                app.app_name,
+                sorted(app.distros),
+                selected_distro,
+            )
 
     return result
+
+
+# Minimum fuzzy score (0-100) for an app to count as a match
+FUZZY_THRESHOLD = 60
+
+
+def fuzzy_score(search_text, text):
+    """Score how well *search_text* matches somewhere inside *text*.
+
+    Returns:
+        int: 100 for an exact substring, lower for each edit needed, 0
+        for no match.
+    """
+    if not search_text or not text:
+        return 0
+    search_len = len(search_text)
+    if search_len <= 2:
+        max_dist = 0
+    else:
+        max_dist = min(3, search_len // 3)
+
+    try:
+        matches = find_near_matches(search_text, text, max_l_dist=max_dist)
+        if not matches:
+            return 0
+        best_dist = min(m.dist for m in matches)
+        return max(0, 100 - int((best_dist / search_len) * 100))
+    except Exception:
+        return 0
+
+
+def search_apps(apps, search_text, fuzzy=False):
+    """Filter *apps* by a search query.
+
+    Without *fuzzy*, apps whose name contains the query win; if there
+    are none, description and category matches are returned instead.
+    With *fuzzy*, every app scoring at least :data:`FUZZY_THRESHOLD` on
+    its name, description or a category is returned, best first.
+
+    Args:
+        apps: :class:`~termux_appstore.backend.app_record.AppRecord` list.
+        search_text: The query; matching is case-insensitive.
+        fuzzy: Allow typos (the ``enable_fuzzy_search`` setting).
+
+    Returns:
+        list[AppRecord]: Matching apps.
+    """
+    search_text = search_text.lower()
+    if fuzzy:
+        scored = []
+        for app in apps:
+            ns = fuzzy_score(search_text, app.name_lower)
+            ds = fuzzy_score(search_text, app.description_lower)
+            cs = max(
+                (fuzzy_score(search_text, c) for c in app.categories_lower),
+                default=0,
+            )
+            best = max(ns, ds, cs)
+            if best >= FUZZY_THRESHOLD:
+                scored.append((app, best))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return [a for a, _ in scored]
+
+    name_matches = [a for a in apps if search_text in a.name_lower]
+    if name_matches:
+        return name_matches
+    desc = [a for a in apps if search_text in a.description_lower]
+    cat = [a for a in apps if any(search_text in c for c in a.categories_lower)]
+    return list({a.app_name: a for a in desc + cat}.values())
@@ -0,0 +1,156 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Compact in-memory model of one catalog entry.
+
+``apps.json`` holds a hundred-odd apps, and every list, search and card
+used to dig through the dicts ``json.load`` returned: ``app.get(...)``
+for each field, a fresh ``.lower()`` per keystroke, the version
+reformatted for every card, ``supported_arch`` split again on every
+load.  :class:`AppRecord` is built once per app when the catalog loads
+(:func:`~termux_appstore.backend.app_data.load_app_metadata`).  It keeps
+the fields in ``__slots__``, interns the strings shared between apps
+(categories, app type, architectures, distros) and precomputes what the
+UI derives from them.
+
+Records still answer ``app["key"]`` and ``app.get("key")``, so code that
+looks up per-distro keys such as ``ubuntu_run_cmd`` works unchanged.
+"""
+
+import sys
+
+# apps.json keys stored in slots; any other key goes to ``_extra``
+FIELDS = (
+    "folder_name",
+    "app_name",
+    "description",
+    "categories",
+    "app_type",
+    "version",
+    "version_source",
+    "package_name",
+    "run_cmd",
+    "supported_arch",
+    "supported_distro",
+    "install_url",
+    "uninstall_url",
+    "logo_url",
+)
+
+_LOCAL_VERSIONS = ("termux_local_version", "distro_local_version")
+
+
+def format_version(version):
+    """Clean a version string for display.
+
+    Returns:
+        str: Cleaned version, or ``"Unavailable"``.
+    """
+    if not version or not isinstance(version, str):
+        return "Unavailable"
+
+    if version in _LOCAL_VERSIONS:
+        return "Unavailable"
+
+    version = version.split(",")[0].strip()
+    version = version.split()[0].strip()
+    if version.startswith("v"):
+        version = version[1:]
+    return version or "Unavailable"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _split_list(value):
+    """Parse a comma-separated field into a frozenset of interned,
+    lowercased names, or ``None`` when the field is empty."""
+    if not value or not isinstance(value, str):
+        return None
+    names = frozenset(
+        sys.intern(part.strip().lower()) for part in value.split(",") if part.strip()
+    )
+    return names or None
+
+
+class AppRecord:
+    """One app from ``apps.json``.
+
+    Missing keys and JSON ``null`` both read as ``None``.
+
+    Attributes:
+        name_lower: ``app_name`` lowercased, for search.
+        description_lower: ``description`` lowercased, ``""`` if missing.
+        categories_lower: ``categories`` lowercased.
+        archs: Architectures from ``supported_arch``; ``None`` means any.
+        distros: Distros from ``supported_distro``; ``None`` when unset.
+        display_version: ``version`` formatted for the app card.
+    """
+
+    __slots__ = FIELDS + (
+        "name_lower",
+        "description_lower",
+        "categories_lower",
+        "archs",
+        "distros",
+        "display_version",
+        "_extra",
+    )
+
+    def __init__(self, data):
+        for field in FIELDS:
+            setattr(self, field, data.get(field))
+        extra = {k: v for k, v in data.items() if k not in _FIELD_SET}
+        self._extra = extra or None
+
+        self.categories = tuple(sys.intern(c) for c in self.categories or ())
+        self.app_type = _intern(self.app_type)
+        self.supported_arch = _intern(self.supported_arch)
+        self.supported_distro = _intern(self.supported_distro)
+
+        self.name_lower = (self.app_name or "").lower()
+        self.description_lower = (self.description or "").lower()
+        self.categories_lower = tuple(sys.intern(c.lower()) for c in self.categories)
+        self.archs = _split_list(self.supported_arch)
+        self.distros = _split_list(self.supported_distro)
+        self.display_version = format_version(self.version)
+
+    @property
+    def is_distro(self):
+        """``True`` for apps installed inside the proot/chroot distro."""
+        return self.app_type == "distro"
+
+    # Dict-style access
+
+    def get(self, key, default=None):
+        """Return the value of the ``apps.json`` key *key*, like ``dict.get``."""
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+        elif self._extra is not None:
+            value = self._extra.get(key)
+        else:
+            value = None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, AppRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in FIELDS) and (
+            self._extra == other._extra
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"AppRecord({self.folder_name!r})"
+
+
+_FIELD_SET = frozenset(FIELDS)
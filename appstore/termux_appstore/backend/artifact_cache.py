@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Content-addressed cache of downloaded app artifacts.
+
+``download_file`` in ``inbuild_functions`` keeps every verified download
+as ``<APPSTORE_ARTIFACT_CACHE_DIR>/<sha256>`` and touches an entry each
+time it reuses it, so a reinstall, a rollback or the same deb installed
+into another distro skips the network.  This module only enforces the
+size cap: the least recently used entries are evicted first.
+"""
+
+import logging
+import os
+import time
+
+from termux_appstore.constants import APPSTORE_ARTIFACT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Partial copies older than this are left over from a killed script.
+_STALE_TMP_AGE = 24 * 3600
+
+
+def _entries(cache_dir):
+    """Yield ``(path, size, mtime, is_tmp)`` for every cache file."""
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        yield path, st.st_size, st.st_mtime, ".tmp." in name
+
+
+def cache_usage(cache_dir=APPSTORE_ARTIFACT_CACHE_DIR):
+    """Return ``(entry_count, total_bytes)`` of the artifact cache."""
+    count = total = 0
+    for _, size, _, is_tmp in _entries(cache_dir):
+        if not is_tmp:
+            count += 1
+            total += size
+    return count, total
+
+
+def prune_artifact_cache(max_bytes, cache_dir=APPSTORE_ARTIFACT_CACHE_DIR):
+    """Evict least recently used artifacts until the cache fits *max_bytes*.
+
+    Args:
+        max_bytes: Size cap in bytes; ``0`` empties the cache.
+        cache_dir: Cache directory.
+
+    Returns:
+        int: Number of bytes freed.
+    """
+    now = time.time()
+    freed = 0
+    entries = []
+    for path, size, mtime, is_tmp in _entries(cache_dir):
+        if is_tmp:
+            if now - mtime > _STALE_TMP_AGE:
+                freed += _remove(path, size)
+            continue
+        entries.append((mtime, path, size))
+
+    total = sum(size for _, _, size in entries)
+    for _, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        logger.debug("Evicting cached artifact %s", os.path.basename(path))
+        freed += _remove(path, size)
+        total -= size
+    return freed
+
+
+def _remove(path, size):
+    try:
+        os.remove(path)
+        return size
+    except OSError as e:
+        logger.error("Error removing %s: %s", path, e)
+        return 0
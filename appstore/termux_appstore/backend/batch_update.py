@@ -0,0 +1,167 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Planning for "Update all".
+
+Most app scripts only call ``package_install_and_check`` (or
+``pd_package_install_and_check``) on a few repo packages.  Running one
+such script per app costs one package-manager run — with its own lock,
+index refresh and trigger processing — per app.  This module spots
+those scripts and merges their packages into one generated script per
+package manager; everything else stays a custom script that must run
+on its own.
+"""
+
+import re
+import shlex
+
+from termux_appstore.constants import TERMUX_PREFIX
+
+NATIVE = "native"
+DISTRO = "distro"
+
+# Script calls that only install repo packages, and the batch they join.
+_BATCHABLE_CALLS = {
+    "package_install_and_check": NATIVE,
+    "pd_package_install_and_check": DISTRO,
+}
+
+# Calls that don't change what gets installed.
+_NEUTRAL_CALLS = ("set", "source", "__appstore_begin", "__appstore_end")
+_NEUTRAL_PREFIXES = ("progress_", "print_", "log_")
+
+_ASSIGNMENT = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=(.*)$")
+_VARIABLE = re.compile(r"\$\{?([A-Za-z_][A-Za-z0-9_]*)\}?")
+_SHELL_SYNTAX = re.compile(r"[;&|<>()`\\*?]")
+
+
+def classify_script(text):
+    """Decide whether a script can join a batch update.
+
+    Args:
+        text: Install script contents (as downloaded or prepared).
+
+    Returns:
+        tuple | None: ``(kind, packages)`` where *kind* is
+        :data:`NATIVE` or :data:`DISTRO`, or ``None`` when the script
+        does anything besides installing repo packages.
+    """
+    variables = {}
+    kind = None
+    packages = []
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        m = _ASSIGNMENT.match(line)
+        if m:
+            try:
+                words = shlex.split(m.group(2))
+            except ValueError:
+                return None
+            variables[m.group(1)] = words[0] if words else ""
+            continue
+
+        try:
+            words = shlex.split(line)
+        except ValueError:
+            return None
+        command, args = words[0], words[1:]
+
+        if command in _NEUTRAL_CALLS or command.startswith(_NEUTRAL_PREFIXES):
+            continue
+        call_kind = _BATCHABLE_CALLS.get(command)
+        if call_kind is None or (kind is not None and call_kind != kind):
+            return None
+        kind = call_kind
+
+        for arg in args:
+            if arg == "--just":
+                continue
+            unresolved = False
+
+            def _expand(match):
+                nonlocal unresolved
+                if match.group(1) not in variables:
+                    unresolved = True
+                    return ""
+                return variables[match.group(1)]
+
+            value = _VARIABLE.sub(_expand, arg)
+            if unresolved or "$" in value or _SHELL_SYNTAX.search(value):
+                return None
+            packages.extend(value.split())
+
+    if kind is None or not packages:
+        return None
+    return kind, packages
+
+
+def repo_package(app, distro=None):
+    """Return ``(kind, package)`` for an app that tracks a repo package.
+
+    Such apps carry a ``*_local_version`` placeholder in ``apps.json``
+    (kept as ``version_source`` after refresh resolves it).  Their
+    install scripts may first configure a third-party repository, but
+    once installed an update only needs the package itself.
+
+    Returns:
+        tuple | None: ``(kind, package_name)`` or ``None``.
+    """
+    source = app.get("version_source") or app.get("version")
+    if source == "termux_local_version" and app.get("package_name"):
+        return NATIVE, app["package_name"]
+    if source == "distro_local_version" and distro:
+        package = app.get(f"{distro}_package_name") or app.get("package_name")
+        if package:
+            return DISTRO, package
+    return None
+
+
+def plan_batch_update(entries, distro=None):
+    """Group apps for a batch update.
+
+    Apps that track a repo package (:func:`repo_package`) are batched
+    from their metadata; the rest are batched when their script passes
+    :func:`classify_script`.
+
+    Args:
+        entries: Iterable of ``(app, script_text)``; *script_text* may
+            be ``None`` when it was not fetched or could not be.
+        distro: Selected distro, or ``None`` when distro support is
+            off (distro apps then stay custom).
+
+    Returns:
+        dict: ``{"native": [(app, packages)], "distro": [(app,
+        packages)], "custom": [app]}``.
+    """
+    plan = {NATIVE: [], DISTRO: [], "custom": []}
+    for app, text in entries:
+        tracked = repo_package(app, distro)
+        if tracked is not None:
+            result = (tracked[0], [tracked[1]])
+        else:
+            result = classify_script(text) if text else None
+        if result is None or (result[0] == DISTRO and not distro):
+            plan["custom"].append(app)
+        else:
+            kind, packages = result
+            plan[kind].append((app, packages))
+    return plan
+
+
+def build_batch_script(kind, packages):
+    """Return a script that updates *packages* in one package-manager run.
+
+    Args:
+        kind: :data:`NATIVE` or :data:`DISTRO`.
+        packages: Package names; duplicates are dropped.
+
+    Returns:
+        str: Script text ready for
+        :func:`~termux_appstore.backend.script_runner.prepare_script`.
+    """
+    unique = list(dict.fromkeys(packages))
+    func = "package_upgrade_batch" if kind == NATIVE else "pd_package_upgrade_batch"
+    args = " ".join(shlex.quote(p) for p in unique)
+    return f"#!{TERMUX_PREFIX}/bin/bash\n{func} {args}\n"
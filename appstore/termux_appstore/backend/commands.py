@@ -0,0 +1,251 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Single entry point for running external commands.
+
+Every shell-out in the app store goes through :func:`run` (wait for the
+result) or :func:`spawn` (long-running, streamed processes).  Commands
+are grouped in classes — package-manager queries, proot logins,
+downloads, ... — and each class has a default timeout and a cap on how
+many of its commands :func:`run` lets execute at once, so a refresh
+cannot fork dozens of proot sessions in parallel.
+
+Each command's wall time, exit status and output size are recorded.
+:func:`stats` and :func:`recent_commands` return snapshots for display,
+e.g. in a debug panel.
+"""
+
+import collections
+import logging
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Command classes
+PACKAGE = "package"  # apt/dpkg/pacman on the Termux side
+PROOT = "proot"  # anything run through a proot/chroot distro login
+DOWNLOAD = "download"
+SCRIPT = "script"  # install/uninstall scripts and other user-visible jobs
+APP = "app"  # apps launched by the user
+GENERAL = "general"
+
+# Default timeout (seconds) and concurrency cap of each class; ``None``
+# means no limit.  Callers may pass a longer timeout for known slow
+# operations such as ``apt update``.
+LIMITS = {
+    PACKAGE: (60, 4),
+    PROOT: (60, 2),
+    DOWNLOAD: (300, 4),
+    SCRIPT: (None, None),
+    APP: (None, None),
+    GENERAL: (30, 8),
+}
+
+# Pass as ``timeout`` to run a command without any time limit
+NO_TIMEOUT = 0
+
+RECENT_COMMANDS = 50
+
+_lock = threading.Lock()
+_slots = {
+    kind: threading.BoundedSemaphore(cap)
+    for kind, (_, cap) in LIMITS.items()
+    if cap is not None
+}
+_recent = collections.deque(maxlen=RECENT_COMMANDS)
+
+
+def _new_counters():
+    return {
+        "started": 0,
+        "running": 0,
+        "waiting": 0,
+        "failed": 0,
+        "timeouts": 0,
+        "total_time": 0.0,
+        "max_time": 0.0,
+        "output_bytes": 0,
+    }
+
+
+_counters = {kind: _new_counters() for kind in LIMITS}
+
+
+def _describe(args):
+    if isinstance(args, str):
+        return args
+    if len(args) == 3 and args[:2] == ["bash", "-c"]:
+        return args[2]
+    return " ".join(str(a) for a in args)
+
+
+def _output_size(output):
+    return len(output) if output else 0
+
+
+def _started(kind):
+    with _lock:
+        c = _counters[kind]
+        c["started"] += 1
+        c["running"] += 1
+
+
+def _finished(kind, args, elapsed, returncode, output_bytes=None):
+    with _lock:
+        c = _counters[kind]
+        c["running"] -= 1
+        c["total_time"] += elapsed
+        c["max_time"] = max(c["max_time"], elapsed)
+        if returncode is None:
+            c["timeouts"] += 1
+        elif returncode != 0:
+            c["failed"] += 1
+        if output_bytes:
+            c["output_bytes"] += output_bytes
+        _recent.append(
+            {
+                "kind": kind,
+                "command": _describe(args),
+                "time": round(elapsed, 3),
+                "returncode": returncode,
+                "output_bytes": output_bytes,
+            }
+        )
+
+
+def run(args, kind=GENERAL, timeout=None, **kwargs):
+    """Run a command and wait for it, like :func:`subprocess.run`.
+
+    Blocks while *kind* already has its maximum number of commands
+    running.
+
+    Args:
+        args: Argument list (no ``shell=True``; use :func:`run_shell`).
+        kind: Command class, e.g. :data:`PACKAGE` or :data:`PROOT`.
+        timeout: Seconds before the command is killed; defaults to the
+            class timeout.  :data:`NO_TIMEOUT` lets it run as long as it
+            takes.
+        **kwargs: Passed to :func:`subprocess.run`.
+
+    Returns:
+        subprocess.CompletedProcess: The finished command.
+
+    Raises:
+        subprocess.TimeoutExpired: The command ran past its timeout.
+        OSError: The command could not be started.
+    """
+    if timeout is None:
+        timeout = LIMITS[kind][0]
+    elif timeout == NO_TIMEOUT:
+        timeout = None
+    slot = _slots.get(kind)
+    if slot is not None and not slot.acquire(blocking=False):
+        with _lock:
+            _counters[kind]["waiting"] += 1
+        slot.acquire()
+        with _lock:
+            _counters[kind]["waiting"] -= 1
+
+    _started(kind)
+    start = time.monotonic()
+    returncode = output_bytes = None
+    try:
+        result = subprocess.run(args, timeout=timeout, **kwargs)
+        returncode = result.returncode
+        output_bytes = _output_size(result.stdout) + _output_size(result.stderr)
+        return result
+    except subprocess.TimeoutExpired:
+        logger.warning("Command timed out after %ss: %s", timeout, _describe(args))
+        raise
+    except OSError:
+        returncode = -1
+        raise
+    finally:
+        _finished(kind, args, time.monotonic() - start, returncode, output_bytes)
+        if slot is not None:
+            slot.release()
+
+
+def run_shell(command, kind=GENERAL, timeout=None, **kwargs):
+    """Run a bash command line through :func:`run`."""
+    return run(["bash", "-c", command], kind=kind, timeout=timeout, **kwargs)
+
+
+class _TrackedPopen(subprocess.Popen):
+    """A :class:`subprocess.Popen` that reports to the counters on exit."""
+
+    def __init__(self, args, kind, **kwargs):
+        self._kind = kind
+        self._start = time.monotonic()
+        self._reported = False
+        super().__init__(args, **kwargs)
+        _started(kind)
+
+    def _report(self):
+        if not self._reported and self.returncode is not None:
+            self._reported = True
+            _finished(
+                self._kind, self.args, time.monotonic() - self._start, self.returncode
+            )
+
+    def poll(self):
+        returncode = super().poll()
+        self._report()
+        return returncode
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout)
+        self._report()
+        return returncode
+
+
+def spawn(args, kind=SCRIPT, **kwargs):
+    """Start a long-running command, like :class:`subprocess.Popen`.
+
+    Streamed processes are counted but not capped: they are user
+    actions that may run for minutes.  Wall time and exit status are
+    recorded once the caller's ``wait()`` or ``poll()`` sees the exit.
+
+    Args:
+        args: Argument list.
+        kind: Command class.
+        **kwargs: Passed to :class:`subprocess.Popen`.
+
+    Returns:
+        subprocess.Popen: The started process.
+    """
+    return _TrackedPopen(args, kind, **kwargs)
+
+
+def record(kind, args, elapsed, returncode, output_bytes=None):
+    """Record a command that ran without a process of its own.
+
+    Used for requests answered by an already running helper, such as
+    the persistent distro shell, so they still show up in the stats.
+
+    Args:
+        kind: Command class.
+        args: The command line, for :func:`recent_commands`.
+        elapsed: Wall time in seconds.
+        returncode: Exit status; ``None`` for a timeout.
+        output_bytes: Size of the captured output.
+    """
+    _started(kind)
+    _finished(kind, args, elapsed, returncode, output_bytes)
+
+
+def stats():
+    """Return a snapshot of the per-class counters.
+
+    Returns:
+        dict: ``{kind: {"started", "running", "waiting", "failed",
+        "timeouts", "total_time", "max_time", "output_bytes"}}``.
+    """
+    with _lock:
+        return {kind: dict(c) for kind, c in _counters.items()}
+
+
+def recent_commands():
+    """Return the most recently finished commands, oldest first."""
+    with _lock:
+        return list(_recent)
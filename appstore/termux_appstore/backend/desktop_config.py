@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""The termux-desktop configuration, read once per change.
+
+termux-desktop records in ``$PREFIX/etc/termux-desktop/configuration.conf``
+whether a distro is installed, which one and how it is entered.  The
+catalog filter, :class:`~termux_appstore.backend.distro.DistroConfig`,
+the refresh and the window all need those values.  :func:`read_config`
+parses the file again only when its mtime or size changed, and
+callbacks registered with :func:`subscribe` hear when the distro
+settings differ from the last read, so callers can drop what depended
+on the old distro instead of refreshing everything.
+"""
+
+import collections
+import logging
+import os
+import threading
+
+from termux_appstore.constants import TERMUX_PREFIX
+
+logger = logging.getLogger(__name__)
+
+TERMUX_DESKTOP_CONFIG = os.path.join(
+    TERMUX_PREFIX, "etc", "termux-desktop", "configuration.conf"
+)
+
+DesktopConfig = collections.namedtuple(
+    "DesktopConfig",
+    ["exists", "distro_enabled", "selected_distro", "selected_distro_type"],
+)
+DesktopConfig.__doc__ = """Distro settings from ``configuration.conf``.
+
+``exists`` is ``False`` when the file is missing; the other fields
+then hold the defaults (no distro, ``"proot"``).
+"""
+
+_DEFAULT = DesktopConfig(False, False, None, "proot")
+
+# File stamp of the last read; _UNREAD until the first one
+_UNREAD = object()
+_lock = threading.Lock()
+_stamp = _UNREAD
+_config = _DEFAULT
+_subscribers = []
+
+
+def read_config():
+    """Return the current :class:`DesktopConfig`.
+
+    The file is parsed again only when it changed since the last call;
+    subscribers are notified when the distro settings changed.
+    """
+    global _stamp, _config
+    try:
+        st = os.stat(TERMUX_DESKTOP_CONFIG)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        stamp = None
+
+    with _lock:
+        if stamp == _stamp:
+            return _config
+        old = _config
+        first = _stamp is _UNREAD
+        if stamp is None:
+            logger.warning("Termux Desktop configuration file not found")
+            new = _DEFAULT
+        else:
+            new = _parse(TERMUX_DESKTOP_CONFIG)
+        _stamp, _config = stamp, new
+        subscribers = list(_subscribers)
+
+    if not first and new[1:] != old[1:]:
+        logger.info("Termux Desktop configuration changed: %s", new)
+        for callback in subscribers:
+            callback(old, new)
+    return new
+
+
+def subscribe(callback):
+    """Call ``callback(old, new)`` whenever the distro settings change.
+
+    Changes are noticed by :func:`read_config`; the callback runs on the
+    thread that called it.
+    """
+    with _lock:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    """Stop calling *callback*."""
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def _parse(path):
+    """Parse ``configuration.conf``; unreadable files give the defaults."""
+    distro_enabled = False
+    selected_distro = None
+    selected_distro_type = "proot"
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("#") or "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                value = value.strip().strip('"').strip("'").lower()
+                if key == "distro_add_answer":
+                    if value in ("y", "yes"):
+                        distro_enabled = True
+                    elif value in ("n", "no"):
+                        distro_enabled = False
+                    else:
+                        logger.warning(
+                            "Unrecognized value for distro_add_answer: '%s'", value
+                        )
+                elif key == "selected_distro":
+                    selected_distro = value or None
+                elif key == "selected_distro_type":
+                    selected_distro_type = value or "proot"
+    except OSError as e:
+        logger.error("Error reading Termux Desktop config: %s", e)
+        return DesktopConfig(True, False, None, "proot")
+
+    config = DesktopConfig(True, distro_enabled, selected_distro, selected_distro_type)
+    logger.info(
+        "Termux Desktop config: distro enabled: %s, distro: %s (%s)",
+        distro_enabled,
+        selected_distro,
+        selected_distro_type,
+    )
+    return config
@@ -3,16 +3,34 @@
 
 Handles proot-distro / chroot-distro configuration and provides helpers
 to check whether native or distro packages are installed.
+
+Distro checks read the distro's root filesystem directly when Termux can
+see it (proot-distro keeps it under ``installed-rootfs``): the package
+database is parsed on the host and paths are checked with ``os.stat``.
+Otherwise they run in the persistent shell of
+:mod:`~termux_appstore.backend.distro_shell`, since logging in to the
+distro for each check takes seconds.
 """
 
+import contextlib
+import errno
+import logging
 import os
 import re
 import shlex
 import shutil
+import sqlite3
+import struct
 import subprocess
+import threading
 
+from termux_appstore.backend import commands
+from termux_appstore.backend.desktop_config import read_config
+from termux_appstore.backend.distro_shell import distro_shell
 from termux_appstore.constants import TERMUX_PREFIX
 
+logger = logging.getLogger(__name__)
+
 # Distro configuration
 
 
@@ -29,42 +47,33 @@ class DistroConfig:
         """Load distro settings from termux-desktop ``configuration.conf``.
 
         Reads ``distro_add_answer``, ``selected_distro``, and
-        ``selected_distro_type`` directly from the termux-desktop
-        configuration file.
+        ``selected_distro_type`` through
+        :func:`~termux_appstore.backend.desktop_config.read_config`, so
+        calling it again is cheap until the file changes.
         """
-        try:
-            termux_desktop_config = os.path.join(
-                TERMUX_PREFIX, "etc", "termux-desktop", "configuration.conf"
-            )
-            if not os.path.exists(termux_desktop_config):
-                print("Termux desktop config not found. Distro support disabled.")
-                return
-
-            with open(termux_desktop_config, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("distro_add_answer="):
-                        value = line.split("=")[1].strip().strip('"').strip("'").lower()
-                        self.distro_enabled = value in ("y", "yes")
-                        print(
-                            f"distro_add_answer={value} -> enabled: {self.distro_enabled}"
-                        )
-                    elif line.startswith("selected_distro="):
-                        self.selected_distro = (
-                            line.split("=")[1].strip().strip('"').strip("'").lower()
-                        )
-                        print(f"selected_distro: {self.selected_distro}")
-                    elif line.startswith("selected_distro_type="):
-                        self.selected_distro_type = (
-                            line.split("=")[1].strip().strip('"').strip("'").lower()
-                        )
-                        print(f"selected_distro_type: {self.selected_distro_type}")
-
-        except Exception as e:
-            print(f"Error reading distro configuration: {e}")
-            self.distro_enabled = False
-            self.selected_distro = None
-            self.selected_distro_type = "proot"
+        config = read_config()
+        if not config.exists:
+            logger.info("Termux desktop config not found. Distro support disabled.")
+        self.distro_enabled = config.distro_enabled
+        self.selected_distro = config.selected_distro
+        self.selected_distro_type = config.selected_distro_type
+
+    def login_args(self, selected_distro=None):
+        """Build the distro login command, up to the ``--`` separator.
+
+        Args:
+            selected_distro: Override the configured distro name.
+
+        Returns:
+            list: e.g. ``["proot-distro", "login", "ubuntu", "--shared-tmp", "--"]``
+        """
+        if selected_distro is None:
+            selected_distro = self.selected_distro
+
+        tool = (
+            "chroot-distro" if self.selected_distro_type == "chroot" else "proot-distro"
+        )
+        return [tool, "login", selected_distro, "--shared-tmp", "--"]
 
     def get_command(self, selected_distro=None):
         """Build the distro login command prefix.
@@ -75,13 +84,306 @@ class DistroConfig:
         Returns:
             str: e.g. ``"proot-distro login ubuntu --shared-tmp -- /bin/bash -c"``
         """
-        if selected_distro is None:
-            selected_distro = self.selected_distro
+        return " ".join(self.login_args(selected_distro) + ["/bin/bash", "-c"])
+
+
+# Distro root filesystems
+
+# Where proot-distro and chroot-distro keep installed distros
+PROOT_ROOTFS_DIR = os.path.join(
+    TERMUX_PREFIX, "var", "lib", "proot-distro", "installed-rootfs"
+)
+CHROOT_ROOTFS_DIR = "/data/local/chroot-distro"
+
+# Package databases inside a rootfs
+DPKG_STATUS = "/var/lib/dpkg/status"
+PACMAN_LOCAL = "/var/lib/pacman/local"
+RPM_SQLITE_DBS = ("/usr/lib/sysimage/rpm/rpmdb.sqlite", "/var/lib/rpm/rpmdb.sqlite")
+PACKAGE_DATABASES = (DPKG_STATUS, PACMAN_LOCAL, *RPM_SQLITE_DBS)
+
+# rpm header tags and types
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPM_INT32_TYPE = 4
+RPM_STRING_TYPE = 6
+
+MAX_SYMLINKS = 40
+
+# {(db_path, mtime_ns, size): {package: version}}; one entry per database
+_package_cache = {}
+_package_cache_lock = threading.Lock()
+
 
-        if self.selected_distro_type == "chroot":
-            return f"chroot-distro login {selected_distro} --shared-tmp -- /bin/bash -c"
-        else:
-            return f"proot-distro login {selected_distro} --shared-tmp -- /bin/bash -c"
+class DistroRootfs:
+    """Read-only view of a distro's root filesystem from the Termux side.
+
+    Absolute symlinks are resolved inside the rootfs, not on the host.
+
+    Args:
+        path: Host path of the rootfs directory.
+        databases: In-distro paths of the package databases to look
+            for, in order; defaults to every supported one.
+    """
+
+    def __init__(self, path, databases=None):
+        self.path = path
+        self.databases = databases or PACKAGE_DATABASES
+
+    def resolve(self, path):
+        """Map the absolute in-distro *path* to a host path.
+
+        Raises:
+            OSError: A symlink loop.
+        """
+        parts = [p for p in path.split("/") if p and p != "."]
+        resolved = self.path
+        links = 0
+        while parts:
+            part = parts.pop(0)
+            if part == "..":
+                if resolved != self.path:
+                    resolved = os.path.dirname(resolved)
+                continue
+            candidate = os.path.join(resolved, part)
+            try:
+                target = os.readlink(candidate)
+            except OSError:
+                # Not a symlink, or missing: the final stat decides.
+                resolved = candidate
+                continue
+            links += 1
+            if links > MAX_SYMLINKS:
+                raise OSError(errno.ELOOP, "Too many symbolic links", path)
+            if target.startswith(self.path + "/"):
+                # proot's link2symlink emulates hard links with host paths.
+                target = target[len(self.path) :]
+            if target.startswith("/"):
+                resolved = self.path
+            parts = [p for p in target.split("/") if p and p != "."] + parts
+        return resolved
+
+    def exists(self, path):
+        """Return whether *path* exists inside the distro.
+
+        Returns:
+            bool | None: ``None`` when the rootfs cannot be read.
+        """
+        try:
+            os.stat(self.resolve(path))
+            return True
+        except FileNotFoundError:
+            return False
+        except NotADirectoryError:
+            return False
+        except OSError as e:
+            if e.errno == errno.ELOOP:
+                return False
+            return None
+
+    def package_database(self):
+        """Return the host path of the package database in use.
+
+        Returns:
+            str | None: The first of :attr:`databases` that exists.
+        """
+        for db in self.databases:
+            try:
+                host_path = self.resolve(db)
+                if os.path.exists(host_path):
+                    return host_path
+            except OSError:
+                continue
+        return None
+
+    def installed_packages(self):
+        """Return the installed packages of the distro.
+
+        The dpkg, pacman and rpm (sqlite) databases are supported.  The
+        result is cached until the database changes.
+
+        Returns:
+            dict | None: ``{package_name: version}``, or ``None`` when no
+            readable package database was found.
+        """
+        host_path = self.package_database()
+        if host_path is None:
+            return None
+        try:
+            st = os.stat(host_path)
+        except OSError:
+            return None
+        key = (host_path, st.st_mtime_ns, st.st_size)
+        with _package_cache_lock:
+            packages = _package_cache.get(key)
+        if packages is not None:
+            return packages
+        try:
+            packages = _READERS[os.path.basename(host_path)](host_path)
+        except (OSError, ValueError, sqlite3.Error, struct.error) as e:
+            logger.error("Could not read %s: %s", host_path, e)
+            return None
+        with _package_cache_lock:
+            for old in [k for k in _package_cache if k[0] == host_path]:
+                del _package_cache[old]
+            _package_cache[key] = packages
+        return packages
+
+
+def find_rootfs(selected_distro, distro_config):
+    """Locate the root filesystem of *selected_distro*.
+
+    Args:
+        selected_distro: Distro name, e.g. ``"ubuntu"``.
+        distro_config: A :class:`DistroConfig`; its
+            ``selected_distro_type`` picks proot-distro or chroot-distro.
+
+    Returns:
+        DistroRootfs | None: ``None`` when the rootfs does not exist or
+        Termux may not read it (chroot rootfs usually needs root).
+    """
+    if not selected_distro:
+        return None
+    base = (
+        CHROOT_ROOTFS_DIR
+        if distro_config.selected_distro_type == "chroot"
+        else PROOT_ROOTFS_DIR
+    )
+    path = os.path.join(base, selected_distro)
+    if not os.path.isdir(path) or not os.access(path, os.R_OK | os.X_OK):
+        return None
+    return DistroRootfs(path)
+
+
+def native_rootfs():
+    """Return Termux's own prefix as a :class:`DistroRootfs`.
+
+    Termux keeps its package database under ``$PREFIX/var/lib`` the way
+    a distro keeps it under ``/var/lib``, so the same reader works.  Only
+    the database of the active package manager is used; the other one
+    may be left over from a switch.
+    """
+    database = PACMAN_LOCAL if shutil.which("pacman") else DPKG_STATUS
+    return DistroRootfs(TERMUX_PREFIX, (database,))
+
+
+def _read_dpkg_status(path):
+    """Parse ``/var/lib/dpkg/status`` into ``{package: version}``."""
+    packages = {}
+    name = version = status = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("Package:"):
+                name = line[8:].strip()
+            elif line.startswith("Version:"):
+                version = line[8:].strip()
+            elif line.startswith("Status:"):
+                status = line[7:].split()
+            elif not line.strip():
+                if name and status and status[-1] == "installed":
+                    packages[name] = version or ""
+                name = version = status = None
+    if name and status and status[-1] == "installed":
+        packages[name] = version or ""
+    return packages
+
+
+def _read_pacman_local(path):
+    """Read pacman's local database into ``{package: version}``.
+
+    Each installed package has a ``<name>-<pkgver>-<pkgrel>`` directory.
+    """
+    packages = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            parts = entry.name.rsplit("-", 2)
+            if len(parts) == 3:
+                packages[parts[0]] = f"{parts[1]}-{parts[2]}"
+    return packages
+
+
+def _read_rpm_sqlite(path):
+    """Read an rpm sqlite database into ``{package: [epoch:]version-release}``."""
+    query = "SELECT blob FROM Packages"
+    try:
+        with contextlib.closing(
+            sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        ) as db:
+            rows = db.execute(query).fetchall()
+    except sqlite3.OperationalError:
+        # No write access for the WAL index: read the file as it is.
+        with contextlib.closing(
+            sqlite3.connect(f"file:{path}?immutable=1", uri=True)
+        ) as db:
+            rows = db.execute(query).fetchall()
+
+    packages = {}
+    for (blob,) in rows:
+        fields = _rpm_header_fields(blob)
+        name = fields.get(RPMTAG_NAME)
+        if not name:
+            continue
+        version = f"{fields.get(RPMTAG_VERSION, '')}-{fields.get(RPMTAG_RELEASE, '')}"
+        if fields.get(RPMTAG_EPOCH):
+            version = f"{fields[RPMTAG_EPOCH]}:{version}"
+        packages[name] = version
+    return packages
+
+
+def _rpm_header_fields(blob):
+    """Return the name, version, release and epoch tags of an rpm header.
+
+    A header is an entry count and data size, the index entries
+    ``(tag, type, offset, count)`` and the data store, all big-endian.
+    """
+    count, _ = struct.unpack_from(">II", blob, 0)
+    store = 8 + count * 16
+    fields = {}
+    for i in range(count):
+        tag, kind, offset, _ = struct.unpack_from(">iIiI", blob, 8 + i * 16)
+        if tag not in (RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH):
+            continue
+        start = store + offset
+        if kind == RPM_STRING_TYPE:
+            fields[tag] = blob[start : blob.index(b"\0", start)].decode(
+                "utf-8", "replace"
+            )
+        elif kind == RPM_INT32_TYPE:
+            fields[tag] = struct.unpack_from(">I", blob, start)[0]
+    return fields
+
+
+# Readers by database file name
+_READERS = {
+    "status": _read_dpkg_status,
+    "local": _read_pacman_local,
+    "rpmdb.sqlite": _read_rpm_sqlite,
+}
+
+
+def executable_path(run_cmd):
+    """Return the first absolute path in an app's *run_cmd*, or ``None``."""
+    if not run_cmd:
+        return None
+    try:
+        parts = shlex.split(run_cmd)
+    except ValueError:
+        parts = run_cmd.split()
+
+    for part in parts:
+        if part.startswith("/"):
+            return part
+
+    path_match = re.search(r"/[^ ]+", run_cmd)
+    if path_match:
+        return path_match.group(0).strip()
+    return None
+
+
+# Package checks
 
 
 def check_package_installed(package_name):
@@ -99,14 +401,20 @@ def check_package_installed(package_name):
 
         if pkg_manager == "apt":
             cmd = f"dpkg -s {package_name}"
-            result = subprocess.run(
-                cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            result = commands.run(
+                cmd.split(),
+                commands.PACKAGE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
             return result.returncode == 0
         elif pkg_manager == "pacman":
             cmd = f"pacman -Qi {package_name}"
-            result = subprocess.run(
-                cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            result = commands.run(
+                cmd.split(),
+                commands.PACKAGE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
             return result.returncode == 0
         return False
@@ -114,6 +422,12 @@ def check_package_installed(package_name):
         return False
 
 
+def _package_query(cmd):
+    """Return ``True`` when package-manager query *cmd* succeeds."""
+    result = commands.run_shell(cmd, commands.PACKAGE, capture_output=True)
+    return result.returncode == 0
+
+
 def check_native_package_installed(package_name):
     """Check if a native Termux package is installed.
 
@@ -128,36 +442,37 @@ def check_native_package_installed(package_name):
             f"source {TERMUX_PREFIX}/bin/termux-setup-package-manager "
             "&& echo $TERMUX_APP_PACKAGE_MANAGER"
         )
-        result = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True)
+        result = commands.run_shell(
+            cmd, commands.PACKAGE, capture_output=True, text=True
+        )
         pkg_manager = result.stdout.strip()
 
         if pkg_manager == "apt":
             cmd = f"dpkg -l | grep -q '^ii  {package_name}'"
-            if subprocess.run(["bash", "-c", cmd], capture_output=True).returncode == 0:
+            if _package_query(cmd):
                 return True
             cmd = f"apt list --installed 2>/dev/null | grep -q '^{package_name}/'"
-            return (
-                subprocess.run(["bash", "-c", cmd], capture_output=True).returncode == 0
-            )
+            return _package_query(cmd)
 
         elif pkg_manager == "pacman":
             cmd = f"pacman -Qi {package_name} 2>/dev/null"
-            if subprocess.run(["bash", "-c", cmd], capture_output=True).returncode == 0:
+            if _package_query(cmd):
                 return True
             cmd = f"pacman -Q {package_name} 2>/dev/null"
-            return (
-                subprocess.run(["bash", "-c", cmd], capture_output=True).returncode == 0
-            )
+            return _package_query(cmd)
 
         return False
     except Exception as e:
-        print(f"Error checking package installation status: {e}")
+        logger.error("Error checking package installation status: %s", e)
         return False
 
 
 def check_distro_package_installed(package_name, selected_distro, distro_config):
     """Check if a package is installed inside the selected distro.
 
+    Reads the distro's package database when its rootfs is readable and
+    asks the persistent distro shell otherwise.
+
     Args:
         package_name: Package name to check.
         selected_distro: Distro name (e.g. ``"ubuntu"``).
@@ -166,71 +481,70 @@ def check_distro_package_installed(package_name, selected_distro, distro_config)
     Returns:
         bool: ``True`` when the package is installed.
     """
+    rootfs = find_rootfs(selected_distro, distro_config)
+    if rootfs is not None:
+        packages = rootfs.installed_packages()
+        if packages is not None:
+            return package_name in packages
+
+    if selected_distro in ("ubuntu", "debian"):
+        cmd = (
+            f'dpkg -l | grep -q "^ii  {package_name}" || '
+            f'apt list --installed 2>/dev/null | grep -q "^{package_name}/"'
+        )
+    elif selected_distro == "fedora":
+        cmd = f"rpm -q {package_name} >/dev/null 2>&1"
+    elif selected_distro in ("arch", "archlinux"):
+        cmd = (
+            f"pacman -Qi {package_name} >/dev/null 2>&1 || "
+            f"pacman -Q {package_name} >/dev/null 2>&1"
+        )
+    else:
+        return False
+
     try:
-        cmd = distro_config.get_command(selected_distro)
-
-        if selected_distro in ("ubuntu", "debian"):
-            cmd += f' \'dpkg -l | grep -q "^ii  {package_name}" || '
-            cmd += f'apt list --installed 2>/dev/null | grep -q "^{package_name}/"\''
-        elif selected_distro == "fedora":
-            cmd += f" 'rpm -q {package_name} >/dev/null 2>&1'"
-        elif selected_distro in ("arch", "archlinux"):
-            cmd += f" 'pacman -Qi {package_name} >/dev/null 2>&1 || "
-            cmd += f"pacman -Q {package_name} >/dev/null 2>&1'"
-
-        result = subprocess.run(["bash", "-c", cmd], capture_output=True)
+        result = distro_shell(selected_distro, distro_config).run(cmd)
         return result.returncode == 0
-
     except Exception as e:
-        print(f"Error checking distro package installation status: {e}")
+        logger.error("Error checking distro package installation status: %s", e)
         return False
 
 
 def check_distro_app_installed_by_path(run_cmd, selected_distro, distro_config=None):
     """Check if a distro app is installed by verifying executable path.
 
+    The path is looked up in the distro's rootfs when it is readable and
+    tested in the persistent distro shell otherwise.
+
     Args:
         run_cmd: The run command from apps.json.
         selected_distro: Distro name.
+        distro_config: Optional :class:`DistroConfig`.
 
     Returns:
         bool: ``True`` when the executable path exists inside the distro.
     """
-    if not run_cmd or not selected_distro:
+    if not selected_distro:
         return False
 
-    try:
-        parts = shlex.split(run_cmd)
-    except ValueError:
-        parts = run_cmd.split()
-
-    executable_path = None
-    for part in parts:
-        if part.startswith("/"):
-            executable_path = part
-            break
+    path = executable_path(run_cmd)
+    if not path:
+        return False
 
-    if not executable_path:
-        path_match = re.search(r"/[^ ]+", run_cmd)
-        if path_match:
-            executable_path = path_match.group(0).strip()
+    if distro_config is None:
+        distro_config = DistroConfig()
 
-    if not executable_path:
-        return False
+    rootfs = find_rootfs(selected_distro, distro_config)
+    if rootfs is not None:
+        exists = rootfs.exists(path)
+        if exists is not None:
+            return exists
 
     try:
-        if distro_config is None:
-            distro_config = DistroConfig()
-
-        inner = f"test -e {shlex.quote(executable_path)}"
-        cmd = f"{distro_config.get_command(selected_distro)} {shlex.quote(inner)}"
-        result = subprocess.run(
-            ["bash", "-c", cmd],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=10,
+        result = distro_shell(selected_distro, distro_config).run(
+            f"test -e {shlex.quote(path)}", timeout=10
         )
         return result.returncode == 0
     except Exception as e:
-        print(f"Error checking distro app path {executable_path}: {e}")
+        logger.error("Error checking distro app path %s: %s", path, e)
         return False
@@ -0,0 +1,345 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""A persistent shell inside the selected distro.
+
+Starting proot takes seconds, so running every distro query through its
+own ``proot-distro login`` makes a refresh slow.  :func:`distro_shell`
+returns a session shared by the whole process: one ``bash`` inside the
+distro, started on first use, fed requests over its stdin and answering
+on its stdout.  It exits after :data:`IDLE_TIMEOUT` seconds without
+requests and is started again when it died or was closed.  When
+termux-desktop switches to another distro, the shell of the old one is
+stopped.
+
+Protocol — a request is the request id, the byte length of the command
+and the command, each of the first two on its own line::
+
+    7
+    16
+    dpkg -s firefox
+
+and the response is one header line followed by the command's stdout
+and stderr::
+
+    7 <exit status> <stdout bytes> <stderr bytes>
+
+Requests run one at a time, with stdin closed, in a subshell, so they
+cannot change the session's state.  The session is meant for queries:
+a request whose shell dies underneath it is sent again on a new shell.
+"""
+
+import atexit
+import itertools
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+
+from termux_appstore.backend import commands, desktop_config
+
+logger = logging.getLogger(__name__)
+
+# Seconds without requests before the shell exits
+IDLE_TIMEOUT = 300
+# Extra seconds the first request may take while proot starts
+START_TIMEOUT = 30
+
+READ_CHUNK = 64 * 1024
+
+# Runs inside the distro.  ``read -N`` counts bytes under LC_ALL=C.
+_SERVER = r"""
+export LC_ALL=C
+__out=$(mktemp) && __err=$(mktemp) || exit 1
+trap 'rm -f "$__out" "$__err"' EXIT
+while IFS= read -r __id && IFS= read -r __len && IFS= read -r -N "$__len" __cmd; do
+    (eval "$__cmd") </dev/null >"$__out" 2>"$__err"
+    __status=$?
+    printf '%s %d %d %d\n' "$__id" "$__status" \
+        "$(wc -c <"$__out")" "$(wc -c <"$__err")"
+    cat "$__out" "$__err"
+done
+"""
+
+
+class DistroShellError(OSError):
+    """The distro shell could not be started or stopped responding."""
+
+
+class _Disconnected(Exception):
+    """The shell closed its pipes."""
+
+
+class DistroShell:
+    """A lazily started ``bash`` session inside one distro.
+
+    Args:
+        distro: Distro name, e.g. ``"ubuntu"``.
+        distro_config: A :class:`~termux_appstore.backend.distro.DistroConfig`
+            that builds the login command.
+        idle_timeout: Seconds without requests before the shell exits.
+    """
+
+    def __init__(self, distro, distro_config, idle_timeout=IDLE_TIMEOUT):
+        self.distro = distro
+        self.distro_config = distro_config
+        self.idle_timeout = idle_timeout
+        self.starts = 0
+        self._lock = threading.Lock()
+        self._process = None
+        self._buffer = bytearray()
+        self._ids = itertools.count(1)
+        self._idle_timer = None
+
+    @property
+    def running(self):
+        """``True`` while the shell process is alive."""
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, command, timeout=60):
+        """Run *command* in the distro and wait for it.
+
+        Args:
+            command: A bash command line.
+            timeout: Seconds to wait for the result.  When it passes the
+                shell is killed, since the command cannot be interrupted
+                on its own; the next request starts a new one.
+
+        Returns:
+            subprocess.CompletedProcess: With ``stdout`` and ``stderr``
+            decoded as text.
+
+        Raises:
+            subprocess.TimeoutExpired: The command ran past *timeout*.
+            DistroShellError: The shell could not be started or died
+                twice in a row.
+        """
+        start = time.monotonic()
+        returncode = output_bytes = None
+        with self._lock:
+            self._cancel_idle_timer()
+            try:
+                result = self._run(command, timeout)
+                returncode = result.returncode
+                output_bytes = len(result.stdout) + len(result.stderr)
+                return result
+            except subprocess.TimeoutExpired:
+                raise
+            except Exception:
+                returncode = -1
+                raise
+            finally:
+                self._schedule_idle_close()
+                commands.record(
+                    commands.PROOT,
+                    command,
+                    time.monotonic() - start,
+                    returncode,
+                    output_bytes,
+                )
+
+    def _run(self, command, timeout):
+        for attempt in (1, 2):
+            extra = 0
+            if not self.running:
+                if self._process is not None:
+                    logger.info("%s shell exited; restarting it", self.distro)
+                    self._stop()
+                self._start()
+                extra = START_TIMEOUT
+            try:
+                return self._request(command, timeout + extra)
+            except _Disconnected:
+                self._stop()
+                if attempt == 2:
+                    raise DistroShellError(
+                        f"{self.distro} shell exited while running: {command}"
+                    )
+            except subprocess.TimeoutExpired:
+                logger.warning(
+                    "%s shell timed out after %ss: %s", self.distro, timeout, command
+                )
+                self._stop()
+                raise
+
+    def close(self):
+        """Stop the shell; the next request starts a new one."""
+        with self._lock:
+            self._cancel_idle_timer()
+            self._stop()
+
+    # Process management
+
+    def _start(self):
+        args = self.distro_config.login_args(self.distro) + [
+            "/bin/bash",
+            "--noprofile",
+            "--norc",
+            "-c",
+            _SERVER,
+        ]
+        try:
+            self._process = commands.spawn(
+                args,
+                commands.PROOT,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise DistroShellError(f"Could not start {self.distro} shell: {e}")
+        self._buffer.clear()
+        self.starts += 1
+        logger.info("Started %s shell (pid %s)", self.distro, self._process.pid)
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        for sig, grace in ((signal.SIGTERM, 2), (signal.SIGKILL, None)):
+            try:
+                os.killpg(process.pid, sig)
+            except OSError:
+                pass
+            try:
+                process.wait(timeout=grace)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _schedule_idle_close(self):
+        if self._process is None:
+            return
+        self._idle_timer = threading.Timer(self.idle_timeout, self._idle_close)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _idle_close(self):
+        # A request in flight reschedules the timer when it finishes.
+        if self._lock.acquire(blocking=False):
+            try:
+                if self._process is not None:
+                    logger.info("Stopping idle %s shell", self.distro)
+                self._stop()
+            finally:
+                self._lock.release()
+
+    # Protocol
+
+    def _request(self, command, timeout):
+        req_id = str(next(self._ids))
+        data = command.encode()
+        try:
+            self._process.stdin.write(f"{req_id}\n{len(data)}\n".encode() + data)
+            self._process.stdin.flush()
+        except OSError:
+            raise _Disconnected()
+
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                line = self._read_line(deadline)
+                fields = line.split()
+                if len(fields) == 4 and fields[0] == req_id.encode():
+                    break
+                # Login banners and warnings from proot end up here.
+                text = line.decode(errors="replace").rstrip()
+                logger.debug("%s shell: %s", self.distro, text)
+
+            returncode, out_len, err_len = (int(f) for f in fields[1:])
+            stdout = self._read_exact(out_len, deadline)
+            stderr = self._read_exact(err_len, deadline)
+        except TimeoutError:
+            raise subprocess.TimeoutExpired(command, timeout)
+        return subprocess.CompletedProcess(
+            command,
+            returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
+
+    def _fill(self, deadline):
+        """Read more output into the buffer, waiting until *deadline*."""
+        fd = self._process.stdout.fileno()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            if not sel.select(remaining):
+                raise TimeoutError()
+        chunk = os.read(fd, READ_CHUNK)
+        if not chunk:
+            raise _Disconnected()
+        self._buffer += chunk
+
+    def _read_line(self, deadline):
+        while True:
+            end = self._buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(self._buffer[: end + 1])
+                del self._buffer[: end + 1]
+                return line
+            self._fill(deadline)
+
+    def _read_exact(self, size, deadline):
+        while len(self._buffer) < size:
+            self._fill(deadline)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+_shells = {}
+_shells_lock = threading.Lock()
+
+
+def distro_shell(distro, distro_config):
+    """Return the shared :class:`DistroShell` for *distro*.
+
+    Args:
+        distro: Distro name.
+        distro_config: A :class:`~termux_appstore.backend.distro.DistroConfig`.
+    """
+    key = (distro, distro_config.selected_distro_type)
+    with _shells_lock:
+        shell = _shells.get(key)
+        if shell is None:
+            shell = _shells[key] = DistroShell(distro, distro_config)
+        return shell
+
+
+@atexit.register
+def close_all():
+    """Stop every distro shell."""
+    with _shells_lock:
+        shells = list(_shells.values())
+    for shell in shells:
+        shell.close()
+
+
+def _on_desktop_config_changed(old, new):
+    """Stop the old distro's shell when the selected distro changes."""
+    key = (old.selected_distro, old.selected_distro_type)
+    if new.distro_enabled and key == (new.selected_distro, new.selected_distro_type):
+        return
+    with _shells_lock:
+        shell = _shells.pop(key, None)
+    if shell is not None:
+        logger.info("Closing the %s shell; distro changed", old.selected_distro)
+        shell.close()
+
+
+desktop_config.subscribe(_on_desktop_config_changed)
@@ -0,0 +1,381 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Resumable, segmented artifact downloader.
+
+Run as a script by ``download_file`` in ``inbuild_functions`` (the app
+store exports its path as ``APPSTORE_FETCH_HELPER``)::
+
+    python3 downloader.py [--sha256 HEX] [--segments N] [--label NAME] URL DEST
+
+The file is fetched into ``DEST.part`` with up to *N* parallel HTTP
+``Range`` requests.  Segment offsets are saved to ``DEST.part.json``
+while downloading, so a dropped connection or a killed script resumes
+where it stopped instead of starting over.  The completed prefix is
+hashed while the download runs, so verification needs no second pass
+over the file.  Progress goes to stderr as ``__PHASE__ download|cur/total|msg``
+tokens when ``PROGRESS_ENABLED=1``.
+
+Stdlib only: it runs under whatever ``python3`` the script finds and
+does not import the rest of the package.
+
+Exit status: 0 done (and verified when ``--sha256`` is given), 1
+download failed (partial state kept for the next attempt), 2 hash
+mismatch (the file is left at ``DEST`` for inspection), 64 usage error.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import urllib.request
+
+CHUNK_SIZE = 256 * 1024
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+DEFAULT_SEGMENTS = 4
+REQUEST_TIMEOUT = 30
+SEGMENT_RETRIES = 5
+STATE_SAVE_INTERVAL = 1.0
+PROGRESS_INTERVAL = 0.5
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class DownloadError(Exception):
+    """The download could not be completed (state is kept)."""
+
+
+class _Segment:
+    """Byte range ``[start, end)`` of the file; ``pos`` is the next byte."""
+
+    __slots__ = ("start", "end", "pos")
+
+    def __init__(self, start, end, pos=None):
+        self.start = start
+        self.end = end
+        self.pos = start if pos is None else pos
+
+    @property
+    def done(self):
+        return self.pos >= self.end
+
+
+def _open(url, start=None):
+    headers = {"User-Agent": "termux-appstore"}
+    if start is not None:
+        headers["Range"] = f"bytes={start}-"
+    request = urllib.request.Request(url, headers=headers)
+    return urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT)
+
+
+def _validator(response):
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+
+class Download:
+    """One resumable download of *url* into *dest*.
+
+    Args:
+        url: Source URL.
+        dest: Final file path.
+        sha256: Expected hex digest, or ``None`` to skip verification.
+        segments: Maximum number of parallel range requests.
+        label: Name shown in progress messages.
+    """
+
+    def __init__(self, url, dest, sha256=None, segments=DEFAULT_SEGMENTS, label=None):
+        self.url = url
+        self.dest = dest
+        self.sha256 = sha256.lower() if sha256 else None
+        self.max_segments = max(1, segments)
+        self.label = label or os.path.basename(dest)
+        self.part = f"{dest}.part"
+        self.state_file = f"{dest}.part.json"
+
+        self.size = None
+        self.validator = None
+        self.segments = []
+        self._errors = []
+        self._hasher = hashlib.sha256()
+        self._hashed = 0
+        self._fd = None
+        self._last_report = 0.0
+        self._last_reported = None
+
+    # State
+
+    def _load_state(self):
+        """Return the saved state if it still describes ``.part``."""
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            if state["url"] != self.url:
+                return None
+            if os.path.getsize(self.part) != state["size"]:
+                return None
+            return state
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_state(self):
+        if self.size is None:
+            return
+        state = {
+            "url": self.url,
+            "size": self.size,
+            "validator": self.validator,
+            "segments": [[s.start, s.end, s.pos] for s in self.segments],
+        }
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def _discard_partial(self):
+        for path in (self.part, self.state_file):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # Download
+
+    def run(self):
+        """Download, verify and move into place.
+
+        Returns:
+            int: Process exit status (see module docstring).
+        """
+        state = self._load_state()
+        response = _open(self.url, start=0)
+        content_range = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+
+        if response.status != 206 or not content_range:
+            # No range support: a single stream that cannot be resumed.
+            self._discard_partial()
+            length = response.headers.get("Content-Length")
+            self.size = int(length) if length else None
+            self._stream_whole(response)
+        else:
+            self.size = int(content_range.group(3))
+            self.validator = _validator(response)
+            if state and state.get("validator") == self.validator:
+                self.segments = [_Segment(*s) for s in state["segments"]]
+                print(f"Resuming {self.label}", file=sys.stderr)
+            else:
+                self._discard_partial()
+                self.segments = self._plan_segments()
+                with open(self.part, "wb") as f:
+                    f.truncate(self.size)
+            self._fd = os.open(self.part, os.O_WRONLY)
+            try:
+                self._run_segments(response)
+            finally:
+                os.close(self._fd)
+            os.remove(self.state_file)
+
+        return self._finish()
+
+    def _plan_segments(self):
+        if not self.size:
+            return [_Segment(0, 0)]
+        count = max(1, min(self.max_segments, self.size // MIN_SEGMENT_SIZE))
+        step = -(-self.size // count)
+        return [
+            _Segment(start, min(start + step, self.size))
+            for start in range(0, self.size, step)
+        ]
+
+    def _run_segments(self, probe):
+        # The probe response already streams from byte 0; segment 0 reuses
+        # it unless it is resuming from further in.
+        first = self.segments[0]
+        if first.done or first.pos != first.start:
+            probe.close()
+            probe = None
+
+        threads = []
+        for segment in self.segments:
+            if segment.done:
+                continue
+            response, probe = (probe, None) if segment is first else (None, probe)
+            thread = threading.Thread(
+                target=self._segment_worker, args=(segment, response), daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        last_save = 0.0
+        while any(t.is_alive() for t in threads):
+            time.sleep(PROGRESS_INTERVAL)
+            self._hash_prefix()
+            self._report()
+            if time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+                self._save_state()
+                last_save = time.monotonic()
+
+        self._save_state()
+        if self._errors:
+            raise DownloadError(self._errors[0])
+        self._hash_prefix()
+        self._report()
+
+    def _open_segment(self, segment):
+        response = _open(self.url, start=segment.pos)
+        m = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if response.status != 206 or not m or int(m.group(3)) != self.size:
+            response.close()
+            raise DownloadError("server stopped honouring range requests")
+        if _validator(response) != self.validator:
+            response.close()
+            raise DownloadError("file changed on the server")
+        return response
+
+    def _segment_worker(self, segment, response):
+        failures = 0
+        while not segment.done:
+            pos = segment.pos
+            try:
+                if response is None:
+                    response = self._open_segment(segment)
+                while not segment.done:
+                    want = min(CHUNK_SIZE, segment.end - segment.pos)
+                    data = response.read(want)
+                    if not data:
+                        raise OSError("connection closed early")
+                    os.pwrite(self._fd, data, segment.pos)
+                    segment.pos += len(data)
+            except DownloadError as e:
+                self._errors.append(str(e))
+                return
+            except OSError as e:
+                failures = 1 if segment.pos > pos else failures + 1
+                if failures > SEGMENT_RETRIES:
+                    self._errors.append(str(e))
+                    return
+                time.sleep(min(30, 2**failures))
+            finally:
+                if response is not None:
+                    response.close()
+                    response = None
+
+    def _stream_whole(self, response):
+        received = 0
+        with response, open(self.part, "wb") as f:
+            while True:
+                data = response.read(CHUNK_SIZE)
+                if not data:
+                    break
+                f.write(data)
+                self._hasher.update(data)
+                received += len(data)
+                self._hashed = received
+                self._report(received)
+        if self.size is not None and received != self.size:
+            raise DownloadError(f"got {received} of {self.size} bytes")
+        self.size = received
+        self._report(received)
+
+    def _hash_prefix(self):
+        """Hash bytes that are now contiguous from the start of the file."""
+        ready = self.size
+        for segment in self.segments:
+            if not segment.done:
+                ready = segment.pos
+                break
+        if ready <= self._hashed:
+            return
+        with open(self.part, "rb") as f:
+            f.seek(self._hashed)
+            remaining = ready - self._hashed
+            while remaining:
+                data = f.read(min(CHUNK_SIZE * 4, remaining))
+                if not data:
+                    break
+                self._hasher.update(data)
+                remaining -= len(data)
+                self._hashed += len(data)
+
+    # Completion
+
+    def _finish(self):
+        if self.sha256 and self._hashed != self.size:
+            raise DownloadError("download incomplete")
+        os.replace(self.part, self.dest)
+        if self.sha256:
+            actual = self._hasher.hexdigest()
+            if actual != self.sha256:
+                print(
+                    f"Checksum mismatch for {self.label}: expected {self.sha256}, "
+                    f"got {actual}",
+                    file=sys.stderr,
+                )
+                return 2
+            print(f"Verified {self.label} (sha256 {actual})", file=sys.stderr)
+        return 0
+
+    # Progress
+
+    def _report(self, received=None):
+        if received is None:
+            received = sum(s.pos - s.start for s in self.segments)
+        now = time.monotonic()
+        if received == self._last_reported:
+            return
+        if received != self.size and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self._last_reported = received
+
+        mib = received / (1024 * 1024)
+        if self.size:
+            message = f"Downloading {self.label} ({mib:.1f}/{self.size / (1024 * 1024):.1f} MiB)"
+            counts = f"{received}/{self.size}"
+        else:
+            message = f"Downloading {self.label} ({mib:.1f} MiB)"
+            counts = "0"
+        if os.environ.get("PROGRESS_ENABLED") == "1":
+            print(f"__PHASE__ download|{counts}|{message}", file=sys.stderr, flush=True)
+        else:
+            print(message, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("url")
+    parser.add_argument("dest")
+    parser.add_argument("--sha256")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS)
+    parser.add_argument("--label")
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit:
+        return 64
+
+    download = Download(
+        args.url, args.dest, args.sha256, segments=args.segments, label=args.label
+    )
+
+    def _on_term(signum, frame):
+        raise SystemExit(1)
+
+    signal.signal(signal.SIGTERM, _on_term)
+    try:
+        return download.run()
+    except (DownloadError, OSError) as e:
+        print(f"Download of {download.label} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # Keep offsets for the next attempt, whatever stopped this one.
+        if os.path.exists(download.part) and download.segments:
+            try:
+                download._save_state()
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,73 +1,104 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 """Installed apps tracking.
 
-Manages the ``installed_apps.json`` file that records which apps the
-user has installed through the app store.
+Records which apps the user has installed through the app store, in
+the ``installed`` table of the state database
+(:mod:`termux_appstore.backend.store`).  Changes are written behind
+(see :mod:`termux_appstore.backend.write_behind`).
 """
 
-import json
-import os
-from pathlib import Path
+import threading
 
-from termux_appstore.constants import INSTALLED_APPS_FILE
+from termux_appstore.backend.store import get_store
 
 
 class InstalledApps:
-    """CRUD operations for the installed-apps list."""
+    """CRUD operations for the installed-apps set."""
 
     def __init__(self):
-        self._file = Path(INSTALLED_APPS_FILE)
-        self._file.parent.mkdir(parents=True, exist_ok=True)
-        self._apps = []
+        self._store = get_store()
+        self._lock = threading.Lock()
+        self._apps = set()
+        # Not yet written: folders whose state changed, or the whole set
+        self._changed = set()
+        self._replace = False
         self.load()
 
     def load(self):
-        """Load the installed-apps list from disk."""
-        try:
-            if os.path.exists(self._file):
-                with open(self._file) as f:
-                    self._apps = json.load(f)
-            else:
-                self._apps = []
-                self.save()
-        except (FileNotFoundError, json.JSONDecodeError):
-            self._apps = []
-            self.save()
+        """Load the installed-apps set from the database."""
+        apps = self._store.installed_apps()
+        with self._lock:
+            self._apps = apps
+            self._changed.clear()
+            self._replace = False
 
     def save(self):
-        """Persist the installed-apps list to disk."""
-        with open(self._file, "w") as f:
-            json.dump(self._apps, f, indent=2)
+        """Write the whole installed-apps set to the database now."""
+        with self._lock:
+            self._replace = True
+        self._write()()
+
+    def _write(self):
+        """Write the unwritten changes.
+
+        Returns:
+            callable: Forgets the written changes; call it once they
+            are committed.
+        """
+        with self._lock:
+            apps = set(self._apps)
+            changed = set(self._changed)
+            replace = self._replace
+        if replace:
+            self._store.replace_installed(apps)
+        else:
+            with self._store.transaction():
+                for folder in changed:
+                    self._store.set_installed(folder, folder in apps)
+
+        def _written():
+            # Keep whatever changed again since the write
+            with self._lock:
+                if replace and self._apps == apps:
+                    self._replace = False
+                self._changed = {
+                    folder
+                    for folder in self._changed
+                    if (not replace and folder not in changed)
+                    or (folder in self._apps) != (folder in apps)
+                }
+
+        return _written
 
     def update_status(self, app_name, installed):
-        """Add or remove *app_name* from the installed list and save.
+        """Add or remove *app_name* from the installed set and save.
 
         Args:
             app_name: The ``folder_name`` of the app.
             installed: ``True`` to mark installed, ``False`` to remove.
         """
-        if installed and app_name not in self._apps:
-            self._apps.append(app_name)
-        elif not installed and app_name in self._apps:
-            self._apps.remove(app_name)
-        self.save()
+        with self._lock:
+            if installed:
+                self._apps.add(app_name)
+            else:
+                self._apps.discard(app_name)
+            self._changed.add(app_name)
+        self._store.writes.schedule(self._write)
 
     def is_installed(self, app_name):
-        """Check whether *app_name* is in the installed list."""
+        """Check whether *app_name* is in the installed set."""
         return app_name in self._apps
 
     @property
     def apps(self):
-        """Return the current list of installed app folder names."""
-        return list(self._apps)
+        """Return the set of installed app folder names."""
+        with self._lock:
+            return set(self._apps)
 
     @apps.setter
     def apps(self, value):
-        """Replace the installed list and save."""
-        self._apps = list(value)
-        self.save()
-
-    @property
-    def file_path(self):
-        """Return the path to the installed-apps JSON file."""
-        return self._file
+        """Replace the installed set and save."""
+        with self._lock:
+            self._apps = set(value)
+            self._replace = True
+        self._store.writes.schedule(self._write)
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Cross-process package-manager locks.
+
+Several install scripts can run at the same time, but only one of them
+may drive apt/dpkg/pacman — or a given proot distro — at once.  The
+``inbuild_functions`` library and the Python side share the same lock
+protocol: a lock is a directory ``<APPSTORE_LOCK_DIR>/<name>.lock``
+created atomically with ``mkdir`` and holding an empty file
+``pid.<owner PID>``.
+
+A lock whose owner no longer exists is taken over, not deleted: the
+waiter renames ``pid.<dead PID>`` to ``pid.<own PID>``.  Only one rename
+of a file can succeed, so when several waiters find the same dead owner,
+exactly one of them gets the lock.  Deleting the directory instead would
+let a slow waiter delete a lock another waiter had just taken.
+"""
+
+import logging
+import os
+import shutil
+import time
+
+from termux_appstore.constants import APPSTORE_LOCK_DIR
+
+logger = logging.getLogger(__name__)
+
+# Lock shared by every native Termux package-manager operation.
+NATIVE_PACKAGE_LOCK = "termux-pkg"
+
+# Held while the refresh / update-check pipeline runs.
+REFRESH_LOCK = "refresh"
+
+
+def distro_lock_name(distro):
+    """Return the lock name guarding package operations in *distro*."""
+    return f"distro-{distro}"
+
+
+def package_lock_for(app, distro=None):
+    """Return the package-manager lock an *app*'s scripts will take.
+
+    Args:
+        app: App metadata dict.
+        distro: Selected distro name, used for ``app_type == "distro"``.
+
+    Returns:
+        str: Lock name.
+    """
+    if app.get("app_type") == "distro" and distro:
+        return distro_lock_name(distro)
+    return NATIVE_PACKAGE_LOCK
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ResourceLock:
+    """A named lock shared with the bash ``_appstore_lock`` helper.
+
+    Usable as a context manager::
+
+        with ResourceLock(NATIVE_PACKAGE_LOCK):
+            subprocess.run(["apt", "update"])
+
+    Args:
+        name: Lock name, e.g. :data:`NATIVE_PACKAGE_LOCK`.
+        lock_dir: Directory holding the lock directories.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, name, lock_dir=APPSTORE_LOCK_DIR):
+        self.name = name
+        self.path = os.path.join(lock_dir, f"{name}.lock")
+        self._lock_dir = lock_dir
+        self._held = False
+
+    def acquire(self, timeout=None, is_cancelled=None, on_wait=None):
+        """Block until the lock is held.
+
+        Args:
+            timeout: Give up after this many seconds.  ``None`` waits
+                forever.
+            is_cancelled: Optional callable; waiting stops once it
+                returns ``True``.
+            on_wait: Optional ``(owner_pid) -> None`` callback, called
+                once when the lock turns out to be busy.
+
+        Returns:
+            bool: ``True`` when acquired.
+        """
+        os.makedirs(self._lock_dir, exist_ok=True)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        notified = False
+
+        while True:
+            try:
+                os.mkdir(self.path)
+            except FileExistsError:
+                owner = self.owner()
+                if owner is not None and not _pid_alive(owner):
+                    if self._take_over(owner):
+                        return True
+                    continue
+            else:
+                open(self._pid_file(os.getpid()), "w").close()
+                self._held = True
+                return True
+
+            if not notified and on_wait is not None:
+                on_wait(owner)
+                notified = True
+            if is_cancelled is not None and is_cancelled():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+
+    def _pid_file(self, pid):
+        return os.path.join(self.path, f"pid.{pid}")
+
+    def _take_over(self, dead_owner):
+        """Take the lock left behind by *dead_owner*.
+
+        Returns:
+            bool: ``False`` when another waiter took it first.
+        """
+        try:
+            os.rename(self._pid_file(dead_owner), self._pid_file(os.getpid()))
+        except FileNotFoundError:
+            return False
+        logger.warning("Reclaimed stale lock %s (pid %s)", self.name, dead_owner)
+        self._held = True
+        return True
+
+    def release(self):
+        """Release the lock if this instance holds it."""
+        if self._held:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._held = False
+
+    def owner(self):
+        """Return the PID holding the lock, or ``None``."""
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return None
+        for name in names:
+            if name.startswith("pid."):
+                try:
+                    return int(name[4:])
+                except ValueError:
+                    pass
+        return None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Notice apps installed or removed outside the store.
+
+Packages installed with ``pkg`` or inside the distro only used to show
+up after a full refresh.  :class:`PackageWatch` reads the Termux and
+distro package databases (see :class:`~termux_appstore.backend.distro.DistroRootfs`)
+and reports which apps changed state since it last looked.  The UI
+watches the paths from :meth:`PackageWatch.paths` for changes and calls
+:meth:`PackageWatch.changes` when one of them is written.
+
+Not every app is a package: some install scripts download a binary.  So
+an app is only reported as removed once it was seen installed in the
+package database and then disappeared from it.
+"""
+
+import os
+import threading
+
+from termux_appstore.backend.distro import executable_path, find_rootfs, native_rootfs
+
+
+class PackageWatch:
+    """Track which apps the package databases say are installed.
+
+    Args:
+        distro_config: Optional
+            :class:`~termux_appstore.backend.distro.DistroConfig`; distro
+            apps are tracked when distro support is enabled and the
+            distro's rootfs is readable.
+    """
+
+    def __init__(self, distro_config=None):
+        self.distro = None
+        self._sources = {"native": native_rootfs()}
+        if distro_config is not None and distro_config.distro_enabled:
+            rootfs = find_rootfs(distro_config.selected_distro, distro_config)
+            if rootfs is not None:
+                self.distro = distro_config.selected_distro
+                self._sources["distro"] = rootfs
+        # Per source: the database's (mtime, size) when last read, and
+        # {folder: present} for the apps it decides
+        self._stamps = {}
+        self._present = {}
+        self._lock = threading.Lock()
+
+    def paths(self):
+        """Return the package databases to watch.
+
+        Returns:
+            list[tuple]: ``(host_path, is_directory)`` pairs.
+        """
+        result = []
+        for rootfs in self._sources.values():
+            path = rootfs.package_database()
+            if path is not None:
+                result.append((path, os.path.isdir(path)))
+        return result
+
+    def changes(self, apps, installed):
+        """Return the apps whose installed state differs from *installed*.
+
+        Only databases that changed since the last call are read again.
+        The first call reports apps found installed that *installed* is
+        missing; later calls also report apps whose package went away.
+
+        Args:
+            apps: App dicts from ``apps.json``.
+            installed: Folder names currently recorded as installed.
+
+        Returns:
+            dict: ``{folder_name: installed_bool}``.
+        """
+        with self._lock:
+            return self._changes(apps, set(installed))
+
+    def _changes(self, apps, installed):
+        changes = {}
+        for name, rootfs in self._sources.items():
+            path = rootfs.package_database()
+            try:
+                st = os.stat(path) if path else None
+            except OSError:
+                st = None
+            stamp = (st.st_mtime_ns, st.st_size) if st else None
+            if stamp is None or stamp == self._stamps.get(name):
+                continue
+            self._stamps[name] = stamp
+
+            packages = rootfs.installed_packages()
+            if packages is None:
+                continue
+            first = name not in self._present
+            before = self._present.get(name, {})
+            now = self._present[name] = {}
+            for app in apps:
+                folder = app.get("folder_name")
+                present = self._app_present(name, rootfs, app, packages)
+                if folder is None or present is None:
+                    continue
+                now[folder] = present
+                if present and folder not in installed:
+                    changes[folder] = True
+                elif (
+                    not present
+                    and not first
+                    and before.get(folder)
+                    and folder in installed
+                ):
+                    changes[folder] = False
+        return changes
+
+    def _app_present(self, source, rootfs, app, packages):
+        """Return whether *app*'s package is installed, or ``None`` when
+        *source* does not decide *app*."""
+        if app.get("app_type") == "distro":
+            if source != "distro":
+                return None
+            run_cmd = app.get(f"{self.distro}_run_cmd") or app.get("run_cmd") or ""
+            package_name = (
+                app.get(f"{self.distro}_package_name")
+                or app.get("package_name")
+                or (run_cmd.split() or [None])[0]
+            )
+            if package_name in packages:
+                return True
+            path = executable_path(run_cmd)
+            return bool(path) and bool(rootfs.exists(path))
+
+        if source != "native":
+            return None
+        package_name = app.get("package_name") or app.get("run_cmd")
+        if not package_name:
+            return None
+        return package_name in packages
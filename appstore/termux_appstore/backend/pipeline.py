@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Staged, resumable pipeline engine.
+
+A pipeline runs an ordered list of :class:`Stage` objects over a shared
+context dict.  After each stage, a fingerprint of the stage's inputs and
+the outputs it returned are written to a checkpoint file.  The next time
+the pipeline runs, a stage whose inputs are unchanged is skipped and its
+recorded outputs are put back into the context, so an interrupted run
+resumes after the last stage that finished.
+
+Every run has a ``run_id`` in the context.  It stays the same until the
+pipeline completes, so stages that must redo their work on each run
+(anything that talks to the network) include it in their inputs.
+"""
+
+import json
+import logging
+import os
+import time
+
+from termux_appstore.metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """A stage failed; the message is meant for the user."""
+
+
+class Stage:
+    """One named step of a :class:`Pipeline`.
+
+    Args:
+        name: Key of the stage in the checkpoint.
+        run: ``(ctx, previous) -> dict | None``.  *previous* holds the
+            outputs this stage recorded last time (``{}`` if none), e.g.
+            HTTP validators for a conditional request.  The returned
+            outputs must be JSON-serializable; they are merged into *ctx*.
+        inputs: ``(ctx) -> value``.  The stage is skipped when this equals
+            the recorded value.  ``None`` (the default) always runs it.
+        check: Optional ``(outputs) -> bool`` that says whether recorded
+            outputs are still usable, e.g. that a staged file exists.
+        label: Progress label shown while the stage runs.
+        progress: Progress percentage reported when the stage starts.
+    """
+
+    def __init__(self, name, run, inputs=None, check=None, label="", progress=None):
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.check = check
+        self.label = label
+        self.progress = progress
+
+
+class Pipeline:
+    """Run stages in order, checkpointing after each one.
+
+    Args:
+        stages: List of :class:`Stage`.
+        checkpoint_file: Path of the JSON checkpoint.
+        name: Name of the run's metrics span; stage spans are
+            ``<name>.<stage>``.
+    """
+
+    def __init__(self, stages, checkpoint_file, name="pipeline"):
+        self.stages = stages
+        self.checkpoint_file = checkpoint_file
+        self.name = name
+
+    def _load(self):
+        try:
+            with open(self.checkpoint_file, "r") as f:
+                state = json.load(f)
+            if isinstance(state.get("stages"), dict):
+                return state
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {"stages": {}, "complete": True}
+
+    def _save(self, state):
+        os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+        tmp = f"{self.checkpoint_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.checkpoint_file)
+
+    def run(self, ctx, on_progress=None):
+        """Run every stage that is not up to date.
+
+        Args:
+            ctx: Context dict shared by the stages; updated in place.
+            on_progress: Optional ``(progress_int, label_str) -> None``.
+
+        Returns:
+            dict: *ctx*, with the outputs of every stage merged in.
+
+        Raises:
+            PipelineError: A stage failed.  Finished stages stay
+                checkpointed, so the next run resumes from the failed one.
+        """
+        with span(self.name):
+            return self._run(ctx, on_progress)
+
+    def _run(self, ctx, on_progress):
+        state = self._load()
+        if state.get("complete", True):
+            # Keep the stage records: their outputs seed the next run.
+            state["run_id"] = str(time.time())
+            state["complete"] = False
+            self._save(state)
+        else:
+            logger.info("Resuming interrupted run %s", state["run_id"])
+        ctx["run_id"] = state["run_id"]
+
+        for stage in self.stages:
+            record = state["stages"].get(stage.name) or {}
+            previous = record.get("outputs") or {}
+            inputs = None
+            if stage.inputs is not None:
+                # Round-trip so tuples compare equal to their JSON form.
+                inputs = json.loads(json.dumps(stage.inputs(ctx)))
+                if (
+                    record
+                    and record.get("inputs") == inputs
+                    and (stage.check is None or stage.check(previous))
+                ):
+                    logger.info("Stage %s: up to date", stage.name)
+                    ctx.update(previous)
+                    continue
+
+            if on_progress is not None and stage.progress is not None:
+                on_progress(stage.progress, stage.label)
+            logger.info("Stage %s: running", stage.name)
+            with span(f"{self.name}.{stage.name}"):
+                outputs = stage.run(ctx, previous) or {}
+            ctx.update(outputs)
+            state["stages"][stage.name] = {"inputs": inputs, "outputs": outputs}
+            self._save(state)
+
+        state["complete"] = True
+        self._save(state)
+        return ctx
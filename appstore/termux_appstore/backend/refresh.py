@@ -5,117 +5,77 @@ Downloads fresh ``apps.json`` and logos, resolves package versions,
 detects installed packages, and computes pending updates — all without
 any GTK imports.  The caller (window) is responsible for scheduling
 this on a background thread and wiring up UI callbacks.
+
+The startup refresh and "Check for Updates" share one staged pipeline
+(see :mod:`termux_appstore.backend.pipeline`).  New data is built under
+``APPSTORE_STAGING_DIR`` and only swapped into place with renames in
+the final ``commit`` stage, so an interrupted refresh resumes where it
+stopped and never leaves the app without an ``apps.json``.
 """
 
+import concurrent.futures
+import hashlib
 import json
+import logging
 import os
 import shutil
+import sqlite3
 import subprocess
+import time
+import urllib.error
+import urllib.request
 from datetime import datetime
 
-from termux_appstore.backend.app_data import read_termux_desktop_config
+from termux_appstore.backend import commands, repo_sync
 from termux_appstore.backend.distro import (
     DistroConfig,
     check_distro_app_installed_by_path,
     check_distro_package_installed,
     check_native_package_installed,
+    find_rootfs,
+    native_rootfs,
+)
+from termux_appstore.backend.distro_shell import distro_shell
+from termux_appstore.backend.locks import (
+    NATIVE_PACKAGE_LOCK,
+    REFRESH_LOCK,
+    ResourceLock,
+    distro_lock_name,
 )
+from termux_appstore.backend.pipeline import Pipeline, PipelineError, Stage
+from termux_appstore.backend.script_runner import prefetch_scripts
+from termux_appstore.backend.store import REFRESH, get_store
+from termux_appstore.backend.versions import is_newer, version_scheme
 from termux_appstore.constants import (
-    APPSTORE_DIR,
     APPSTORE_JSON,
     APPSTORE_LOGO_DIR,
-    APPSTORE_OLD_JSON_DIR,
+    APPSTORE_REFRESH_STATE_FILE,
+    APPSTORE_STAGING_DIR,
     ARCH_COMPATIBILITY,
     GITHUB_APPS_JSON,
     GITHUB_LOGOS_ZIP,
-    LAST_VERSION_CHECK_FILE,
+    REPO_SYNC_TTL,
     TERMUX_PREFIX,
-    TERMUX_TMP,
 )
+from termux_appstore.metrics import add_bytes, span
 from termux_appstore.utils import get_current_arch
 
+logger = logging.getLogger(__name__)
 
-def download_and_extract_logos():
-    """Download and extract the logos zip archive.
+FETCH_TIMEOUT = 60
 
-    Tries aria2c → wget → curl in order.
-
-    Returns:
-        bool: ``True`` on success (or when an existing logo directory
-        can be reused after a download failure).
-    """
-    try:
-        os.makedirs(TERMUX_TMP, exist_ok=True)
-        logos_zip = os.path.join(TERMUX_TMP, "logos.zip")
-
-        print("Downloading logos archive...")
-        download_success = False
-
-        # Try aria2c first
-        for tool, cmd in [
-            (
-                "aria2c",
-                f"aria2c -x 16 -s 16 '{GITHUB_LOGOS_ZIP}' -d '{TERMUX_TMP}' -o 'logos.zip'",
-            ),
-            ("wget", f"wget '{GITHUB_LOGOS_ZIP}' -O '{logos_zip}'"),
-            ("curl", f"curl -L '{GITHUB_LOGOS_ZIP}' -o '{logos_zip}'"),
-        ]:
-            try:
-                print(f"Trying {tool}...")
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                if result.returncode == 0:
-                    download_success = True
-                    print(f"Download with {tool} successful")
-                    break
-                else:
-                    print(f"{tool} failed: {result.stderr}")
-            except Exception as e:
-                print(f"Error using {tool}: {e}")
-
-        if not download_success:
-            print("All download methods failed")
-            if os.path.exists(APPSTORE_LOGO_DIR) and os.listdir(APPSTORE_LOGO_DIR):
-                print("Using existing logo directory since download failed")
-                return True
-            return False
-
-        os.makedirs(APPSTORE_LOGO_DIR, exist_ok=True)
-        print("Extracting logos...")
-        try:
-            command = f"unzip -o '{logos_zip}' -d '{APPSTORE_LOGO_DIR}'"
-            result = subprocess.run(command, shell=True, capture_output=True, text=True)
-            if os.path.exists(logos_zip):
-                os.remove(logos_zip)
-
-            if (
-                result.returncode != 0
-                and os.path.exists(APPSTORE_LOGO_DIR)
-                and os.listdir(APPSTORE_LOGO_DIR)
-            ):
-                print("Using existing logo directory since extraction failed")
-                return True
-
-            return result.returncode == 0
-        except Exception as e:
-            print(f"Error extracting logos: {e}")
-            if os.path.exists(APPSTORE_LOGO_DIR) and os.listdir(APPSTORE_LOGO_DIR):
-                print("Using existing logo directory since extraction failed")
-                return True
-            return False
-
-    except Exception as e:
-        print(f"Error handling logos: {e}")
-        if os.path.exists(APPSTORE_LOGO_DIR) and os.listdir(APPSTORE_LOGO_DIR):
-            print("Using existing logo directory since an error occurred")
-            return True
-        return False
+_RAW_JSON = os.path.join(APPSTORE_STAGING_DIR, "apps.raw.json")
+_STAGED_JSON = os.path.join(APPSTORE_STAGING_DIR, "apps.json")
+_STAGED_LOGOS = os.path.join(APPSTORE_STAGING_DIR, "logo")
+_LOGOS_ZIP = os.path.join(APPSTORE_STAGING_DIR, "logos.zip")
 
 
 def migrate_old_data():
     """Migrate data from the old ``~/.termux_appstore`` directory.
 
-    Copies known data files to the new ``~/.appstore`` directory and
-    removes the old directory afterwards.
+    Copies known data files to the new ``~/.appstore`` directory, imports
+    them into the state database and removes the old directory
+    afterwards.
     """
     from termux_appstore.constants import (
         INSTALLED_APPS_FILE,
@@ -127,10 +87,10 @@ def migrate_old_data():
     try:
         old_dir = os.path.expanduser("~/.termux_appstore")
         if not os.path.exists(old_dir):
-            print("No old data directory found, nothing to migrate.")
+            logger.info("No old data directory found, nothing to migrate.")
             return
 
-        print(f"Found old data directory: {old_dir}, migrating data...")
+        logger.info("Found old data directory: %s, migrating data...", old_dir)
 
         migrations = [
             ("installed_apps.json", INSTALLED_APPS_FILE),
@@ -142,22 +102,20 @@ def migrate_old_data():
         for filename, dest in migrations:
             old_path = os.path.join(old_dir, filename)
             if os.path.exists(old_path):
-                print(f"Migrating {filename} from {old_path} to {dest}")
+                logger.info("Migrating %s from %s to %s", filename, old_path, dest)
                 shutil.copy2(old_path, dest)
 
-        print("Migration completed successfully.")
+        get_store().import_json_files()
+        logger.info("Migration completed successfully.")
         try:
             shutil.rmtree(old_dir)
-            print(f"Removed old data directory: {old_dir}")
+            logger.info("Removed old data directory: %s", old_dir)
         except Exception as rm_error:
-            print(f"Warning: Could not remove old directory: {rm_error}")
-            print("You may want to manually remove it later.")
+            logger.warning("Could not remove old directory: %s", rm_error)
+            logger.warning("You may want to manually remove it later.")
 
     except Exception as e:
-        print(f"Error during data migration: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error during data migration: %s", e)
 
 
 def should_auto_refresh():
@@ -168,34 +126,508 @@ def should_auto_refresh():
     """
     refresh_interval = 24 * 60 * 60  # 24 hours
 
-    if not os.path.exists(LAST_VERSION_CHECK_FILE):
-        print("No last check time found, performing initial auto-refresh")
+    try:
+        last_check = get_store().last_refresh()
+    except sqlite3.Error as e:
+        logger.warning("Error reading last check time: %s, performing auto-refresh", e)
+        return True
+    if last_check is None:
+        logger.info("No last check time found, performing initial auto-refresh")
         return True
 
+    elapsed = datetime.now().timestamp() - last_check
+    if elapsed < refresh_interval:
+        logger.info("Last check was %.0fs ago, skipping auto-refresh", elapsed)
+        return False
+    logger.info("Last check was %.0fs ago, performing auto-refresh", elapsed)
+    return True
+
+
+def record_refresh_timestamp(kind=REFRESH):
+    """Record in the refresh history that a refresh of *kind* finished.
+
+    Args:
+        kind: :data:`~termux_appstore.backend.store.REFRESH` or
+            :data:`~termux_appstore.backend.store.UPDATE_CHECK`.
+    """
+    try:
+        get_store().record_refresh(kind)
+    except sqlite3.Error as e:
+        logger.error("Error writing refresh timestamp: %s", e)
+
+
+# Downloads
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _logos_present():
+    return os.path.isdir(APPSTORE_LOGO_DIR) and bool(os.listdir(APPSTORE_LOGO_DIR))
+
+
+# Seconds without data before a catalog download is abandoned
+STALL_TIMEOUT = 60
+
+
+def _download_with_tools(url, dest):
+    """Download *url* to *dest* with aria2c → wget → curl.
+
+    There is no overall time limit: ``logos.zip`` can take many minutes
+    on a slow mobile connection.  Each tool gives up instead when no data
+    arrives for :data:`STALL_TIMEOUT` seconds.
+
+    Returns:
+        bool: ``True`` on success.
+    """
+    tmp = f"{dest}.tmp"
+    directory, name = os.path.split(tmp)
+    for tool, cmd in [
+        (
+            "aria2c",
+            f"aria2c -x 16 -s 16 --allow-overwrite=true --timeout={STALL_TIMEOUT} "
+            f"'{url}' -d '{directory}' -o '{name}'",
+        ),
+        ("wget", f"wget --read-timeout={STALL_TIMEOUT} '{url}' -O '{tmp}'"),
+        (
+            "curl",
+            f"curl -fL --speed-limit 1 --speed-time {STALL_TIMEOUT} '{url}' -o '{tmp}'",
+        ),
+    ]:
+        try:
+            logger.debug("Trying %s...", tool)
+            result = commands.run_shell(
+                cmd,
+                commands.DOWNLOAD,
+                timeout=commands.NO_TIMEOUT,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode == 0 and os.path.exists(tmp):
+                logger.debug("Download with %s successful", tool)
+                os.replace(tmp, dest)
+                return True
+            logger.warning("%s failed: %s", tool, result.stderr)
+        except Exception as e:
+            logger.error("Error using %s: %s", tool, e)
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    return False
+
+
+def _fetch(url, dest, validators):
+    """Download *url* into *dest* unless it is unchanged.
+
+    Args:
+        url: Source URL.
+        dest: Destination path; replaced atomically.
+        validators: ``{"etag", "last_modified"}`` from the last download
+            of the file still at *dest*, or ``{}`` to always download.
+
+    Returns:
+        tuple | None: ``(changed, validators)``, or ``None`` when every
+        download method failed.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": "termux-appstore"})
+    if validators.get("etag"):
+        request.add_header("If-None-Match", validators["etag"])
+    if validators.get("last_modified"):
+        request.add_header("If-Modified-Since", validators["last_modified"])
+
+    tmp = f"{dest}.tmp"
     try:
-        with open(LAST_VERSION_CHECK_FILE, "r") as f:
-            last_check = float(f.read().strip())
+        logger.debug("Fetching %s", url)
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as resp:
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(resp, f)
+            headers = resp.headers
+        os.replace(tmp, dest)
+        add_bytes(os.path.getsize(dest))
+        return True, {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return False, validators
+        logger.error("Download failed: HTTP %s", e.code)
+    except OSError as e:
+        logger.error("Download failed: %s", e)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    if _download_with_tools(url, dest):
+        add_bytes(os.path.getsize(dest))
+        return True, {}
+    return None
+
+
+def _write_json(path, data):
+    """Write *data* to *path* through a temporary file and a rename."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _swap_dir(new, dest):
+    """Replace directory *dest* with *new* using renames.
+
+    Safe to repeat after an interruption: a *dest* moved aside by an
+    earlier attempt is restored when *new* is already gone.
+    """
+    old = f"{dest}.old"
+    if os.path.isdir(new):
+        if os.path.exists(dest):
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(dest, old)
+        os.rename(new, dest)
+    elif not os.path.exists(dest) and os.path.isdir(old):
+        os.rename(old, dest)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _filter_compatible(apps, arch):
+    """Return the apps that support *arch*."""
+    compatible_archs = ARCH_COMPATIBILITY.get(arch, [arch])
+    filtered_apps = []
+    for app in apps:
+        app_arch = app.get("supported_arch", "")
+        if not app_arch:
+            filtered_apps.append(app)
+            continue
 
-        elapsed = datetime.now().timestamp() - last_check
-        if elapsed < refresh_interval:
-            print(f"Last check was {elapsed:.0f}s ago, skipping auto-refresh")
-            return False
+        supported_archs = [a.strip().lower() for a in app_arch.split(",")]
+        if any(a in compatible_archs for a in supported_archs):
+            filtered_apps.append(app)
         else:
-            print(f"Last check was {elapsed:.0f}s ago, performing auto-refresh")
-            return True
-    except Exception as e:
-        print(f"Error reading last check time: {e}, performing auto-refresh")
-        return True
+            logger.debug("Skipped incompatible app: %s (%s)", app["app_name"], app_arch)
+    return filtered_apps
+
+
+# Pipeline stages
+
+
+def _sync_native():
+    """Refresh the Termux package lists."""
+    cmd = (
+        f"source {TERMUX_PREFIX}/bin/termux-setup-package-manager && "
+        'if [[ "$TERMUX_APP_PACKAGE_MANAGER" == "apt" ]]; then '
+        "apt update -y 2>/dev/null; "
+        'elif [[ "$TERMUX_APP_PACKAGE_MANAGER" == "pacman" ]]; then '
+        "pacman -Sy --noconfirm 2>/dev/null; fi"
+    )
+    # Don't refresh package lists under a running install.
+    with ResourceLock(NATIVE_PACKAGE_LOCK):
+        result = commands.run_shell(
+            cmd,
+            commands.PACKAGE,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    if result.returncode == 0:
+        repo_sync.mark_synced(repo_sync.NATIVE)
+
+
+def _sync_distro(distro, distro_config):
+    """Refresh *distro*'s package lists.
+
+    Returns:
+        bool: ``False`` when the distro cannot be logged into.
+    """
+    if not _distro_reachable(distro, distro_config):
+        return False
+    distro_cmd = _distro_update_cmd(distro)
+    if distro_cmd:
+        logger.info("Updating %s repositories...", distro)
+        with ResourceLock(distro_lock_name(distro)):
+            try:
+                result = distro_shell(distro, distro_config).run(
+                    distro_cmd, timeout=120
+                )
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.error("Error updating %s repositories: %s", distro, e)
+                return True
+        if result.returncode == 0:
+            repo_sync.mark_synced(distro)
+    return True
+
 
+def _stage_repos(ctx, previous):
+    """Refresh the Termux and distro package lists that are out of date.
 
-def record_refresh_timestamp():
-    """Write the current timestamp to the last-version-check file."""
+    Lists synced within ``ctx["repo_ttl"]`` seconds are left alone; the
+    Termux and distro syncs run in parallel.
+    """
+    ttl = ctx.get("repo_ttl", REPO_SYNC_TTL)
+    jobs = {}
+    if repo_sync.is_fresh(
+        repo_sync.NATIVE, native_rootfs(), repo_sync.native_lists(), ttl
+    ):
+        logger.info("Termux package lists are up to date, not syncing")
+    else:
+        jobs["native"] = _sync_native
+
+    distro = ctx["distro"]
+    if distro:
+        distro_config = ctx["distro_config"]
+        rootfs = find_rootfs(distro, distro_config)
+        if repo_sync.is_fresh(distro, rootfs, repo_sync.distro_lists(distro), ttl):
+            logger.info("%s package lists are up to date, not syncing", distro)
+        else:
+            jobs["distro"] = lambda: _sync_distro(distro, distro_config)
+
+    if jobs:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {name: pool.submit(job) for name, job in jobs.items()}
+        # Re-raises a failed sync, as running it inline did
+        results = {name: future.result() for name, future in futures.items()}
+        if results.get("distro") is False:
+            distro = None
+    return {"distro": distro, "repos_updated": time.time()}
+
+
+def _stage_download(ctx, previous):
+    """Download ``apps.json`` into the staging directory."""
+    validators = previous.get("apps_validators", {})
+    result = _fetch(
+        GITHUB_APPS_JSON, _RAW_JSON, validators if os.path.exists(_RAW_JSON) else {}
+    )
+    if result is None:
+        raise PipelineError("Failed to download apps.json")
+    changed, validators = result
     try:
-        os.makedirs(os.path.dirname(LAST_VERSION_CHECK_FILE), exist_ok=True)
-        with open(LAST_VERSION_CHECK_FILE, "w") as f:
-            f.write(str(datetime.now().timestamp()))
-    except Exception as e:
-        print(f"Error writing refresh timestamp: {e}")
+        with open(_RAW_JSON, "r") as f:
+            json.load(f)
+    except ValueError:
+        os.remove(_RAW_JSON)
+        raise PipelineError("Downloaded apps.json is not valid JSON")
+    if not changed:
+        logger.info("apps.json is unchanged")
+    return {"apps_sha256": _file_sha256(_RAW_JSON), "apps_validators": validators}
+
+
+def _stage_packages(ctx, previous):
+    """Filter by architecture and resolve package versions and installs."""
+    with open(_RAW_JSON, "r") as f:
+        apps = _filter_compatible(json.load(f), ctx["arch"])
+
+    logger.info("Checking installed packages and versions...")
+    installed = set(ctx["installed_apps"])
+    _check_native_packages(apps, installed)
+    if ctx["distro"]:
+        _check_distro_packages(apps, installed, ctx["distro"], ctx["distro_config"])
+
+    _write_json(_STAGED_JSON, apps)
+    return {"staged_sha256": _file_sha256(_STAGED_JSON), "installed": sorted(installed)}
+
+
+def _stage_compare(ctx, previous):
+    """Compare the staged versions with the catalog-versions snapshot."""
+    with open(_STAGED_JSON, "r") as f:
+        new_apps_data = json.load(f)
+    new_updates = _compare_versions(
+        new_apps_data,
+        get_store().catalog_versions(),
+        set(ctx["installed_apps"]),
+        ctx["distro"],
+    )
+    return {"new_updates": new_updates}
+
+
+def _stage_logos(ctx, previous):
+    """Download and unpack the logos into the staging directory."""
+    present = _logos_present()
+    validators = previous.get("logo_validators", {}) if present else {}
+    result = _fetch(GITHUB_LOGOS_ZIP, _LOGOS_ZIP, validators)
+    if result is None:
+        if present:
+            logger.info("Using existing logo directory since download failed")
+            return {"logos_staged": False, "logo_validators": validators}
+        raise PipelineError("Failed to update logos")
+
+    changed, validators = result
+    if not changed:
+        logger.info("Logos are unchanged")
+        return {"logos_staged": False, "logo_validators": validators}
+
+    logger.info("Extracting logos...")
+    shutil.rmtree(_STAGED_LOGOS, ignore_errors=True)
+    os.makedirs(_STAGED_LOGOS)
+    try:
+        result = commands.run(
+            ["unzip", "-o", "-q", _LOGOS_ZIP, "-d", _STAGED_LOGOS],
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        extracted = result.returncode == 0
+        if not extracted:
+            logger.error("unzip failed: %s", result.stderr)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error("Error extracting logos: %s", e)
+        extracted = False
+    finally:
+        os.remove(_LOGOS_ZIP)
+
+    if not extracted:
+        shutil.rmtree(_STAGED_LOGOS, ignore_errors=True)
+        if present:
+            logger.info("Using existing logo directory since extraction failed")
+            return {"logos_staged": False, "logo_validators": {}}
+        raise PipelineError("Failed to update logos")
+    return {"logos_staged": True, "logo_validators": validators}
+
+
+def _stage_commit(ctx, previous):
+    """Swap the staged ``apps.json`` and logos into place.
+
+    Only an update check moves the catalog-versions snapshot on; a plain
+    refresh leaves it where the last check compared against, so updates
+    it brings in are still found by the next check.
+    """
+    if os.path.exists(_STAGED_JSON):
+        if ctx["check_updates"] and os.path.exists(APPSTORE_JSON):
+            logger.info("Snapshotting current catalog versions...")
+            with open(APPSTORE_JSON, "r") as f:
+                get_store().replace_catalog_versions(json.load(f))
+        os.replace(_STAGED_JSON, APPSTORE_JSON)
+    if ctx.get("logos_staged"):
+        _swap_dir(_STAGED_LOGOS, APPSTORE_LOGO_DIR)
+
+
+def _refresh_stages(check_updates):
+    """Return the pipeline stages; *check_updates* adds repo sync and compare."""
+    stages = []
+    if check_updates:
+        stages.append(
+            Stage(
+                "repos",
+                _stage_repos,
+                inputs=lambda ctx: ctx["run_id"],
+                label="Updating repository...",
+                progress=10,
+            )
+        )
+    stages += [
+        Stage(
+            "download",
+            _stage_download,
+            inputs=lambda ctx: ctx["run_id"],
+            check=lambda out: os.path.exists(_RAW_JSON),
+            label="Downloading updates...",
+            progress=35,
+        ),
+        Stage(
+            "packages",
+            _stage_packages,
+            # Candidate versions change with the repos, so once per run.
+            inputs=lambda ctx: [
+                ctx["run_id"],
+                ctx.get("repos_updated"),
+                ctx["apps_sha256"],
+                ctx["arch"],
+                ctx["distro"],
+                ctx["installed_apps"],
+            ],
+            check=lambda out: os.path.exists(_STAGED_JSON),
+            label="Checking versions...",
+            progress=50,
+        ),
+    ]
+    if check_updates:
+        stages.append(
+            Stage(
+                "compare",
+                _stage_compare,
+                inputs=lambda ctx: [ctx["run_id"], ctx["staged_sha256"]],
+                label="Comparing versions...",
+                progress=70,
+            )
+        )
+    stages += [
+        Stage(
+            "logos",
+            _stage_logos,
+            inputs=lambda ctx: ctx["run_id"],
+            check=lambda out: not out.get("logos_staged")
+            or os.path.isdir(_STAGED_LOGOS),
+            label="Updating app logos...",
+            progress=80,
+        ),
+        Stage(
+            "commit",
+            _stage_commit,
+            inputs=lambda ctx: [
+                ctx["run_id"],
+                ctx["staged_sha256"],
+                ctx["check_updates"],
+            ],
+            label="Finishing up...",
+            progress=90,
+        ),
+    ]
+    return stages
+
+
+def run_refresh_pipeline(
+    installed_apps,
+    distro=None,
+    distro_config=None,
+    check_updates=False,
+    on_progress=None,
+    repo_ttl=REPO_SYNC_TTL,
+):
+    """Run the staged refresh pipeline shared by refresh and update checks.
+
+    Stages already finished by an interrupted run are not repeated.  Only
+    one pipeline runs at a time; a second caller waits for the first.
+
+    Args:
+        installed_apps: Iterable of installed folder names.
+        distro: Selected distro, or ``None`` when distro support is off.
+        distro_config: A
+            :class:`~termux_appstore.backend.distro.DistroConfig`, needed
+            when *distro* is set.
+        check_updates: Also refresh the package lists first, compare
+            the new versions with the catalog-versions snapshot and move
+            the snapshot on.
+        on_progress: Optional ``(progress_int, label_str) -> None``.
+        repo_ttl: With *check_updates*, package lists synced less than
+            this many seconds ago are not synced again; ``0`` always
+            syncs.
+
+    Returns:
+        dict: The pipeline context.  ``installed`` lists the folder names
+        found installed; with *check_updates*, ``new_updates`` maps folder
+        names to newer versions.
+
+    Raises:
+        PipelineError: A stage failed; the current ``apps.json`` is kept.
+    """
+    ctx = {
+        "installed_apps": sorted(installed_apps),
+        "distro": distro,
+        "distro_config": distro_config,
+        "arch": get_current_arch(),
+        "repo_ttl": repo_ttl,
+        "check_updates": check_updates,
+    }
+    os.makedirs(APPSTORE_STAGING_DIR, exist_ok=True)
+    pipeline = Pipeline(
+        _refresh_stages(check_updates),
+        APPSTORE_REFRESH_STATE_FILE,
+        name="update-check" if check_updates else "refresh",
+    )
+    with ResourceLock(REFRESH_LOCK):
+        return pipeline.run(ctx, on_progress)
 
 
 # Main refresh pipeline  (runs on a background thread)
@@ -217,120 +649,116 @@ def refresh_data(installed_apps_manager, update_tracker, on_error=None):
         bool: ``True`` on success.
     """
     try:
-        print("\nStarting refresh process...")
+        logger.info("Starting refresh process...")
 
         existing_updates = update_tracker.pending.copy()
-        print(f"Preserving existing updates: {existing_updates}")
-
-        system_arch = get_current_arch()
-        compatible_archs = ARCH_COMPATIBILITY.get(system_arch, [system_arch])
-
-        os.makedirs(APPSTORE_OLD_JSON_DIR, exist_ok=True)
-        old_json_path = os.path.join(APPSTORE_OLD_JSON_DIR, "apps.json")
-
-        if os.path.exists(APPSTORE_JSON):
-            print("Backing up current apps.json...")
-            shutil.copy2(APPSTORE_JSON, old_json_path)
-            os.remove(APPSTORE_JSON)
-
-        print("Downloading new apps.json...")
-        download_success = False
-        apps_json_path = os.path.normpath(os.path.join(APPSTORE_DIR, "apps.json"))
-
-        for tool, cmd in [
-            (
-                "aria2c",
-                f"aria2c -x 16 -s 16 '{GITHUB_APPS_JSON}' -d '{APPSTORE_DIR}' -o 'apps.json'",
-            ),
-            ("wget", f"wget '{GITHUB_APPS_JSON}' -O '{apps_json_path}'"),
-            ("curl", f"curl -L '{GITHUB_APPS_JSON}' -o '{apps_json_path}'"),
-        ]:
-            try:
-                print(f"Trying {tool} to download apps.json...")
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                if result.returncode == 0:
-                    download_success = True
-                    print(f"Download with {tool} successful")
-                    break
-                else:
-                    print(f"{tool} failed: {result.stderr}")
-            except Exception as e:
-                print(f"Error using {tool}: {e}")
-
-        if not download_success:
-            print("All download methods failed for apps.json")
-            if on_error:
-                on_error("Failed to download apps.json")
-            return False
-
-        if os.path.exists(APPSTORE_LOGO_DIR):
-            print("Removing existing logos...")
-            shutil.rmtree(APPSTORE_LOGO_DIR)
-
-        print("Downloading and extracting new logos...")
-        if not download_and_extract_logos():
-            print("Error handling logos")
-            if on_error:
-                on_error("Failed to update logos")
-            return False
-
-        print("Filtering apps based on architecture...")
-        with open(APPSTORE_JSON, "r") as f:
-            all_apps = json.load(f)
-
-        filtered_apps = []
-        for app in all_apps:
-            app_arch = app.get("supported_arch", "")
-            if not app_arch:
-                filtered_apps.append(app)
-                continue
+        logger.debug("Preserving existing updates: %s", existing_updates)
 
-            supported_archs = [arch.strip().lower() for arch in app_arch.split(",")]
-            if any(arch in compatible_archs for arch in supported_archs):
-                filtered_apps.append(app)
-                print(f"Added compatible app: {app['app_name']} ({app_arch})")
-            else:
-                print(f"Skipped incompatible app: {app['app_name']} ({app_arch})")
-
-        print("Checking installed packages and versions...")
-        distro_enabled, selected_distro, _ = read_termux_desktop_config()
         distro_config = DistroConfig()
+        distro = distro_config.selected_distro if distro_config.distro_enabled else None
 
-        installed_apps = set(installed_apps_manager.apps)
-
-        _check_native_packages(filtered_apps, installed_apps)
-
-        if distro_enabled and selected_distro:
-            _check_distro_packages(
-                filtered_apps, installed_apps, selected_distro, distro_config
-            )
-
-        with open(APPSTORE_JSON, "w") as f:
-            json.dump(filtered_apps, f, indent=2)
-
+        ctx = run_refresh_pipeline(
+            installed_apps_manager.apps,
+            distro=distro,
+            distro_config=distro_config if distro else None,
+        )
+        installed_apps = set(ctx["installed"])
         installed_apps_manager.apps = list(installed_apps)
 
         for app_id, version in existing_updates.items():
             if app_id in installed_apps:
                 update_tracker.add(app_id, version)
         update_tracker.save()
-        print(f"Restored pending updates: {update_tracker.pending}")
+        logger.debug("Restored pending updates: %s", update_tracker.pending)
+
+        # Installed apps must be uninstallable offline; warm their scripts.
+        logger.info("Prefetching scripts for installed apps...")
+        with open(APPSTORE_JSON, "r") as f:
+            apps = json.load(f)
+        targets = [
+            (app.get(f"{kind}_url"), app.get(f"{kind}_sha256"))
+            for app in apps
+            if app.get("folder_name") in installed_apps
+            for kind in ("install", "uninstall")
+        ]
+        with span("refresh.prefetch"):
+            cached = prefetch_scripts(targets)
+        logger.info("%s of %s scripts cached", cached, len(targets))
 
         record_refresh_timestamp()
 
-        print("Refresh completed successfully!")
+        logger.info("Refresh completed successfully!")
         return True
 
+    except PipelineError as e:
+        logger.error("Refresh failed: %s", e)
+        if on_error:
+            on_error(str(e))
+        return False
     except Exception as e:
-        print(f"Error during refresh: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error during refresh: %s", e)
         if on_error:
             on_error(str(e))
         return False
 
 
+def _distro_update_cmd(distro):
+    """Return the repo-update command for *distro*, or ``None``."""
+    if distro in ("ubuntu", "debian"):
+        return "apt update -y"
+    if distro == "fedora":
+        return "dnf check-update -y || true"
+    if distro == "archlinux":
+        return "pacman -Sy --noconfirm"
+    return None
+
+
+def _compare_versions(new_apps_data, old_versions, installed_apps, distro=None):
+    """Return ``{folder_name: new_version}`` for apps with newer versions.
+
+    *old_versions* maps folder names to the versions they are compared
+    against.
+
+    Versions are ordered with the comparator of the package manager
+    they came from (see :func:`version_scheme`); *distro* is the
+    selected distro, if any.
+    """
+    skip = {
+        "termux_local_version",
+        "distro_local_version",
+        "Unavailable",
+        None,
+    }
+    new_updates = {}
+    for new_app in new_apps_data:
+        folder = new_app["folder_name"]
+        if folder not in installed_apps:
+            continue
+        new_ver = new_app.get("version")
+        old_ver = old_versions.get(folder)
+        if new_ver in skip or old_ver in skip:
+            continue
+        if is_newer(old_ver, new_ver, version_scheme(new_app, distro)):
+            new_updates[folder] = new_ver
+            logger.info(
+                "Update found: %s %s → %s", new_app["app_name"], old_ver, new_ver
+            )
+    return new_updates
+
+
+def _distro_reachable(distro, distro_config):
+    """Return ``True`` when commands can be run inside *distro*."""
+    try:
+        result = distro_shell(distro, distro_config).run("echo test", timeout=10)
+    except Exception as e:
+        logger.error("Error testing distro: %s", e)
+        return False
+    if result.returncode != 0:
+        logger.error("Distro test failed for %s: %s", distro, result.stderr)
+        return False
+    return True
+
+
 def _check_native_packages(apps, installed_apps):
     """Resolve versions and detect installed native packages."""
     for app in apps:
@@ -341,52 +769,50 @@ def _check_native_packages(apps, installed_apps):
         if not package_name:
             continue
 
-        if check_native_package_installed(package_name):
-            print(f"Found installed native package: {package_name}")
-            installed_apps.add(app["folder_name"])
-
-        if app.get("version") == "termux_local_version":
-            cmd = (
-                f"source {TERMUX_PREFIX}/bin/termux-setup-package-manager && "
-                'if [[ "$TERMUX_APP_PACKAGE_MANAGER" == "apt" ]]; then '
-                f"apt-cache policy {package_name} | grep 'Candidate:' | awk '{{print $2}}'; "
-                'elif [[ "$TERMUX_APP_PACKAGE_MANAGER" == "pacman" ]]; then '
-                f"pacman -Si {package_name} 2>/dev/null | grep 'Version' | awk '{{print $3}}'; fi"
-            )
-            try:
-                result = subprocess.run(
-                    ["bash", "-c", cmd],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
+        with span("packages.native", app=app["folder_name"]):
+            if check_native_package_installed(package_name):
+                logger.debug("Found installed native package: %s", package_name)
+                installed_apps.add(app["folder_name"])
+
+            if app.get("version") == "termux_local_version":
+                # Remember that this app tracks a repo package; "Update all"
+                # batches those once the placeholder is replaced.
+                app["version_source"] = "termux_local_version"
+                cmd = (
+                    f"source {TERMUX_PREFIX}/bin/termux-setup-package-manager && "
+                    'if [[ "$TERMUX_APP_PACKAGE_MANAGER" == "apt" ]]; then '
+                    f"apt-cache policy {package_name} | grep 'Candidate:' | awk '{{print $2}}'; "
+                    'elif [[ "$TERMUX_APP_PACKAGE_MANAGER" == "pacman" ]]; then '
+                    f"pacman -Si {package_name} 2>/dev/null | grep 'Version' | awk '{{print $3}}'; fi"
                 )
-                if result.returncode == 0 and result.stdout.strip():
-                    app["version"] = result.stdout.strip()
-                    print(f"Updated version for {app['app_name']}: {app['version']}")
-            except Exception as e:
-                print(f"Error getting version for {app['app_name']}: {e}")
+                try:
+                    result = commands.run_shell(
+                        cmd,
+                        commands.PACKAGE,
+                        capture_output=True,
+                        text=True,
+                        timeout=10,
+                    )
+                    if result.returncode == 0 and result.stdout.strip():
+                        app["version"] = result.stdout.strip()
+                        logger.debug(
+                            "Updated version for %s: %s",
+                            app["app_name"],
+                            app["version"],
+                        )
+                except Exception as e:
+                    logger.error("Error getting version for %s: %s", app["app_name"], e)
 
 
 def _check_distro_packages(apps, installed_apps, selected_distro, distro_config):
     """Resolve versions and detect installed distro packages."""
-    # Verify distro is accessible
-    test_cmd = f"{distro_config.get_command(selected_distro)} 'echo test'"
-    try:
-        test_result = subprocess.run(
-            ["bash", "-c", test_cmd],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if test_result.returncode != 0:
-            print(f"Error: distro test failed for {selected_distro}")
-            print(f"Stderr: {test_result.stderr}")
-            return
-    except Exception as e:
-        print(f"Error testing distro: {e}")
+    # A readable rootfs answers the installed checks without a login.
+    if find_rootfs(selected_distro, distro_config) is None and not _distro_reachable(
+        selected_distro, distro_config
+    ):
         return
 
-    print(f"Checking installed packages for distro: {selected_distro}")
+    logger.debug("Checking installed packages for distro: %s", selected_distro)
 
     for app in apps:
         if app["app_type"] != "distro":
@@ -396,8 +822,10 @@ def _check_distro_packages(apps, installed_apps, selected_distro, distro_config)
         if supported_distro and supported_distro != "all":
             supported_distros = [d.strip().lower() for d in supported_distro.split(",")]
             if selected_distro not in supported_distros:
-                print(
-                    f"Skipping {app['app_name']}: not compatible with {selected_distro}"
+                logger.debug(
+                    "Skipping %s: not compatible with %s",
+                    app["app_name"],
+                    selected_distro,
                 )
                 continue
 
@@ -409,56 +837,61 @@ def _check_distro_packages(apps, installed_apps, selected_distro, distro_config)
             package_name = run_cmd.split()[0] if run_cmd else None
 
         if not package_name:
-            print(f"Skipping {app['app_name']}: no package name or run command found")
+            logger.debug(
+                "Skipping %s: no package name or run command found", app["app_name"]
+            )
             continue
 
-        if check_distro_package_installed(package_name, selected_distro, distro_config):
-            print(f"Found installed distro package: {package_name}")
-            installed_apps.add(app["folder_name"])
-        elif app.get("run_cmd"):
-            run_cmd = app.get(f"{selected_distro}_run_cmd") or app.get("run_cmd")
-            if check_distro_app_installed_by_path(
-                run_cmd, selected_distro, distro_config
+        with span("packages.distro", app=app["folder_name"]):
+            if check_distro_package_installed(
+                package_name, selected_distro, distro_config
             ):
-                print(f"Found installed distro app by path: {run_cmd}")
+                logger.debug("Found installed distro package: %s", package_name)
                 installed_apps.add(app["folder_name"])
-
-        if app.get("version") == "distro_local_version":
-            _resolve_distro_version(app, package_name, selected_distro, distro_config)
+            elif app.get("run_cmd"):
+                run_cmd = app.get(f"{selected_distro}_run_cmd") or app.get("run_cmd")
+                if check_distro_app_installed_by_path(
+                    run_cmd, selected_distro, distro_config
+                ):
+                    logger.debug("Found installed distro app by path: %s", run_cmd)
+                    installed_apps.add(app["folder_name"])
+
+            if app.get("version") == "distro_local_version":
+                app["version_source"] = "distro_local_version"
+                _resolve_distro_version(
+                    app, package_name, selected_distro, distro_config
+                )
 
 
 def _resolve_distro_version(app, package_name, selected_distro, distro_config):
     """Attempt to fetch the candidate version of a distro package."""
-    base_cmd = distro_config.get_command(selected_distro)
     version_cmd = None
 
     if selected_distro in ("ubuntu", "debian"):
-        inner = f"apt-cache policy {package_name} | grep Candidate: | awk '{{print \\$2}}' | tr -d '\\n'"
-        version_cmd = f'{base_cmd} "{inner}"'
+        version_cmd = f"apt-cache policy {package_name} | grep Candidate: | awk '{{print $2}}' | tr -d '\\n'"
     elif selected_distro == "fedora":
-        inner = f"dnf info {package_name} 2>/dev/null | awk -F': ' '/^Version/ {{print \\$2}}' | tr -d '\\n'"
-        version_cmd = f'{base_cmd} "{inner}"'
+        version_cmd = f"dnf info {package_name} 2>/dev/null | awk -F': ' '/^Version/ {{print $2}}' | tr -d '\\n'"
     elif selected_distro in ("arch", "archlinux"):
-        inner = f"pacman -Si {package_name} 2>/dev/null | grep Version | awk '{{print \\$3}}' | tr -d '\\n'"
-        version_cmd = f'{base_cmd} "{inner}"'
+        version_cmd = f"pacman -Si {package_name} 2>/dev/null | grep Version | awk '{{print $3}}' | tr -d '\\n'"
 
     if not version_cmd:
-        print(f"Skipping {app['app_name']}: unsupported distro {selected_distro}")
+        logger.debug(
+            "Skipping %s: unsupported distro %s", app["app_name"], selected_distro
+        )
         return
 
     try:
-        result = subprocess.run(
-            ["bash", "-c", version_cmd],
-            capture_output=True,
-            text=True,
-            timeout=30,
+        result = distro_shell(selected_distro, distro_config).run(
+            version_cmd, timeout=30
         )
         if result.returncode == 0 and result.stdout.strip():
             app["version"] = result.stdout.strip()
-            print(f"Updated version for distro app {app['app_name']}: {app['version']}")
+            logger.debug(
+                "Updated version for distro app %s: %s", app["app_name"], app["version"]
+            )
         else:
-            print(f"Failed to get version for {app['app_name']}")
-            if result.stderr:
-                print(f"Error: {result.stderr}")
+            logger.warning(
+                "Failed to get version for %s: %s", app["app_name"], result.stderr
+            )
     except Exception as e:
-        print(f"Error getting version for distro app {app['app_name']}: {e}")
+        logger.error("Error getting version for distro app %s: %s", app["app_name"], e)
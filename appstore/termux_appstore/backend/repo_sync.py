@@ -0,0 +1,131 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Skip package-list syncs that were done recently.
+
+"Check for Updates" refreshes the Termux package lists and the distro's
+before comparing versions.  A sync takes seconds on the Termux side and
+much longer through proot, and repeating it a minute after the last one
+finds nothing new.  :func:`is_fresh` tells whether a source's lists are
+younger than the sync TTL, so the caller only syncs the stale ones.
+
+A source's age is the newer of two times: the newest mtime among its
+package lists, which also sees a ``pkg update`` run by hand, and the
+time the store last synced it successfully (``repo_sync.json``).  The
+second is needed because apt stamps list files with the server's
+modification time, so lists of a quiet repository look old right after
+a sync.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from termux_appstore.constants import APPSTORE_REPO_SYNC_FILE, REPO_SYNC_TTL
+
+logger = logging.getLogger(__name__)
+
+# Package lists of each package manager, as paths inside the rootfs
+APT_LISTS = "/var/lib/apt/lists"
+PACMAN_SYNC = "/var/lib/pacman/sync"
+DNF_CACHES = ("/var/cache/libdnf5", "/var/cache/dnf")
+
+# dnf keeps ``<repo>/repodata/repomd.xml`` under its cache directory
+_SCAN_DEPTH = 3
+
+_DISTRO_LISTS = {
+    "ubuntu": (APT_LISTS,),
+    "debian": (APT_LISTS,),
+    "archlinux": (PACMAN_SYNC,),
+    "fedora": DNF_CACHES,
+}
+
+NATIVE = "termux"
+
+_lock = threading.Lock()
+
+
+def native_lists():
+    """Return the package-list directories of Termux's package manager."""
+    return (PACMAN_SYNC,) if shutil.which("pacman") else (APT_LISTS,)
+
+
+def distro_lists(distro):
+    """Return the package-list directories of *distro*, or ``()``."""
+    return _DISTRO_LISTS.get(distro, ())
+
+
+def last_synced(key, rootfs, lists):
+    """Return when the package lists of one source were last synced.
+
+    Args:
+        key: Source name, :data:`NATIVE` or the distro name.
+        rootfs: A :class:`~termux_appstore.backend.distro.DistroRootfs`
+            holding the lists, or ``None`` when it cannot be read.
+        lists: Package-list directories inside *rootfs*.
+
+    Returns:
+        float: A timestamp, or ``None`` when the source was never synced.
+    """
+    times = [_recorded().get(key)]
+    if rootfs is not None:
+        for path in lists:
+            try:
+                times.append(_newest_mtime(rootfs.resolve(path), _SCAN_DEPTH))
+            except OSError:
+                continue
+    times = [t for t in times if t is not None]
+    return max(times) if times else None
+
+
+def is_fresh(key, rootfs, lists, ttl=REPO_SYNC_TTL):
+    """Return ``True`` when the source was synced less than *ttl* seconds ago."""
+    synced = last_synced(key, rootfs, lists)
+    return synced is not None and time.time() - synced < ttl
+
+
+def mark_synced(key):
+    """Record that the package lists of *key* were just synced."""
+    with _lock:
+        data = _recorded()
+        data[key] = time.time()
+        try:
+            os.makedirs(os.path.dirname(APPSTORE_REPO_SYNC_FILE), exist_ok=True)
+            tmp = APPSTORE_REPO_SYNC_FILE + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, APPSTORE_REPO_SYNC_FILE)
+        except OSError as e:
+            logger.error("Error saving repo sync time: %s", e)
+
+
+def _recorded():
+    try:
+        with open(APPSTORE_REPO_SYNC_FILE) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _newest_mtime(path, depth):
+    """Return the newest mtime of the files under *path*, ``None`` if none."""
+    newest = None
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                mtime = _newest_mtime(entry.path, depth - 1) if depth > 1 else None
+            elif entry.name == "lock" or entry.name.startswith("."):
+                continue
+            else:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+        except OSError:
+            continue
+        if mtime is not None and (newest is None or mtime > newest):
+            newest = mtime
+    return newest
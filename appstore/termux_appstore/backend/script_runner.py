@@ -1,17 +1,68 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-"""Install/uninstall script download and modification.
+"""Install/uninstall script download, caching and modification.
 
 Downloads app scripts from GitHub, injects the ``inbuild_functions``
-source line after the shebang, and returns the local path.
+source line after the shebang, and keeps the prepared result in a
+content-addressed cache so repeat installs and uninstalls start without
+waiting on the network.
 """
 
+import hashlib
+import json
+import logging
 import os
-import subprocess
+import shutil
+import threading
 import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from termux_appstore._buildconf import PREFIX
-from termux_appstore.constants import TERMUX_PREFIX, TERMUX_TMP
+from termux_appstore.constants import (
+    APPSTORE_SCRIPT_CACHE_DIR,
+    TERMUX_PREFIX,
+    TERMUX_TMP,
+)
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_FETCH_TIMEOUT = 20
+
+
+def find_inbuild_functions():
+    """Locate the shared ``inbuild_functions`` library.
+
+    Returns:
+        Path | None: The library path, or ``None`` when it is missing.
+    """
+    # Resolve inbuild_functions path with multiple fallbacks.
+    # 3. PREFIX-based:     <PREFIX>/lib/python*/site-packages/termux_appstore/inbuild_functions/
+    pkg_root = Path(__file__).resolve().parent.parent  # termux_appstore/
+    candidates = [
+        pkg_root / "inbuild_functions" / "inbuild_functions",
+        pkg_root.parent / "inbuild_functions" / "inbuild_functions",
+    ]
+
+    # PREFIX-based fallback — glob for the python version directory
+    prefix_site = Path(PREFIX) / "lib"
+    if prefix_site.exists():
+        for pydir in sorted(prefix_site.glob("python*/site-packages"), reverse=True):
+            candidates.append(
+                pydir / "termux_appstore" / "inbuild_functions" / "inbuild_functions"
+            )
+            break
+
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+
+    logger.error(
+        "inbuild_functions not found. Searched: %s",
+        ", ".join(str(c) for c in candidates),
+    )
+    return None
 
 
 def modify_script(script_path):
@@ -36,38 +87,8 @@ def modify_script(script_path):
         with open(script_path, "r") as f:
             content = f.read()
 
-        # Resolve inbuild_functions path with multiple fallbacks.
-        # 3. PREFIX-based:     <PREFIX>/lib/python*/site-packages/termux_appstore/inbuild_functions/
-        pkg_root = Path(__file__).resolve().parent.parent  # termux_appstore/
-        candidates = [
-            pkg_root / "inbuild_functions" / "inbuild_functions",
-            pkg_root.parent / "inbuild_functions" / "inbuild_functions",
-        ]
-
-        # PREFIX-based fallback — glob for the python version directory
-        prefix_site = Path(PREFIX) / "lib"
-        if prefix_site.exists():
-            for pydir in sorted(
-                prefix_site.glob("python*/site-packages"), reverse=True
-            ):
-                candidates.append(
-                    pydir
-                    / "termux_appstore"
-                    / "inbuild_functions"
-                    / "inbuild_functions"
-                )
-                break
-
-        inbuild_functions_path = None
-        for candidate in candidates:
-            if candidate.exists():
-                inbuild_functions_path = candidate
-                break
-
+        inbuild_functions_path = find_inbuild_functions()
         if inbuild_functions_path is None:
-            print("Error: inbuild_functions not found. Searched:")
-            for c in candidates:
-                print(f"  - {c}")
             return False
 
         for shebang in [
@@ -96,64 +117,263 @@ def modify_script(script_path):
                     f.write(new_content)
                 return True
 
-        print("No compatible shebang found in script")
+        logger.warning("No compatible shebang found in script")
         return False
 
     except Exception as e:
-        print(f"Error injecting common_functions source: {e}")
+        logger.error("Error injecting common_functions source: %s", e)
         return False
 
 
-def download_script(url):
-    """Download a script from *url* and prepare it for execution.
+def _temp_script_path():
+    """Return a fresh path under ``$TMPDIR`` for a script to run."""
+    os.makedirs(TERMUX_TMP, exist_ok=True)
+    # Several scripts can be prepared at once; keep their names apart.
+    script_name = f"appstore_{time.time_ns()}_{threading.get_ident()}.sh"
+    return os.path.join(TERMUX_TMP, script_name)
 
-    Uses ``aria2c`` for the download, verifies encoding, and injects
-    the ``inbuild_functions`` source line.
+
+def prepare_script(content):
+    """Write a locally generated script and prepare it for execution.
+
+    Args:
+        content: Script text, starting with a bash shebang.
+
+    Returns:
+        str | None: Path to the ready-to-run script, or ``None`` on
+        failure.
+    """
+    script_path = _temp_script_path()
+    try:
+        with open(script_path, "w") as f:
+            f.write(content)
+        if modify_script(script_path):
+            return script_path
+        logger.error("Failed to modify script")
+    except Exception as e:
+        logger.error("Error preparing script: %s", e)
+    if os.path.exists(script_path):
+        os.remove(script_path)
+    return None
+
+
+# Script cache
+#
+# Prepared scripts live in ``APPSTORE_SCRIPT_CACHE_DIR`` as ``<sha256>.sh``,
+# named after the hash of the script as served — the same hash
+# ``apps.json`` publishes as ``install_sha256`` / ``uninstall_sha256``.
+# ``index.json`` maps each URL to its current hash and the ETag /
+# Last-Modified validators of the response that produced it.
+
+_CACHE_INDEX = os.path.join(APPSTORE_SCRIPT_CACHE_DIR, "index.json")
+_cache_lock = threading.Lock()
+# URLs already revalidated this session.
+_validated_urls = set()
+
+
+def _cache_path(digest):
+    return os.path.join(APPSTORE_SCRIPT_CACHE_DIR, f"{digest}.sh")
+
+
+def _load_cache_index():
+    """Return the cache index, clearing the cache if it is unusable.
+
+    Cached scripts ``source`` the library by absolute path, so they are
+    dropped whenever ``inbuild_functions`` moved.
+    """
+    library = str(find_inbuild_functions())
+    try:
+        with open(_CACHE_INDEX, "r") as f:
+            index = json.load(f)
+        if index.get("library") == library:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    if os.path.isdir(APPSTORE_SCRIPT_CACHE_DIR):
+        for name in os.listdir(APPSTORE_SCRIPT_CACHE_DIR):
+            if name.endswith(".sh"):
+                os.remove(os.path.join(APPSTORE_SCRIPT_CACHE_DIR, name))
+    index = {"library": library, "urls": {}}
+    _save_cache_index(index)
+    return index
+
+
+def _save_cache_index(index):
+    os.makedirs(APPSTORE_SCRIPT_CACHE_DIR, exist_ok=True)
+    tmp = f"{_CACHE_INDEX}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, _CACHE_INDEX)
+
+
+def _record_cache_entry(url, digest, headers=None):
+    """Point *url* at *digest* and drop the script it replaced."""
+    with _cache_lock:
+        index = _load_cache_index()
+        old = index["urls"].get(url, {}).get("sha256")
+        entry = {"sha256": digest}
+        if headers is not None:
+            entry["etag"] = headers.get("ETag")
+            entry["last_modified"] = headers.get("Last-Modified")
+        elif old == digest:
+            entry = index["urls"][url]
+        index["urls"][url] = entry
+        _save_cache_index(index)
+
+        still_used = {e.get("sha256") for e in index["urls"].values()}
+        if old and old not in still_used and os.path.exists(_cache_path(old)):
+            os.remove(_cache_path(old))
+
+
+def _store_script(body):
+    """Prepare *body* and store it under its hash; return the hash."""
+    digest = hashlib.sha256(body).hexdigest()
+    path = _cache_path(digest)
+    if os.path.exists(path):
+        return digest
+
+    os.makedirs(APPSTORE_SCRIPT_CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(body)
+        if not modify_script(tmp):
+            logger.error("Failed to modify script")
+            return None
+        os.replace(tmp, path)
+        return digest
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def cached_script(url, sha256=None):
+    """Return a prepared copy of the script at *url* from the cache.
+
+    A script whose *sha256* is already cached is returned without any
+    network access.  Otherwise the URL is fetched with a conditional
+    request (at most once per session); when the network is unreachable
+    the last cached version is used, so installed apps can still be
+    uninstalled offline.
 
     Args:
         url: Remote URL of the install/uninstall script.
+        sha256: Expected hash of the script from ``apps.json``, if known.
 
     Returns:
-        str | None: Local path to the ready-to-run script, or ``None``
-        on failure.
+        str | None: Path of the cached script — shared, so copy it before
+        running or changing it — or ``None`` on failure.
     """
-    script_path = None
+    with _cache_lock:
+        entry = _load_cache_index()["urls"].get(url)
+    known = entry.get("sha256") if entry else None
+
+    if sha256 and os.path.exists(_cache_path(sha256)):
+        if known != sha256:
+            _record_cache_entry(url, sha256)
+        return _cache_path(sha256)
+    if known and not os.path.exists(_cache_path(known)):
+        entry = known = None
+    if known and url in _validated_urls:
+        return _cache_path(known)
+
+    request = urllib.request.Request(url, headers={"User-Agent": "termux-appstore"})
+    if entry:
+        if entry.get("etag"):
+            request.add_header("If-None-Match", entry["etag"])
+        if entry.get("last_modified"):
+            request.add_header("If-Modified-Since", entry["last_modified"])
+
     try:
-        os.makedirs(TERMUX_TMP, exist_ok=True)
+        logger.debug("Fetching script %s", url)
+        with urllib.request.urlopen(request, timeout=SCRIPT_FETCH_TIMEOUT) as resp:
+            body = resp.read()
+            headers = resp.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and known:
+            _validated_urls.add(url)
+            return _cache_path(known)
+        logger.error("Download failed: HTTP %s", e.code)
+        return None
+    except OSError as e:
+        if known:
+            logger.warning("Script download failed (%s); using cached copy", e)
+            _validated_urls.add(url)
+            return _cache_path(known)
+        logger.error("Download failed: %s", e)
+        return None
 
-        script_name = f"appstore_{int(time.time())}.sh"
-        script_path = os.path.join(TERMUX_TMP, script_name)
+    try:
+        body.decode("utf-8")
+    except UnicodeDecodeError:
+        logger.error("Script file has invalid encoding")
+        return None
 
-        print(f"Downloading script from {url} to {script_path}")
-        command = f"aria2c -x 16 -s 16 '{url}' -d '{TERMUX_TMP}' -o '{script_name}'"
-        result = subprocess.run(
-            command, shell=True, capture_output=True, text=True, encoding="utf-8"
+    digest = _store_script(body)
+    if digest is None:
+        return None
+    if sha256 and digest != sha256:
+        # apps.json is published separately from the scripts; the
+        # served script is the current one.
+        logger.warning(
+            "Script %s does not match the apps.json hash; using it anyway", url
         )
+    _record_cache_entry(url, digest, headers)
+    _validated_urls.add(url)
+    return _cache_path(digest)
 
-        if result.returncode != 0:
-            print(f"Download failed: {result.stderr}")
-            return None
 
-        if not os.path.exists(script_path):
-            print("Script file not found after download")
-            return None
+def script_sha256(app, url):
+    """Return the ``apps.json`` hash of *app*'s script at *url*, if any."""
+    for kind in ("install", "uninstall"):
+        if url and app.get(f"{kind}_url") == url:
+            return app.get(f"{kind}_sha256")
+    return None
 
-        try:
-            with open(script_path, "r", encoding="utf-8") as f:
-                f.read()
-        except UnicodeDecodeError:
-            print("Script file has invalid encoding")
-            if os.path.exists(script_path):
-                os.remove(script_path)
-            return None
 
-        if not modify_script(script_path):
-            print("Failed to modify script")
-            return None
+def prefetch_scripts(targets, max_workers=4):
+    """Warm the script cache.
+
+    Args:
+        targets: Iterable of ``(url, sha256)`` pairs; *sha256* may be
+            ``None``.
+        max_workers: Number of parallel downloads.
+
+    Returns:
+        int: Number of scripts now available from the cache.
+    """
+    targets = list(dict.fromkeys(t for t in targets if t[0]))
+    if not targets:
+        return 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = list(pool.map(lambda t: cached_script(*t), targets))
+    return sum(1 for p in paths if p)
+
+
+def download_script(url, sha256=None):
+    """Return a ready-to-run copy of the script at *url*.
 
+    The script comes from :func:`cached_script`; the copy lives in
+    ``$TMPDIR`` and may be deleted after the run.
+
+    Args:
+        url: Remote URL of the install/uninstall script.
+        sha256: Expected hash of the script from ``apps.json``, if known.
+
+    Returns:
+        str | None: Local path to the ready-to-run script, or ``None``
+        on failure.
+    """
+    cached = cached_script(url, sha256)
+    if cached is None:
+        return None
+    script_path = _temp_script_path()
+    try:
+        shutil.copyfile(cached, script_path)
         return script_path
-    except Exception as e:
-        print(f"Error downloading script: {e}")
-        if script_path and os.path.exists(script_path):
+    except OSError as e:
+        logger.error("Error copying cached script: %s", e)
+        if os.path.exists(script_path):
             os.remove(script_path)
         return None
@@ -1,59 +1,67 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 """User settings persistence.
 
-Handles loading, saving, and accessing user preferences stored in
-``~/.appstore/settings.json``.
+Handles loading, saving, and accessing user preferences stored in the
+``settings`` table of the state database
+(:mod:`termux_appstore.backend.store`).  :meth:`Settings.set` is
+written behind (see :mod:`termux_appstore.backend.write_behind`).
 """
 
-import json
-import os
+import logging
+import sqlite3
 
-from termux_appstore.constants import DEFAULT_SETTINGS, SETTINGS_FILE
+from termux_appstore.backend.store import get_store
+from termux_appstore.constants import DEFAULT_SETTINGS
+
+logger = logging.getLogger(__name__)
 
 
 class Settings:
     """Read/write user settings with defaults for missing keys."""
 
     def __init__(self):
+        self._store = get_store()
         self._data = {}
+        # Keys set since the last background write
+        self._changed = set()
         self.load()
 
     def load(self):
-        """Load settings from disk, filling in defaults for missing keys."""
+        """Load settings from the database, filling in defaults for missing keys."""
         try:
-            if os.path.exists(SETTINGS_FILE):
-                with open(SETTINGS_FILE, "r") as f:
-                    self._data = json.load(f)
-                # Back-fill any keys that were added in newer versions
-                changed = False
-                for key, default in DEFAULT_SETTINGS.items():
-                    if key not in self._data:
-                        self._data[key] = default
-                        changed = True
-                if changed:
-                    self.save()
-            else:
-                self._data = dict(DEFAULT_SETTINGS)
-                self.save()
-                print("Created default settings")
-        except Exception as e:
-            print(f"Error loading settings: {e}")
+            self._data = {**DEFAULT_SETTINGS, **self._store.settings()}
+        except sqlite3.Error as e:
+            logger.error("Error loading settings: %s", e)
             self._data = dict(DEFAULT_SETTINGS)
 
     def save(self):
-        """Persist current settings to disk."""
+        """Persist every current setting."""
         try:
-            os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(self._data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+            with self._store.transaction():
+                for key, value in self._data.items():
+                    self._store.set_setting(key, value)
+        except sqlite3.Error as e:
+            logger.error("Error saving settings: %s", e)
 
     def get(self, key, default=None):
         """Return a setting value, falling back to *default*."""
         return self._data.get(key, default)
 
     def set(self, key, value):
-        """Update a single setting and save immediately."""
+        """Update a single setting and save it in the background."""
         self._data[key] = value
-        self.save()
+        self._changed.add(key)
+        self._store.writes.schedule(self._write)
+
+    def _write(self):
+        written = {key: self._data[key] for key in list(self._changed)}
+        for key, value in written.items():
+            self._store.set_setting(key, value)
+
+        def _written():
+            # Keys set again since the write stay unwritten
+            self._changed.difference_update(
+                key for key, value in written.items() if self._data.get(key) == value
+            )
+
+        return _written
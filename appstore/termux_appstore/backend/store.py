@@ -0,0 +1,360 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Persistent app store state in one SQLite database.
+
+Installed apps, pending updates, settings, the refresh history and the
+catalog versions used to detect updates live in ``~/.appstore/state.db``
+instead of one JSON file each.  The database runs in WAL mode, so the
+window and ``termux-appstore-cli`` can read while the other writes, and
+every change is a transaction: a crash leaves the old state or the new
+one, never a half-written file.
+
+:func:`get_store` returns the store shared by the process.  The first
+time it opens, the JSON files written by earlier versions are imported
+and removed (see :meth:`StateStore.import_json_files`).
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from termux_appstore.backend.write_behind import WriteBehind
+from termux_appstore.constants import (
+    APPSTORE_DB,
+    APPSTORE_OLD_JSON_DIR,
+    INSTALLED_APPS_FILE,
+    LAST_REFRESH_FILE,
+    LAST_VERSION_CHECK_FILE,
+    SETTINGS_FILE,
+    UPDATES_TRACKING_FILE,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Rows of refresh history kept per kind
+REFRESH_HISTORY_LIMIT = 100
+
+# Refresh kinds
+REFRESH = "refresh"
+UPDATE_CHECK = "update-check"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS installed (
+    folder_name TEXT PRIMARY KEY,
+    installed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pending_updates (
+    folder_name TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    found_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS refresh_history (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refresh_history_kind
+    ON refresh_history (kind, finished_at);
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    folder_name TEXT PRIMARY KEY,
+    version TEXT
+) WITHOUT ROWID;
+"""
+
+_OLD_JSON = os.path.join(APPSTORE_OLD_JSON_DIR, "apps.json")
+
+
+class StateStore:
+    """The app store's state database.
+
+    Each thread gets its own connection.  Reads run on their own;
+    changes that belong together go in one :meth:`transaction`.
+    Changes made on the GTK thread go through :attr:`writes` instead.
+
+    Args:
+        path: Database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # Batches writes made on the GTK thread; see write_behind
+        self.writes = WriteBehind(self.transaction)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection().executescript(
+            f"BEGIN IMMEDIATE;{_SCHEMA}"
+            "INSERT OR IGNORE INTO meta "
+            f"VALUES ('schema_version', '{SCHEMA_VERSION}');"
+            "COMMIT;"
+        )
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Autocommit; transaction() issues BEGIN itself.
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run the enclosed statements as one transaction.
+
+        Nested uses join the outer transaction.
+
+        Yields:
+            sqlite3.Connection: The thread's connection.
+        """
+        db = self._connection()
+        if db.in_transaction:
+            yield db
+            return
+        # IMMEDIATE takes the write lock up front, so two processes
+        # updating at once wait instead of failing on upgrade.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    # Installed apps
+
+    def installed_apps(self):
+        """Return the set of installed folder names."""
+        return {row[0] for row in self._query("SELECT folder_name FROM installed")}
+
+    def is_installed(self, folder_name):
+        """Return ``True`` when *folder_name* is recorded as installed."""
+        return bool(
+            self._query("SELECT 1 FROM installed WHERE folder_name = ?", (folder_name,))
+        )
+
+    def set_installed(self, folder_name, installed):
+        """Mark one app installed or not installed."""
+        with self.transaction() as db:
+            if installed:
+                db.execute(
+                    "INSERT OR IGNORE INTO installed VALUES (?, ?)",
+                    (folder_name, time.time()),
+                )
+            else:
+                db.execute(
+                    "DELETE FROM installed WHERE folder_name = ?", (folder_name,)
+                )
+
+    def replace_installed(self, folder_names):
+        """Make *folder_names* the complete installed set.
+
+        Apps that stay installed keep their install time.
+        """
+        folder_names = set(folder_names)
+        with self.transaction() as db:
+            gone = self.installed_apps() - folder_names
+            db.executemany(
+                "DELETE FROM installed WHERE folder_name = ?",
+                [(f,) for f in gone],
+            )
+            now = time.time()
+            db.executemany(
+                "INSERT OR IGNORE INTO installed VALUES (?, ?)",
+                [(f, now) for f in folder_names],
+            )
+
+    # Pending updates
+
+    def pending_updates(self):
+        """Return ``{folder_name: new_version}``."""
+        return dict(self._query("SELECT folder_name, version FROM pending_updates"))
+
+    def replace_pending_updates(self, pending):
+        """Make *pending* the complete pending-update mapping.
+
+        Entries whose version did not change keep the time they were
+        found.
+        """
+        with self.transaction() as db:
+            current = self.pending_updates()
+            db.executemany(
+                "DELETE FROM pending_updates WHERE folder_name = ?",
+                [(f,) for f in current if f not in pending],
+            )
+            now = time.time()
+            db.executemany(
+                "INSERT OR REPLACE INTO pending_updates VALUES (?, ?, ?)",
+                [
+                    (f, str(v), now)
+                    for f, v in pending.items()
+                    if current.get(f) != str(v)
+                ],
+            )
+
+    # Settings
+
+    def settings(self):
+        """Return every stored setting as ``{key: value}``."""
+        return {
+            key: json.loads(value)
+            for key, value in self._query("SELECT key, value FROM settings")
+        }
+
+    def set_setting(self, key, value):
+        """Store one setting; *value* must be JSON-serializable."""
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    # Refresh history
+
+    def record_refresh(self, kind, when=None):
+        """Record a finished refresh of *kind* (:data:`REFRESH` or
+        :data:`UPDATE_CHECK`)."""
+        with self.transaction() as db:
+            db.execute(
+                "INSERT INTO refresh_history (kind, finished_at) VALUES (?, ?)",
+                (kind, time.time() if when is None else when),
+            )
+            db.execute(
+                "DELETE FROM refresh_history WHERE kind = ? AND id NOT IN "
+                "(SELECT id FROM refresh_history WHERE kind = ? "
+                "ORDER BY finished_at DESC LIMIT ?)",
+                (kind, kind, REFRESH_HISTORY_LIMIT),
+            )
+
+    def last_refresh(self, *kinds):
+        """Return when the last refresh of any of *kinds* finished.
+
+        Args:
+            *kinds: Refresh kinds; all kinds when empty.
+
+        Returns:
+            float: A timestamp, or ``None`` when there was none.
+        """
+        if kinds:
+            marks = ", ".join("?" * len(kinds))
+            rows = self._query(
+                "SELECT MAX(finished_at) FROM refresh_history "
+                f"WHERE kind IN ({marks})",
+                kinds,
+            )
+        else:
+            rows = self._query("SELECT MAX(finished_at) FROM refresh_history")
+        return rows[0][0]
+
+    # Catalog versions
+
+    def catalog_versions(self):
+        """Return ``{folder_name: version}`` of the catalog snapshot."""
+        return dict(self._query("SELECT folder_name, version FROM catalog_versions"))
+
+    def replace_catalog_versions(self, apps):
+        """Snapshot the versions of the app dicts in *apps*."""
+        with self.transaction() as db:
+            db.execute("DELETE FROM catalog_versions")
+            db.executemany(
+                "INSERT OR REPLACE INTO catalog_versions VALUES (?, ?)",
+                [
+                    (app["folder_name"], app.get("version"))
+                    for app in apps
+                    if app.get("folder_name")
+                ],
+            )
+
+    # Migration
+
+    def import_json_files(self):
+        """Import the state files of earlier versions, then remove them.
+
+        Reads ``installed_apps.json``, ``updates.json``,
+        ``settings.json``, ``last_version_check``, ``last_refresh`` and
+        ``old_json/apps.json`` from ``~/.appstore``.  Everything is
+        imported in one transaction; a file that cannot be read is
+        reported and left in place.
+        """
+        imported = []
+        with self.transaction():
+            for path, load, apply in (
+                (INSTALLED_APPS_FILE, _load_json, self._import_installed),
+                (UPDATES_TRACKING_FILE, _load_json, self._import_pending),
+                (SETTINGS_FILE, _load_json, self._import_settings),
+                (LAST_VERSION_CHECK_FILE, _load_timestamp, self._import_refresh),
+                (LAST_REFRESH_FILE, _load_timestamp, self._import_refresh),
+                (_OLD_JSON, _load_json, self.replace_catalog_versions),
+            ):
+                if not os.path.exists(path):
+                    continue
+                try:
+                    apply(load(path))
+                except (OSError, ValueError, TypeError, KeyError) as e:
+                    logger.error("Could not import %s: %s", path, e)
+                    continue
+                imported.append(path)
+
+        for path in imported:
+            logger.info("Imported %s into %s", path, self.path)
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error("Could not remove %s: %s", path, e)
+        with contextlib.suppress(OSError):
+            os.rmdir(APPSTORE_OLD_JSON_DIR)
+
+    def _import_installed(self, folder_names):
+        self.replace_installed(self.installed_apps() | set(folder_names))
+
+    def _import_pending(self, pending):
+        self.replace_pending_updates({**self.pending_updates(), **pending})
+
+    def _import_settings(self, settings):
+        for key, value in settings.items():
+            self.set_setting(key, value)
+
+    def _import_refresh(self, when):
+        self.record_refresh(REFRESH, when)
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _load_timestamp(path):
+    with open(path) as f:
+        return float(f.read().strip())
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide :class:`StateStore`, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore(APPSTORE_DB)
+            _store.import_json_files()
+            atexit.register(_store.writes.flush)
+        return _store
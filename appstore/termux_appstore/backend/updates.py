@@ -2,52 +2,40 @@
 """Update tracking and version comparison.
 
 Manages pending updates, compares versions between old and new
-``apps.json`` snapshots, and persists the tracking file.
+``apps.json`` snapshots, and persists the pending updates in the state
+database (:mod:`termux_appstore.backend.store`).  Replacing the whole
+mapping is written behind (see :mod:`termux_appstore.backend.write_behind`).
 """
 
-import json
-import os
+import logging
+import sqlite3
 
-from termux_appstore.constants import UPDATES_TRACKING_FILE
+from termux_appstore.backend.store import get_store
+from termux_appstore.backend.versions import is_newer, version_scheme
+
+logger = logging.getLogger(__name__)
 
 
 class UpdateTracker:
     """Track pending app updates."""
 
     def __init__(self):
-        self._file = UPDATES_TRACKING_FILE
+        self._store = get_store()
         self._pending = {}
         self.load()
 
     def load(self):
-        """Load pending updates from the tracking file."""
-        try:
-            if os.path.exists(self._file):
-                print(f"Loading updates from {self._file}")
-                with open(self._file, "r") as f:
-                    self._pending = json.load(f)
-                print(f"Loaded updates: {self._pending}")
-            else:
-                print(f"No updates file found at {self._file}")
-                self._pending = {}
-        except Exception as e:
-            print(f"Error loading updates tracking: {e}")
-            self._pending = {}
+        """Load pending updates from the database."""
+        self._pending = self._store.pending_updates()
+        logger.debug("Loaded updates: %s", self._pending)
 
     def save(self):
-        """Persist pending updates to disk."""
+        """Persist pending updates in one transaction."""
+        logger.debug("Updates to save: %s", self._pending)
         try:
-            os.makedirs(os.path.dirname(self._file), exist_ok=True)
-            print(f"Saving updates to {self._file}")
-            print(f"Updates to save: {self._pending}")
-            with open(self._file, "w") as f:
-                json.dump(self._pending, f, indent=2)
-            print("Successfully saved updates")
-        except Exception as e:
-            print(f"Error saving updates tracking: {e}")
-            import traceback
-
-            traceback.print_exc()
+            self._store.replace_pending_updates(self._pending)
+        except sqlite3.Error as e:
+            logger.error("Error saving updates tracking: %s", e)
 
     @property
     def pending(self):
@@ -56,9 +44,12 @@ class UpdateTracker:
 
     @pending.setter
     def pending(self, value):
-        """Replace the pending dict and save."""
+        """Replace the pending dict and save it in the background."""
         self._pending = dict(value)
-        self.save()
+        self._store.writes.schedule(self._write)
+
+    def _write(self):
+        self._store.replace_pending_updates(dict(self._pending))
 
     def add(self, folder_name, new_version):
         """Record a pending update for *folder_name*."""
@@ -77,19 +68,20 @@ class UpdateTracker:
         return bool(self._pending)
 
     @staticmethod
-    def compare_versions(old_data, new_data):
+    def compare_versions(old_data, new_data, distro=None):
         """Compare versions between two ``apps.json`` snapshots.
 
         Args:
             old_data: List of app dicts from the old snapshot.
             new_data: List of app dicts from the new snapshot.
+            distro: Selected distro, used to order distro package versions.
 
         Returns:
             dict: ``{folder_name: new_version}`` for apps whose version
-            changed.
+            is newer.
         """
         updates = {}
-        print("\nComparing versions:")
+        logger.debug("Comparing versions:")
         for new_app in new_data:
             app_name = new_app["folder_name"]
             new_version = new_app.get("version")
@@ -99,13 +91,24 @@ class UpdateTracker:
             )
             if old_app:
                 old_version = old_app.get("version")
-                print(f"Comparing {app_name}: old={old_version}, new={new_version}")
-                if new_version and old_version != new_version:
-                    print(
-                        f"Update found for {app_name}: {old_version} -> {new_version}"
+                logger.debug(
+                    "Comparing %s: old=%s, new=%s", app_name, old_version, new_version
+                )
+                if (
+                    new_version
+                    and old_version
+                    and is_newer(
+                        old_version, new_version, version_scheme(new_app, distro)
+                    )
+                ):
+                    logger.info(
+                        "Update found for %s: %s -> %s",
+                        app_name,
+                        old_version,
+                        new_version,
                     )
                     updates[app_name] = new_version
 
-        print(f"Total updates found: {len(updates)}")
-        print(f"Updates: {updates}")
+        logger.info("Total updates found: %s", len(updates))
+        logger.debug("Updates: %s", updates)
         return updates
@@ -0,0 +1,390 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Version ordering for update detection.
+
+Each package manager orders versions its own way, and a plain string
+comparison gets most of them wrong (``"1.10" < "1.9"``, epochs,
+``~`` pre-releases).  This module implements the orderings the app
+store meets:
+
+* ``dpkg`` — Debian/Ubuntu and Termux with apt (``dpkg --compare-versions``)
+* ``rpm`` — Fedora (``rpmvercmp``, including ``~`` and ``^``)
+* ``vercmp`` — Arch Linux and Termux with pacman (``alpm_pkg_vercmp``)
+* ``generic`` — versions pinned in ``install.sh``: PEP 440 / semver-like
+
+Comparisons are memoized; update checks compare the same pairs over and
+over.
+"""
+
+import functools
+import re
+import shutil
+
+DPKG = "dpkg"
+RPM = "rpm"
+VERCMP = "vercmp"
+GENERIC = "generic"
+
+# Version scheme of packages in each supported distro
+DISTRO_SCHEMES = {
+    "ubuntu": DPKG,
+    "debian": DPKG,
+    "fedora": RPM,
+    "arch": VERCMP,
+    "archlinux": VERCMP,
+}
+
+_DIGITS = frozenset("0123456789")
+_ALPHA = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ALNUM = _DIGITS | _ALPHA
+
+
+def _sign(n):
+    return (n > 0) - (n < 0)
+
+
+# dpkg
+
+
+def _dpkg_order(c):
+    if c in _DIGITS:
+        return 0
+    if c in _ALPHA:
+        return ord(c)
+    if c == "~":
+        return -1
+    return ord(c) + 256
+
+
+def _dpkg_verrevcmp(a, b):
+    """Port of dpkg's ``verrevcmp`` (lib/dpkg/version.c)."""
+    i = j = 0
+    la, lb = len(a), len(b)
+    while i < la or j < lb:
+        first_diff = 0
+        while (i < la and a[i] not in _DIGITS) or (j < lb and b[j] not in _DIGITS):
+            ac = _dpkg_order(a[i]) if i < la else 0
+            bc = _dpkg_order(b[j]) if j < lb else 0
+            if ac != bc:
+                return _sign(ac - bc)
+            i += 1
+            j += 1
+        while i < la and a[i] == "0":
+            i += 1
+        while j < lb and b[j] == "0":
+            j += 1
+        while i < la and a[i] in _DIGITS and j < lb and b[j] in _DIGITS:
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < la and a[i] in _DIGITS:
+            return 1
+        if j < lb and b[j] in _DIGITS:
+            return -1
+        if first_diff:
+            return _sign(first_diff)
+    return 0
+
+
+def _split_evr(version):
+    """Split ``[epoch:]version[-release]`` into its three parts."""
+    epoch, sep, rest = version.partition(":")
+    if not sep:
+        epoch, rest = "", version
+    upstream, sep, release = rest.rpartition("-")
+    if not sep:
+        upstream, release = rest, None
+    return epoch, upstream, release
+
+
+def dpkg_compare(a, b):
+    """Compare two Debian versions like ``dpkg --compare-versions``.
+
+    Returns:
+        int: ``-1``, ``0`` or ``1``.
+    """
+    ea, ua, ra = _split_evr(a.strip())
+    eb, ub, rb = _split_evr(b.strip())
+    try:
+        epochs = _sign(int(ea or 0) - int(eb or 0))
+    except ValueError:
+        epochs = _dpkg_verrevcmp(ea, eb)
+    return epochs or _dpkg_verrevcmp(ua, ub) or _dpkg_verrevcmp(ra or "", rb or "")
+
+
+# rpm
+
+
+def _rpmvercmp(a, b):
+    """Port of rpm's ``rpmvercmp`` (rpmio/rpmvercmp.c), with ``~``/``^``."""
+    if a == b:
+        return 0
+    i = j = 0
+    la, lb = len(a), len(b)
+    while i < la or j < lb:
+        while i < la and a[i] not in _ALNUM and a[i] not in "~^":
+            i += 1
+        while j < lb and b[j] not in _ALNUM and b[j] not in "~^":
+            j += 1
+
+        # "~" sorts before everything, even the end of the string.
+        a_tilde = i < la and a[i] == "~"
+        b_tilde = j < lb and b[j] == "~"
+        if a_tilde or b_tilde:
+            if not a_tilde:
+                return 1
+            if not b_tilde:
+                return -1
+            i += 1
+            j += 1
+            continue
+
+        # "^" sorts after the end of the string but before anything else.
+        a_caret = i < la and a[i] == "^"
+        b_caret = j < lb and b[j] == "^"
+        if a_caret or b_caret:
+            if i >= la:
+                return -1
+            if j >= lb:
+                return 1
+            if not a_caret:
+                return 1
+            if not b_caret:
+                return -1
+            i += 1
+            j += 1
+            continue
+
+        if i >= la or j >= lb:
+            break
+
+        charset = _DIGITS if a[i] in _DIGITS else _ALPHA
+        si, sj = i, j
+        while i < la and a[i] in charset:
+            i += 1
+        while j < lb and b[j] in charset:
+            j += 1
+        seg_a, seg_b = a[si:i], b[sj:j]
+
+        if not seg_b:
+            return 1 if charset is _DIGITS else -1
+        if charset is _DIGITS:
+            seg_a, seg_b = seg_a.lstrip("0"), seg_b.lstrip("0")
+            if len(seg_a) != len(seg_b):
+                return _sign(len(seg_a) - len(seg_b))
+        if seg_a != seg_b:
+            return -1 if seg_a < seg_b else 1
+
+    if i >= la and j >= lb:
+        return 0
+    return -1 if i >= la else 1
+
+
+def rpm_compare(a, b):
+    """Compare two RPM ``[epoch:]version[-release]`` strings.
+
+    Releases are only compared when both sides carry one.
+
+    Returns:
+        int: ``-1``, ``0`` or ``1``.
+    """
+    ea, va, ra = _split_evr(a.strip())
+    eb, vb, rb = _split_evr(b.strip())
+    try:
+        epochs = _sign(int(ea or 0) - int(eb or 0))
+    except ValueError:
+        epochs = _rpmvercmp(ea, eb)
+    if epochs:
+        return epochs
+    result = _rpmvercmp(va, vb)
+    if result == 0 and ra is not None and rb is not None:
+        result = _rpmvercmp(ra, rb)
+    return result
+
+
+# pacman
+
+
+def _alpm_rpmvercmp(a, b):
+    """Port of pacman's ``rpmvercmp`` (lib/libalpm/version.c).
+
+    Unlike rpm's it has no ``~``/``^`` handling, and a different number
+    of separators between segments decides the order.
+    """
+    if a == b:
+        return 0
+    one = two = 0
+    ptr1 = ptr2 = 0
+    la, lb = len(a), len(b)
+    while one < la and two < lb:
+        while one < la and a[one] not in _ALNUM:
+            one += 1
+        while two < lb and b[two] not in _ALNUM:
+            two += 1
+        if not (one < la and two < lb):
+            break
+        if one - ptr1 != two - ptr2:
+            return -1 if one - ptr1 < two - ptr2 else 1
+
+        charset = _DIGITS if a[one] in _DIGITS else _ALPHA
+        ptr1, ptr2 = one, two
+        while ptr1 < la and a[ptr1] in charset:
+            ptr1 += 1
+        while ptr2 < lb and b[ptr2] in charset:
+            ptr2 += 1
+        seg_a, seg_b = a[one:ptr1], b[two:ptr2]
+
+        if not seg_b:
+            return 1 if charset is _DIGITS else -1
+        if charset is _DIGITS:
+            seg_a, seg_b = seg_a.lstrip("0"), seg_b.lstrip("0")
+            if len(seg_a) != len(seg_b):
+                return _sign(len(seg_a) - len(seg_b))
+        if seg_a != seg_b:
+            return -1 if seg_a < seg_b else 1
+        one, two = ptr1, ptr2
+
+    if one >= la and two >= lb:
+        return 0
+    # A remaining alpha segment never beats the end of the string.
+    if (one >= la and b[two] not in _ALPHA) or (one < la and a[one] in _ALPHA):
+        return -1
+    return 1
+
+
+def vercmp(a, b):
+    """Compare two versions like pacman's ``vercmp``.
+
+    Returns:
+        int: ``-1``, ``0`` or ``1``.
+    """
+    a, b = a.strip(), b.strip()
+    if a == b:
+        return 0
+    ea, va, ra = _split_evr(a)
+    eb, vb, rb = _split_evr(b)
+    result = _alpm_rpmvercmp(ea or "0", eb or "0")
+    if result == 0:
+        result = _alpm_rpmvercmp(va, vb)
+    if result == 0 and ra is not None and rb is not None:
+        result = _alpm_rpmvercmp(ra, rb)
+    return result
+
+
+# generic
+
+_PRE_RELEASE = {
+    "dev": 0,
+    "a": 1,
+    "alpha": 1,
+    "b": 2,
+    "beta": 2,
+    "c": 3,
+    "rc": 3,
+    "pre": 3,
+    "preview": 3,
+}
+_POST_RELEASE = frozenset(("post", "rev", "r", "p", "patch"))
+_FINAL = 4
+_POST = 5
+
+_RELEASE = re.compile(r"\d+(?:\.\d+)*")
+_TOKEN = re.compile(r"[a-z]+|\d+")
+
+
+def _generic_key(version):
+    """Sort key for PEP 440 / semver-style version strings."""
+    v = version.strip().lower()
+    if v.startswith("v") and v[1:2].isdigit():
+        v = v[1:]
+    v = v.split("+", 1)[0]  # build metadata never affects ordering
+
+    m = _RELEASE.match(v)
+    release = tuple(int(p) for p in m.group().split(".")) if m else ()
+    while release and release[-1] == 0:
+        release = release[:-1]
+
+    tokens = _TOKEN.findall(v[m.end() :] if m else v)
+    if not tokens:
+        stage = _FINAL
+    elif tokens[0] in _POST_RELEASE or tokens[0].isdigit():
+        stage = _POST
+        if tokens[0] in _POST_RELEASE:
+            tokens = tokens[1:]
+    else:
+        stage = _PRE_RELEASE.get(tokens[0], 1)
+        if tokens[0] in _PRE_RELEASE:
+            tokens = tokens[1:]
+
+    # semver: numeric identifiers sort before alphanumeric ones
+    rest = tuple((0, int(t), "") if t.isdigit() else (1, 0, t) for t in tokens)
+    return release, stage, rest
+
+
+def generic_compare(a, b):
+    """Compare versions pinned in ``install.sh`` (``v1.2.3``, ``2.0rc1``, ...).
+
+    Follows PEP 440 for release segments and pre/post-releases and
+    semver for pre-release identifiers; a leading ``v`` and ``+build``
+    metadata are ignored.
+
+    Returns:
+        int: ``-1``, ``0`` or ``1``.
+    """
+    ka, kb = _generic_key(a), _generic_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+# Public API
+
+_COMPARATORS = {
+    DPKG: dpkg_compare,
+    RPM: rpm_compare,
+    VERCMP: vercmp,
+    GENERIC: generic_compare,
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def compare_versions(a, b, scheme=GENERIC):
+    """Compare versions *a* and *b* under *scheme*.
+
+    Args:
+        a: First version string.
+        b: Second version string.
+        scheme: One of :data:`DPKG`, :data:`RPM`, :data:`VERCMP` or
+            :data:`GENERIC`.
+
+    Returns:
+        int: ``-1`` if *a* is older, ``0`` if equal, ``1`` if newer.
+    """
+    return _COMPARATORS[scheme](a, b)
+
+
+def is_newer(old, new, scheme=GENERIC):
+    """Return ``True`` when *new* is a strictly newer version than *old*."""
+    return compare_versions(old, new, scheme) < 0
+
+
+@functools.lru_cache(maxsize=1)
+def _termux_scheme():
+    return VERCMP if shutil.which("pacman") else DPKG
+
+
+def version_scheme(app, distro=None):
+    """Return the version scheme of *app*'s ``version`` field.
+
+    Args:
+        app: App metadata dict.  ``version_source`` (set during refresh)
+            tells repo-tracked versions apart from pinned ones.
+        distro: Selected distro, for ``distro_local_version`` apps.
+
+    Returns:
+        str: A scheme name for :func:`compare_versions`.
+    """
+    source = app.get("version_source") or app.get("version")
+    if source == "termux_local_version":
+        return _termux_scheme()
+    if source == "distro_local_version":
+        return DISTRO_SCHEMES.get(distro, GENERIC)
+    return GENERIC
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Write-behind persistence for state changed on the GTK thread.
+
+Toggling a setting or marking an app installed used to write the state
+database right away, on whatever thread made the change; a commit waits
+for an fsync and, while the CLI holds the write lock, for the lock.
+:class:`WriteBehind` moves those writes to a background thread instead.
+Owners of in-memory state (:class:`~termux_appstore.backend.settings.Settings`,
+:class:`~termux_appstore.backend.installed_apps.InstalledApps`,
+:class:`~termux_appstore.backend.updates.UpdateTracker`) schedule a
+flush callback; callbacks scheduled within :data:`WRITE_DELAY` of each
+other run once each, together in one transaction.
+
+A batch that fails (say the CLI held the write lock past the busy
+timeout) is rolled back and scheduled again.  Owners therefore keep
+their record of unwritten changes until the batch commits: a callback
+may return a function, which runs after the commit and is where that
+record is cleared.
+
+Pending writes are lost if the process dies before they run, so the
+window calls :meth:`WriteBehind.flush` when it closes, and the store
+flushes at interpreter exit.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for more changes before writing
+WRITE_DELAY = 0.5
+# Seconds to wait before retrying a batch that failed
+RETRY_DELAY = 5
+
+
+class WriteBehind:
+    """Run scheduled writes on a background thread, batched.
+
+    Args:
+        transaction: Context-manager factory; every batch runs inside
+            one, e.g. :meth:`StateStore.transaction
+            <termux_appstore.backend.store.StateStore.transaction>`.
+        delay: Seconds to collect changes before writing them.
+    """
+
+    def __init__(self, transaction, delay=WRITE_DELAY):
+        self.delay = delay
+        self._transaction = transaction
+        # Insertion-ordered set of callbacks
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._batch_lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, callback):
+        """Run *callback* on the writer thread soon.
+
+        A callback already waiting is not added twice, so it should
+        write the owner's state as it is when it runs.  It may return a
+        function to call once the write is committed.
+        """
+        with self._cond:
+            self._pending[callback] = None
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self):
+        """Run every pending callback now, on the calling thread.
+
+        Returns:
+            bool: ``False`` when the batch failed and was scheduled again.
+        """
+        with self._batch_lock:
+            with self._cond:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return True
+            try:
+                with self._transaction():
+                    on_commit = [callback() for callback in batch]
+            except Exception as e:
+                logger.error("Error saving state, will retry: %s", e)
+                with self._cond:
+                    self._pending = {**dict.fromkeys(batch), **self._pending}
+                return False
+            for done in on_commit:
+                if done is not None:
+                    done()
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+            # Collect the changes that follow within the delay
+            time.sleep(self.delay)
+            if not self.flush():
+                time.sleep(RETRY_DELAY)
@@ -0,0 +1,549 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Command-line front end — no GTK imports.
+
+Usage::
+
+    termux-appstore-cli list [--installed | --updates] [--category NAME]
+    termux-appstore-cli search [--fuzzy] QUERY
+    termux-appstore-cli refresh
+    termux-appstore-cli check-updates [--profile] [--sync]
+    termux-appstore-cli install [--reinstall] APP
+    termux-appstore-cli uninstall APP
+    termux-appstore-cli status
+
+Works over SSH, in scripts and on devices without a display.  The
+commands share the GTK app's state files, refresh pipeline and script
+runner, so an app installed here shows up as installed in the window and
+vice versa.  *APP* is a folder name or an app name (case-insensitive).
+
+The backend reports its progress through :mod:`logging`; those messages
+are hidden unless ``--verbose`` is given, and the CLI prints its own
+summary lines and progress instead.  ``--log-file`` keeps the full log
+in ``~/.appstore/logs`` either way.
+"""
+
+import argparse
+import json
+import shutil
+import signal
+import sys
+import threading
+from datetime import datetime
+
+from termux_appstore.backend.app_data import load_app_metadata, search_apps
+from termux_appstore.backend.artifact_cache import cache_usage
+from termux_appstore.backend.distro import DistroConfig
+from termux_appstore.backend.installed_apps import InstalledApps
+from termux_appstore.backend.refresh import refresh_data
+from termux_appstore.backend.settings import Settings
+from termux_appstore.backend.store import get_store
+from termux_appstore.backend.updates import UpdateTracker
+from termux_appstore.constants import (
+    APPSTORE_REFRESH_STATE_FILE,
+    DEFAULT_SETTINGS,
+)
+from termux_appstore.log import LOG_FILE, setup_logging
+from termux_appstore.metrics import collect, format_summary
+from termux_appstore.tasks.script_executor import execute_script
+from termux_appstore.tasks.update_check import run_update_pipeline
+
+# Exit statuses
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CANCELLED = 130
+
+BAR_WIDTH = 24
+SPINNER = "|/-\\"
+
+
+class TextProgress:
+    """Render progress updates as plain text.
+
+    On a terminal the progress is a single line redrawn in place; when
+    the output is redirected, a line is written whenever the message
+    changes, so logs stay readable.
+
+    Args:
+        stream: File to write to.
+        show_output: Also print the script's own output.
+    """
+
+    def __init__(self, stream, show_output=False):
+        self.stream = stream
+        self.show_output = show_output
+        self.tty = stream.isatty()
+        self._lock = threading.Lock()
+        self._line = ""
+        self._message = None
+        self._spin = 0
+
+    def _draw(self, line):
+        if self.tty:
+            width = max(20, _terminal_columns() - 1)
+            line = line[:width]
+            pad = " " * max(0, len(self._line) - len(line))
+            self.stream.write(f"\r{line}{pad}")
+            self._line = line
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def update(self, fraction, message):
+        """Show *fraction* (0.0–1.0) complete with *message*."""
+        with self._lock:
+            fraction = min(max(fraction, 0.0), 1.0)
+            if not self.tty:
+                if message == self._message:
+                    return
+                self._message = message
+                self._draw(f"[{int(fraction * 100):3d}%] {message}")
+                return
+            filled = int(fraction * BAR_WIDTH)
+            bar = "#" * filled + "-" * (BAR_WIDTH - filled)
+            self._message = message
+            self._draw(f"[{bar}] {int(fraction * 100):3d}% {message}")
+
+    def pulse(self):
+        """Show activity without a known fraction."""
+        if not self.tty:
+            return
+        with self._lock:
+            self._spin = (self._spin + 1) % len(SPINNER)
+            self._draw(f"[{SPINNER[self._spin]}] {self._message or 'Working...'}")
+
+    def output(self, text):
+        """Print script output above the progress line."""
+        if not self.show_output:
+            return
+        with self._lock:
+            if self.tty and self._line:
+                self.stream.write("\r" + " " * len(self._line) + "\r")
+                self._line = ""
+            self.stream.write(text if text.endswith("\n") else text + "\n")
+            self.stream.flush()
+
+    def finish(self):
+        """End the progress line."""
+        with self._lock:
+            if self.tty and self._line:
+                self.stream.write("\n")
+                self.stream.flush()
+                self._line = ""
+
+
+def _terminal_columns():
+    return shutil.get_terminal_size().columns
+
+
+class _Console:
+    """Where the CLI's own output goes while backend chatter is muted."""
+
+    def __init__(self, out, err, verbose):
+        self.out = out
+        self.err = err
+        self.verbose = verbose
+
+    def echo(self, text=""):
+        self.out.write(f"{text}\n")
+        self.out.flush()
+
+    def error(self, text):
+        self.err.write(f"termux-appstore-cli: {text}\n")
+        self.err.flush()
+
+
+# Helpers
+
+
+def _find_app(apps, name):
+    """Return the app whose folder or display name is *name*, or ``None``."""
+    wanted = name.lower()
+    for app in apps:
+        if (app.folder_name or "").lower() == wanted:
+            return app
+    for app in apps:
+        if app.name_lower == wanted:
+            return app
+    return None
+
+
+def _app_rows(apps, installed, pending):
+    rows = []
+    for app in apps:
+        folder = app.folder_name or ""
+        if folder in pending:
+            state = f"update {pending[folder]}"
+        elif folder in installed:
+            state = "installed"
+        else:
+            state = ""
+        rows.append((folder, str(app.version or ""), state, app.app_name))
+    return rows
+
+
+def _print_apps(console, apps, installed, pending):
+    rows = _app_rows(apps, installed, pending)
+    if not rows:
+        console.echo("No apps found.")
+        return
+    folder_w = max(len("APP"), *(len(r[0]) for r in rows))
+    version_w = min(24, max(len("VERSION"), *(len(r[1]) for r in rows)))
+    state_w = max(len("STATUS"), *(len(r[2]) for r in rows))
+    console.echo(
+        f"{'APP':<{folder_w}}  {'VERSION':<{version_w}}  {'STATUS':<{state_w}}  NAME"
+    )
+    for folder, version, state, name in rows:
+        console.echo(
+            f"{folder:<{folder_w}}  {version[:version_w]:<{version_w}}  "
+            f"{state:<{state_w}}  {name}"
+        )
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+# Commands
+
+
+def cmd_list(args, console):
+    """List available, installed or updatable apps."""
+    apps, _ = load_app_metadata()
+    installed = set(InstalledApps().apps)
+    pending = UpdateTracker().pending
+
+    if args.category:
+        wanted = args.category.lower()
+        apps = [a for a in apps if wanted in a.categories_lower]
+    if args.installed:
+        apps = [a for a in apps if a.folder_name in installed]
+    elif args.updates:
+        apps = [a for a in apps if a.folder_name in pending]
+
+    _print_apps(console, apps, installed, pending)
+    return EXIT_OK
+
+
+def cmd_search(args, console):
+    """Search apps by name, description and category."""
+    apps, _ = load_app_metadata()
+    fuzzy = args.fuzzy or bool(Settings().get("enable_fuzzy_search", False))
+    matches = search_apps(apps, " ".join(args.query), fuzzy=fuzzy)
+    _print_apps(console, matches, set(InstalledApps().apps), UpdateTracker().pending)
+    return EXIT_OK if matches else EXIT_FAILED
+
+
+def cmd_refresh(args, console):
+    """Download fresh app metadata and logos."""
+    progress = TextProgress(console.out)
+    progress.update(0.0, "Refreshing app data...")
+    errors = []
+    ok = refresh_data(InstalledApps(), UpdateTracker(), on_error=errors.append)
+    progress.finish()
+    if not ok:
+        console.error(f"refresh failed: {errors[0] if errors else 'unknown error'}")
+        return EXIT_FAILED
+    apps, _ = load_app_metadata()
+    console.echo(f"App data refreshed: {len(apps)} apps available.")
+    return EXIT_OK
+
+
+def cmd_check_updates(args, console):
+    """Run the update-check pipeline and list the pending updates."""
+    progress = TextProgress(console.out)
+    update_tracker = UpdateTracker()
+    distro_config = DistroConfig()
+    errors = []
+    ttl_minutes = Settings().get(
+        "repo_sync_ttl_minutes", DEFAULT_SETTINGS["repo_sync_ttl_minutes"]
+    )
+    repo_ttl = 0 if args.sync else int(ttl_minutes) * 60
+
+    with collect() as records:
+        result = run_update_pipeline(
+            InstalledApps().apps,
+            update_tracker,
+            distro_config=distro_config if distro_config.distro_enabled else None,
+            on_progress=lambda pct, label: progress.update(
+                pct / 100, label or "Checking for updates..."
+            ),
+            on_error=errors.append,
+            repo_ttl=repo_ttl,
+        )
+    progress.finish()
+
+    if args.profile:
+        console.echo(format_summary(records))
+        console.echo()
+    if result is None:
+        console.error(
+            f"update check failed: {errors[0] if errors else 'unknown error'}"
+        )
+        return EXIT_FAILED
+
+    pending = result["pending_updates"]
+    if not pending:
+        console.echo("All apps are up to date.")
+        return EXIT_OK
+    names = {a.folder_name: a.app_name for a in result["apps_data"]}
+    console.echo(f"{len(pending)} update(s) available:")
+    for folder, version in sorted(pending.items()):
+        new = " (new)" if folder in result["new_updates"] else ""
+        console.echo(f"  {names.get(folder, folder)} → {version}{new}")
+    return EXIT_OK
+
+
+def _run_script(console, app, url, action_label):
+    """Run one install/uninstall script with text progress.
+
+    Ctrl-C cancels the script the same way the dialog's Cancel button
+    does.
+
+    Returns:
+        dict: The :func:`execute_script` result.
+    """
+    settings = Settings()
+    progress = TextProgress(console.out, show_output=console.verbose)
+    cancelled = threading.Event()
+
+    def _on_sigint(signum, frame):
+        cancelled.set()
+
+    previous = signal.signal(signal.SIGINT, _on_sigint)
+    try:
+        result = execute_script(
+            app=app,
+            url=url,
+            action_label=action_label,
+            is_cancelled=cancelled.is_set,
+            on_progress=progress.update,
+            on_output=progress.output,
+            on_pulse=progress.pulse,
+            use_pty=bool(settings.get("run_scripts_in_pty", True)),
+            cache_max_mb=int(
+                settings.get(
+                    "artifact_cache_max_mb", DEFAULT_SETTINGS["artifact_cache_max_mb"]
+                )
+            ),
+        )
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        progress.finish()
+    return result
+
+
+def _report_failure(console, action_label, result):
+    outcome = result["outcome"]
+    if outcome == "cancelled":
+        console.error(f"{action_label.lower()} cancelled")
+        return EXIT_CANCELLED
+    if outcome == "download_failed":
+        console.error("could not download the script")
+        return EXIT_FAILED
+    code = result["exit_code"]
+    reason = result["reason"] or (
+        f"{action_label} failed" + ("" if code is None else f" (exit code {code})")
+    )
+    if not console.verbose:
+        # The output was hidden while the script ran; show how it ended.
+        for line in result["log_lines"][-20:]:
+            console.err.write(f"  {line}\n")
+    console.error(reason)
+    return EXIT_FAILED
+
+
+def cmd_install(args, console):
+    """Install an app, or update it when an update is pending."""
+    apps, _ = load_app_metadata()
+    app = _find_app(apps, args.app)
+    if app is None:
+        console.error(f"no app named '{args.app}' (try: termux-appstore-cli search)")
+        return EXIT_FAILED
+
+    installed_tracker = InstalledApps()
+    update_tracker = UpdateTracker()
+    folder = app.folder_name
+    updating = folder in update_tracker.pending
+    if installed_tracker.is_installed(folder) and not updating and not args.reinstall:
+        console.echo(f"{app.app_name} is already installed.")
+        return EXIT_OK
+
+    url = app.install_url
+    if not url:
+        console.error(f"no install_url available for {app.app_name}")
+        return EXIT_FAILED
+
+    action_label = "Updating" if updating else "Installing"
+    console.echo(f"{action_label} {app.app_name}...")
+    result = _run_script(console, app, url, action_label)
+    if result["outcome"] != "success":
+        return _report_failure(console, action_label, result)
+
+    installed_tracker.update_status(folder, True)
+    if updating:
+        update_tracker.remove(folder)
+        update_tracker.save()
+    console.echo(f"{action_label} {app.app_name} complete.")
+    return EXIT_OK
+
+
+def cmd_uninstall(args, console):
+    """Uninstall an app."""
+    apps, _ = load_app_metadata()
+    app = _find_app(apps, args.app)
+    if app is None:
+        console.error(f"no app named '{args.app}'")
+        return EXIT_FAILED
+
+    installed_tracker = InstalledApps()
+    folder = app.folder_name
+    if not installed_tracker.is_installed(folder):
+        console.echo(f"{app.app_name} is not installed.")
+        return EXIT_OK
+
+    url = app.get("uninstall_url") or app.get("uninstall_script")
+    if not url:
+        console.error(f"no uninstall script available for {app.app_name}")
+        return EXIT_FAILED
+
+    console.echo(f"Uninstalling {app.app_name}...")
+    result = _run_script(console, app, url, "Uninstalling")
+    if result["outcome"] != "success":
+        return _report_failure(console, "Uninstalling", result)
+
+    installed_tracker.update_status(folder, False)
+    update_tracker = UpdateTracker()
+    if folder in update_tracker.pending:
+        update_tracker.remove(folder)
+        update_tracker.save()
+    console.echo(f"Uninstalling {app.app_name} complete.")
+    return EXIT_OK
+
+
+def cmd_status(args, console):
+    """Summarize the app store's local state."""
+    apps, categories = load_app_metadata()
+    installed = InstalledApps().apps
+    pending = UpdateTracker().pending
+    distro_config = DistroConfig()
+
+    console.echo(f"Apps available:   {len(apps)} in {len(categories)} categories")
+    console.echo(f"Installed:        {len(installed)}")
+    console.echo(f"Pending updates:  {len(pending)}")
+
+    last_check = get_store().last_refresh()
+    last_check = "never" if last_check is None else _format_time(last_check)
+    console.echo(f"Last update check: {last_check}")
+
+    try:
+        with open(APPSTORE_REFRESH_STATE_FILE, "r") as f:
+            if not json.load(f).get("complete", True):
+                console.echo("Refresh:          interrupted, resumes on next run")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if distro_config.distro_enabled and distro_config.selected_distro:
+        console.echo(
+            f"Distro:           {distro_config.selected_distro} "
+            f"({distro_config.selected_distro_type})"
+        )
+    else:
+        console.echo("Distro:           disabled")
+
+    count, size = cache_usage()
+    console.echo(f"Artifact cache:   {count} file(s), {size / (1024 * 1024):.1f} MiB")
+    return EXIT_OK
+
+
+# Entry point
+
+
+def build_parser():
+    """Return the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="termux-appstore-cli",
+        description="Browse, install and update Termux AppStore apps.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="show backend messages and script output",
+    )
+    parser.add_argument(
+        "--log-file",
+        action="store_true",
+        help=f"also write the full log to {LOG_FILE}",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("list", help="list apps")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--installed", action="store_true", help="installed apps only")
+    group.add_argument("--updates", action="store_true", help="apps with updates only")
+    p.add_argument("--category", help="apps in this category only")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("search", help="search apps")
+    p.add_argument("query", nargs="+")
+    p.add_argument("--fuzzy", action="store_true", help="tolerate typos")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("refresh", help="download fresh app data")
+    p.set_defaults(func=cmd_refresh)
+
+    p = sub.add_parser("check-updates", help="check installed apps for updates")
+    p.add_argument(
+        "--profile", action="store_true", help="print how long each stage took"
+    )
+    p.add_argument(
+        "--sync",
+        action="store_true",
+        help="sync the package lists even if they were synced recently",
+    )
+    p.set_defaults(func=cmd_check_updates)
+
+    p = sub.add_parser("install", help="install or update an app")
+    p.add_argument("app")
+    p.add_argument(
+        "--reinstall", action="store_true", help="run the installer even if installed"
+    )
+    p.set_defaults(func=cmd_install)
+
+    p = sub.add_parser("uninstall", help="uninstall an app")
+    p.add_argument("app")
+    p.set_defaults(func=cmd_uninstall)
+
+    p = sub.add_parser("status", help="show installed apps, updates and cache use")
+    p.set_defaults(func=cmd_status)
+
+    return parser
+
+
+def main(argv=None):
+    """Run the CLI.
+
+    Args:
+        argv: Arguments without the program name; defaults to
+            ``sys.argv[1:]``.
+
+    Returns:
+        int: Process exit status.
+    """
+    args = build_parser().parse_args(argv)
+    console = _Console(sys.stdout, sys.stderr, args.verbose)
+    setup_logging(
+        verbose=args.verbose,
+        console=args.verbose,
+        log_file=LOG_FILE if args.log_file else None,
+    )
+    try:
+        return args.func(args, console)
+    except KeyboardInterrupt:
+        console.error("interrupted")
+        return EXIT_CANCELLED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
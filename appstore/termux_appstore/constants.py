@@ -21,6 +21,8 @@ TERMUX_TMP = os.path.join(TERMUX_PREFIX, "tmp")
 APPSTORE_DIR = os.path.expanduser("~/.appstore")
 APPSTORE_LOGO_DIR = os.path.join(APPSTORE_DIR, "logo")
 APPSTORE_JSON = os.path.join(APPSTORE_DIR, "apps.json")
+APPSTORE_DB = os.path.join(APPSTORE_DIR, "state.db")
+# State files of earlier versions, imported into APPSTORE_DB
 APPSTORE_OLD_JSON_DIR = os.path.join(APPSTORE_DIR, "old_json")
 LAST_REFRESH_FILE = os.path.join(APPSTORE_DIR, "last_refresh")
 UPDATES_TRACKING_FILE = os.path.join(APPSTORE_DIR, "updates.json")
@@ -28,6 +30,26 @@ INSTALLED_APPS_FILE = os.path.join(APPSTORE_DIR, "installed_apps.json")
 LAST_VERSION_CHECK_FILE = os.path.join(APPSTORE_DIR, "last_version_check")
 SETTINGS_FILE = os.path.join(APPSTORE_DIR, "settings.json")
 
+APPSTORE_LOCK_DIR = os.path.join(APPSTORE_DIR, "locks")
+APPSTORE_SCRIPT_CACHE_DIR = os.path.join(APPSTORE_DIR, "scripts")
+APPSTORE_ARTIFACT_CACHE_DIR = os.path.join(APPSTORE_DIR, "cache")
+APPSTORE_STAGING_DIR = os.path.join(APPSTORE_DIR, "staging")
+APPSTORE_REFRESH_STATE_FILE = os.path.join(APPSTORE_DIR, "refresh_state.json")
+APPSTORE_METRICS_DIR = os.path.join(APPSTORE_DIR, "metrics")
+APPSTORE_LOG_DIR = os.path.join(APPSTORE_DIR, "logs")
+APPSTORE_REPO_SYNC_FILE = os.path.join(APPSTORE_DIR, "repo_sync.json")
+
+# Number of app cards (roughly one screenful) whose scripts are prefetched
+PREFETCH_VISIBLE_APPS = 12
+
+# Quiet time after the last package-database write before installed
+# state is re-read (dpkg rewrites its status file several times per run)
+PACKAGE_WATCH_DELAY_MS = 2000
+
+# Package lists synced less than this many seconds ago are not synced
+# again by "Check for Updates" (see the ``repo_sync_ttl_minutes`` setting)
+REPO_SYNC_TTL = 60 * 60
+
 GITHUB_APPS_JSON = "https://github.com/sabamdarif/Termux-AppStore/releases/download/apps_data/apps.json"
 GITHUB_LOGOS_ZIP = (
     "https://github.com/sabamdarif/Termux-AppStore/releases/download/logos/logos.zip"
@@ -44,10 +66,14 @@ ARCH_COMPATIBILITY = {
 
 DEFAULT_SETTINGS = {
     "use_terminal_for_progress": False,
+    "run_scripts_in_pty": True,
     "enable_auto_refresh": True,
     "show_command_output": False,
     "enable_fuzzy_search": False,
     "last_category": "All Apps",
+    "max_parallel_jobs": 3,
+    "artifact_cache_max_mb": 2048,
+    "repo_sync_ttl_minutes": 60,
 }
 
 TERMUX_REPOS = [
@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Logging setup for the window and the CLI.
+
+Modules log through ``logging.getLogger(__name__)``, below the
+``termux_appstore`` logger, with ``%``-style arguments so that a message
+below the active level is never formatted.  Per-app detail (each app
+the catalog filter keeps or drops, each package found installed, whole
+update dicts) is logged at DEBUG; :func:`setup_logging` shows INFO and
+above unless asked to be verbose, and can also keep everything in a
+rotating file.
+"""
+
+import logging
+import logging.handlers
+import os
+import sys
+
+from termux_appstore.constants import APPSTORE_LOG_DIR
+
+LOG_FILE = os.path.join(APPSTORE_LOG_DIR, "appstore.log")
+# Size at which the file is rolled over, and how many old files to keep
+MAX_FILE_BYTES = 1024 * 1024
+KEEP_FILES = 3
+
+CONSOLE_FORMAT = "%(levelname)s %(name)s: %(message)s"
+FILE_FORMAT = (
+    "%(asctime)s %(process)d %(threadName)s %(levelname)s %(name)s: %(message)s"
+)
+
+
+def setup_logging(verbose=False, console=True, log_file=None):
+    """Configure the ``termux_appstore`` logger.
+
+    Args:
+        verbose: Show DEBUG messages on the console, not just INFO and
+            above.
+        console: Log to stderr at all.
+        log_file: Also log everything, DEBUG included, to this file,
+            rolled over at :data:`MAX_FILE_BYTES`.
+
+    Returns:
+        logging.Logger: The package logger.
+    """
+    logger = logging.getLogger("termux_appstore")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG if verbose or log_file else logging.INFO)
+
+    if console:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setLevel(logging.DEBUG if verbose else logging.INFO)
+        handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        logger.addHandler(handler)
+    else:
+        logger.addHandler(logging.NullHandler())
+
+    if log_file:
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=MAX_FILE_BYTES, backupCount=KEEP_FILES
+            )
+        except OSError as e:
+            logger.error("Could not open log file %s: %s", log_file, e)
+        else:
+            handler.setFormatter(logging.Formatter(FILE_FORMAT))
+            logger.addHandler(handler)
+    return logger
@@ -4,18 +4,82 @@
 
 Usage::
 
-    python3 -m termux_appstore.main
+    python3 -m termux_appstore.main [--verbose] [--log-file]
+    python3 -m termux_appstore.main --profile-refresh
+
+``--profile-refresh`` runs one full update check without the UI and
+prints how long each stage took.  ``--verbose`` logs per-app detail
+(apps filtered out, packages found, version comparisons), and
+``--log-file`` also keeps the full log in ``~/.appstore/logs``.
 """
 
 import sys
 
-from termux_appstore.application import AppStoreApplication
+# Options handled here rather than by Gtk.Application
+_LOG_OPTIONS = ("-v", "--verbose", "--log-file")
+
+
+def profile_refresh():
+    """Run the update-check pipeline headlessly and print its timings.
+
+    Returns:
+        int: Process exit status.
+    """
+    from termux_appstore.backend.distro import DistroConfig
+    from termux_appstore.backend.installed_apps import InstalledApps
+    from termux_appstore.backend.pipeline import PipelineError
+    from termux_appstore.backend.refresh import (
+        record_refresh_timestamp,
+        run_refresh_pipeline,
+    )
+    from termux_appstore.backend.store import UPDATE_CHECK
+    from termux_appstore.backend.updates import UpdateTracker
+    from termux_appstore.metrics import METRICS_FILE, collect, format_summary
+
+    distro_config = DistroConfig()
+    distro = distro_config.selected_distro if distro_config.distro_enabled else None
+    update_tracker = UpdateTracker()
+
+    ctx = None
+    with collect() as records:
+        try:
+            ctx = run_refresh_pipeline(
+                InstalledApps().apps,
+                distro=distro,
+                distro_config=distro_config,
+                check_updates=True,
+            )
+        except PipelineError as e:
+            print(f"Update check failed: {e}")
+
+    if ctx is not None:
+        for folder, ver in ctx["new_updates"].items():
+            update_tracker.add(folder, ver)
+        update_tracker.save()
+        record_refresh_timestamp(UPDATE_CHECK)
+
+    print()
+    print(format_summary(records))
+    print(f"\nMetrics log: {METRICS_FILE}")
+    return 0 if ctx is not None else 1
 
 
 def main():
     """Launch the application."""
+    from termux_appstore.log import LOG_FILE, setup_logging
+
+    args = sys.argv[1:]
+    setup_logging(
+        verbose="-v" in args or "--verbose" in args,
+        log_file=LOG_FILE if "--log-file" in args else None,
+    )
+    if "--profile-refresh" in args:
+        return profile_refresh()
+
+    from termux_appstore.application import AppStoreApplication
+
     app = AppStoreApplication()
-    return app.run(sys.argv)
+    return app.run([sys.argv[0]] + [a for a in args if a not in _LOG_OPTIONS])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Lightweight timing spans for the background pipelines.
+
+Usage::
+
+    from termux_appstore.metrics import add_bytes, span
+
+    with span("refresh.download"):
+        ...
+        add_bytes(size)
+
+    with span("packages.native", app="firefox"):
+        ...
+
+A span records its monotonic duration, the number of subprocesses its
+thread started while it was open (counted with an audit hook, so callers
+need no wrappers) and the bytes reported through :func:`add_bytes`.
+Counts roll up into every enclosing span.  Finished spans are appended
+to a rolling JSONL file in ``APPSTORE_METRICS_DIR``; the spans of one
+pipeline run share a ``trace`` id.
+"""
+
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from termux_appstore.constants import APPSTORE_METRICS_DIR
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.path.join(APPSTORE_METRICS_DIR, "metrics.jsonl")
+# Size at which the file is rolled over, and how many old files to keep
+MAX_FILE_BYTES = 1024 * 1024
+KEEP_FILES = 3
+
+_local = threading.local()
+_ids = itertools.count(1)
+_write_lock = threading.Lock()
+_collectors = []
+_hook_installed = False
+
+
+class Span:
+    """An open span; yielded by :func:`span`."""
+
+    __slots__ = (
+        "id",
+        "trace",
+        "parent",
+        "name",
+        "attrs",
+        "start",
+        "subprocesses",
+        "bytes",
+    )
+
+    def __init__(self, name, attrs, parent):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.trace = parent.trace if parent is not None else self.id
+        self.parent = parent.id if parent is not None else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.monotonic()
+        self.subprocesses = 0
+        self.bytes = 0
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _audit(event, args):
+    if event == "subprocess.Popen":
+        for s in getattr(_local, "stack", ()):
+            s.subprocesses += 1
+
+
+def _install_hook():
+    global _hook_installed
+    if not _hook_installed:
+        # Audit hooks cannot be removed; one hook serves every span.
+        sys.addaudithook(_audit)
+        _hook_installed = True
+
+
+def add_bytes(count):
+    """Add *count* transferred bytes to the spans open on this thread."""
+    for s in _stack():
+        s.bytes += count
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block of work.
+
+    Args:
+        name: Span name, e.g. ``"refresh.download"``.
+        **attrs: Extra JSON-serializable fields, e.g. ``app="firefox"``.
+
+    Yields:
+        Span: The open span.
+    """
+    _install_hook()
+    stack = _stack()
+    s = Span(name, attrs, stack[-1] if stack else None)
+    stack.append(s)
+    ok = False
+    try:
+        yield s
+        ok = True
+    finally:
+        stack.pop()
+        record = {
+            "ts": round(time.time(), 3),
+            "trace": s.trace,
+            "span": s.id,
+            "parent": s.parent,
+            "name": name,
+            **attrs,
+            "duration": round(time.monotonic() - s.start, 4),
+            "subprocesses": s.subprocesses,
+            "bytes": s.bytes,
+            "ok": ok,
+        }
+        _emit(record)
+
+
+@contextmanager
+def collect():
+    """Also gather the records finished inside the block into a list.
+
+    Yields:
+        list: Records (dicts), appended as spans finish on any thread.
+    """
+    records = []
+    _collectors.append(records)
+    try:
+        yield records
+    finally:
+        _collectors.remove(records)
+
+
+def _emit(record):
+    line = json.dumps(record) + "\n"
+    with _write_lock:
+        for records in _collectors:
+            records.append(record)
+        try:
+            os.makedirs(APPSTORE_METRICS_DIR, exist_ok=True)
+            try:
+                size = os.path.getsize(METRICS_FILE)
+            except OSError:
+                size = 0
+            if size and size + len(line) > MAX_FILE_BYTES:
+                _rotate()
+            with open(METRICS_FILE, "a") as f:
+                f.write(line)
+        except OSError as e:
+            logger.error("Could not write metrics: %s", e)
+
+
+def _rotate():
+    """``metrics.jsonl`` → ``metrics.1.jsonl`` → ... → dropped."""
+    base, ext = os.path.splitext(METRICS_FILE)
+    for i in range(KEEP_FILES, 0, -1):
+        older = f"{base}.{i}{ext}"
+        if not os.path.exists(older):
+            continue
+        if i == KEEP_FILES:
+            os.remove(older)
+        else:
+            os.replace(older, f"{base}.{i + 1}{ext}")
+    os.replace(METRICS_FILE, f"{base}.1{ext}")
+
+
+# Reporting
+
+
+def summarize(records):
+    """Aggregate *records* by span name, ignoring per-app spans.
+
+    Returns:
+        list[dict]: ``name``, ``count``, ``total``, ``max``,
+        ``subprocesses`` and ``bytes`` per name, slowest first.
+    """
+    totals = {}
+    for r in records:
+        if "app" in r:
+            continue
+        t = totals.setdefault(
+            r["name"],
+            {
+                "name": r["name"],
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "subprocesses": 0,
+                "bytes": 0,
+            },
+        )
+        t["count"] += 1
+        t["total"] += r["duration"]
+        t["max"] = max(t["max"], r["duration"])
+        t["subprocesses"] += r["subprocesses"]
+        t["bytes"] += r["bytes"]
+    return sorted(totals.values(), key=lambda t: t["total"], reverse=True)
+
+
+def format_summary(records, top_apps=10):
+    """Return a plain-text table of *records* for the terminal.
+
+    Args:
+        records: Span records, e.g. from :func:`collect`.
+        top_apps: Number of slowest per-app spans to list.
+
+    Returns:
+        str: The table.
+    """
+    lines = [
+        f"{'Stage':<28} {'Count':>5} {'Total s':>9} {'Max s':>8} "
+        f"{'Procs':>6} {'KiB':>9}"
+    ]
+    for t in summarize(records):
+        lines.append(
+            f"{t['name']:<28} {t['count']:>5} {t['total']:>9.2f} {t['max']:>8.2f} "
+            f"{t['subprocesses']:>6} {t['bytes'] / 1024:>9.1f}"
+        )
+
+    apps = sorted(
+        (r for r in records if "app" in r), key=lambda r: r["duration"], reverse=True
+    )
+    if apps:
+        lines += ["", f"{'Slowest apps':<28} {'Stage':<20} {'Time s':>8} {'Procs':>6}"]
+        for r in apps[:top_apps]:
+            lines.append(
+                f"{r['app']:<28} {r['name']:<20} {r['duration']:>8.2f} "
+                f"{r['subprocesses']:>6}"
+            )
+    return "\n".join(lines)
@@ -9,21 +9,36 @@ Usage::
         parse_progress_line,
         ProgressEngine,
         run_script_with_progress,
+        execute_script,
+        LogSink,
+        JobScheduler,
     )
+
+Names are imported on first use, so the GTK-free parts (``execute_script``,
+``ProgressEngine``, ``JobScheduler``) can be used without loading GTK.
 """
 
-from termux_appstore.tasks.progress import ProgressEngine
-from termux_appstore.tasks.script_executor import run_script_with_progress
-from termux_appstore.tasks.task_manager import (
-    create_progress_dialog,
-    parse_progress_line,
-    update_terminal,
-)
-
-__all__ = [
-    "create_progress_dialog",
-    "update_terminal",
-    "parse_progress_line",
-    "ProgressEngine",
-    "run_script_with_progress",
-]
+import importlib
+
+_EXPORTS = {
+    "create_progress_dialog": "task_manager",
+    "update_terminal": "task_manager",
+    "parse_progress_line": "task_manager",
+    "run_script_with_progress": "task_manager",
+    "ProgressEngine": "progress",
+    "execute_script": "script_executor",
+    "LogSink": "log_sink",
+    "Job": "scheduler",
+    "JobScheduler": "scheduler",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Background log writer for continuous terminal logging.
+
+``LogSink`` owns the log file and a daemon writer thread.  The GTK
+thread only enqueues raw text; ANSI stripping, writing, flushing and
+size-based rotation all happen on the writer thread so big installs
+don't add syscalls to the UI loop.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from termux_appstore.terminal.ansi_parser import AnsiColorParser
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LogSink:
+    """Write terminal output to a file from a dedicated thread.
+
+    Args:
+        path: Log file path (truncated on open).
+        max_bytes: Rotate once the current file grows past this size.
+            ``0`` disables rotation.
+        backup_count: Number of rotated files to keep (``path.1`` …).
+        flush_interval: Seconds between timed flushes.
+        flush_lines: Flush early once this many newlines are pending.
+        queue_size: Maximum number of queued chunks.  When the queue is
+            full new chunks are dropped and a marker is written instead,
+            so the UI thread never blocks on disk I/O.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes=8 * 1024 * 1024,
+        backup_count=2,
+        flush_interval=1.0,
+        flush_lines=64,
+        queue_size=2048,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.flush_lines = flush_lines
+        self.error = None
+
+        self._ansi_pattern = AnsiColorParser.ANSI_ESCAPE_PATTERN
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._dropped = 0
+        self._closed = False
+        self._file = open(path, "w")
+        self._written = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="appstore-log-sink", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def active(self):
+        """``True`` while the sink accepts writes."""
+        return not self._closed and self.error is None
+
+    def write(self, text):
+        """Queue *text* for writing.  Never blocks.
+
+        Returns:
+            bool: ``False`` when the sink is closed or has failed.
+        """
+        if not text:
+            return self.active
+        if not self.active:
+            return False
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self._dropped += len(text)
+        return True
+
+    def close(self, footer=None, timeout=2.0):
+        """Flush pending output, append *footer* and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.error is None:
+            try:
+                if footer:
+                    self._queue.put(footer, timeout=timeout)
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+        self._thread.join(timeout)
+
+    # Writer thread
+
+    def _run(self):
+        pending_lines = 0
+        dirty = False
+        last_flush = time.monotonic()
+
+        try:
+            while True:
+                wait = self.flush_interval - (time.monotonic() - last_flush)
+                try:
+                    item = self._queue.get(timeout=max(0.05, wait))
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    break
+
+                if item is not None:
+                    if self._dropped:
+                        dropped, self._dropped = self._dropped, 0
+                        self._write(f"\n[... {dropped} characters dropped ...]\n")
+                    text = self._ansi_pattern.sub("", item)
+                    self._write(text)
+                    pending_lines += text.count("\n")
+                    dirty = True
+
+                now = time.monotonic()
+                if dirty and (
+                    pending_lines >= self.flush_lines
+                    or now - last_flush >= self.flush_interval
+                ):
+                    self._file.flush()
+                    pending_lines = 0
+                    dirty = False
+                    last_flush = now
+        except Exception as e:
+            logger.error("Error writing log file %s: %s", self.path, e)
+            self.error = e
+        finally:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+
+    def _write(self, text):
+        if self.max_bytes and self._written >= self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._written += len(text)
+
+    def _rotate(self):
+        """Shift ``path`` → ``path.1`` → ``path.2`` … and reopen."""
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w")
+        self._written = 0
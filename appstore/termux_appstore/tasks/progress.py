@@ -8,7 +8,8 @@ priority order — the first layer that matches wins.
 Layer 1: Explicit ``__PROGRESS__`` / ``__PHASE__`` / ``__DONE__`` /
          ``__ERROR__`` tokens emitted by instrumented bash functions.
 Layer 2: Tool-specific structured output (dpkg ``pmstatus:``,
-         aria2c ``(N%)``, wget ``N%``).
+         aria2c ``(N%)``, wget ``N%``, and the live progress bars
+         aria2c / wget / apt draw when attached to a tty).
 Layer 3: Keyword heuristics (Downloading, Unpacking, Setting up, …).
 Layer 4: Time-based heartbeat drift (slow progress so the bar
          never completely freezes).
@@ -87,9 +88,74 @@ KEYWORD_RULES = [
 ]
 
 
-RE_DPKG_PMSTATUS = re.compile(r"^(pmstatus|dlstatus|pmerror):([^:]+):([0-9.]+):(.+)$")
-RE_ARIA2C = re.compile(r"\(([0-9]+)%\)")
-RE_WGET = re.compile(r"\s+([0-9]+)%\s+\S+\s+")
+# TTY-mode output (scripts run under a PTY).  Cursor movement and colour
+# escapes are stripped before matching.
+RE_TTY_ESCAPE = re.compile(r"\x1b(?:\[[0-9;?]*[ -/]*[@-~]|\][^\x07]*\x07|[78=>])")
+
+# Layer 2 — every structured format in one pattern.  Alternatives are
+# tried in priority order at the start of the line; the unanchored ones
+# sit in a lookahead so an earlier rule always wins over a later one,
+# whatever their position in the line.  Exactly one ``kind_*`` group is
+# set on a match.
+STRUCTURED_RULES = (
+    # dpkg/apt status-fd  pmstatus:pkg:42.5:Unpacking pkg
+    (
+        "kind_pmstatus",
+        r"(?P<pm_kind>pmstatus|dlstatus|pmerror):[^:]+:(?P<pm_pct>[0-9.]+):"
+        r"(?P<pm_desc>.+)$",
+    ),
+    # aria2c (tty)  [#2089b0 14MiB/187MiB(7%) CN:16 DL:1.2MiB ETA:2m]
+    (
+        "kind_aria2c_tty",
+        r"(?=.*?(?P<aria_done>[0-9.]+[KMGT]?i?B)/(?P<aria_total>[0-9.]+[KMGT]?i?B)"
+        r"\((?P<aria_pct>[0-9]+)%\)(?:.*?DL:(?P<aria_speed>[0-9.]+[KMGT]?i?B))?)",
+    ),
+    # wget (tty)  app.AppImage  45%[=======>      ]  12.3M  1.2MB/s  eta 10s
+    (
+        "kind_wget_tty",
+        r"(?=.*?(?P<wbar_pct>[0-9]+)%\[[=> ]*\]\s+(?P<wbar_done>[0-9.,]+[KMGT]?)"
+        r"\s+(?P<wbar_speed>[0-9.,]+[KMGT]?B/s))",
+    ),
+    # apt (tty)  Progress: [ 42%] [#########.........]
+    ("kind_apt_progress", r"Progress: \[\s*(?P<aptp_pct>[0-9]+)%\]"),
+    # apt (tty)  42% [3 libfoo 1,234 kB/5,678 kB 21%]
+    ("kind_apt_fetch", r"(?P<aptf_pct>[0-9]+)% \["),
+    # aria2c (pipe)  ... (7%) ... MiB
+    ("kind_aria2c", r"(?=.*?MiB)(?=.*?\((?P<aria2_pct>[0-9]+)%\))"),
+    # wget (pipe)  "     14K  14%  123KB/s"
+    (
+        "kind_wget",
+        r"(?=.*?(?:KB/s|MB/s))(?=.*?\s(?P<wget_pct>[0-9]+)%\s+\S+\s)",
+    ),
+)
+RE_STRUCTURED = re.compile(
+    "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in STRUCTURED_RULES)
+)
+STRUCTURED_KINDS = tuple(kind for kind, _ in STRUCTURED_RULES)
+PMSTATUS_PREFIXES = ("pmstatus:", "dlstatus:", "pmerror:")
+
+
+def _compile_keyword_dispatch(rules):
+    """Fold :data:`KEYWORD_RULES` into one regex matched at line start.
+
+    Anchored rules become plain alternatives; unanchored ones are wrapped
+    in a lookahead so the first rule in list order wins, exactly as the
+    sequential scan did.  ``match.lastgroup`` is ``"k<index>"``.
+    """
+    parts = []
+    for i, (pattern, _, _) in enumerate(rules):
+        src = pattern.pattern
+        if src.startswith("^"):
+            parts.append(f"(?P<k{i}>{src[1:]})")
+        else:
+            parts.append(f"(?=.*?(?P<k{i}>{src}))")
+    return re.compile("|".join(parts), re.I)
+
+
+RE_KEYWORDS = _compile_keyword_dispatch(KEYWORD_RULES)
+KEYWORD_DISPATCH = {
+    f"k{i}": (phase, bump) for i, (_, phase, bump) in enumerate(KEYWORD_RULES)
+}
 
 
 PHASE_LABELS = {
@@ -104,7 +170,7 @@ PHASE_LABELS = {
     "finalize": "Finishing up",
 }
 
-PROGRESS_TOKENS = ("__PROGRESS__", "__PHASE__", "__DONE__", "__ERROR__")
+PROGRESS_TOKENS = ("__PROGRESS__", "__PHASE__", "__DONE__", "__ERROR__", "__CACHE__")
 
 
 @dataclass
@@ -116,11 +182,17 @@ class ProgressEngine:
         operation:  ``"install"`` | ``"uninstall"`` | ``"update"``
         app_type:   ``"native"`` | ``"distro"`` | ``"appimage"``
         script_type: ``"repo"`` | ``"download"`` | ``""`` (auto-detect)
+        tty:        ``True`` when the script runs under a PTY.  Escape
+                    sequences are stripped before parsing and heartbeat
+                    drift is disabled, since tools report real progress.
+        cache_hits / cache_misses: File names ``download_file`` served
+                    from / added to the artifact cache (``__CACHE__``).
     """
 
     operation: str
     app_type: str = "native"
     script_type: str = ""
+    tty: bool = False
 
     current_fraction: float = field(default=0.0, init=False)
     current_message: str = field(default="Starting...", init=False)
@@ -129,6 +201,8 @@ class ProgressEngine:
     _last_token_time: float = field(default_factory=time.time, init=False)
     is_done: bool = field(default=False, init=False)
     has_error: bool = field(default=False, init=False)
+    cache_hits: list = field(default_factory=list, init=False)
+    cache_misses: list = field(default_factory=list, init=False)
 
     def __post_init__(self):
         self._phase_map = self._select_phase_map()
@@ -187,7 +261,7 @@ class ProgressEngine:
         Max drift: 0.3 %/s, never past 2 % below phase ceiling.
         Stops drifting if a token arrived in the last 2 seconds.
         """
-        if self.is_done or self.has_error:
+        if self.is_done or self.has_error or self.tty:
             return
         elapsed = time.time() - self._last_token_time
         if elapsed < 2.0:
@@ -207,18 +281,55 @@ class ProgressEngine:
         if not line:
             return self.current_fraction, self.current_message
 
+        if self.tty and "\x1b" in line:
+            line = RE_TTY_ESCAPE.sub("", line)
         stripped = line.strip()
 
+        # Cheap pre-checks decide which layers can possibly match, so the
+        # common apt/dnf/pacman line costs a single regex match.
+        if "__" in stripped and self._process_token(stripped):
+            return self.current_fraction, self.current_message
+
+        if "%" in stripped or stripped.startswith(PMSTATUS_PREFIXES):
+            m = RE_STRUCTURED.match(stripped)
+            if m:
+                self._apply_structured(m)
+                return self.current_fraction, self.current_message
+
+        m = RE_KEYWORDS.match(stripped)
+        if m:
+            phase_hint, bump = KEYWORD_DISPATCH[m.lastgroup]
+            self._apply_heuristic_bump(phase_hint, bump)
+            # Use line text as message if it's informative enough
+            if len(stripped) > 10:
+                self.current_message = stripped[:80]
+
+        return self.current_fraction, self.current_message
+
+    def _process_token(self, stripped: str) -> bool:
+        """Layer 1 — explicit protocol tokens.
+
+        Returns ``True`` when the line was consumed.
+        """
         if "__DONE__" in stripped:
             self._set_fraction(1.0, "Complete")
             self.is_done = True
-            return 1.0, "Complete"
+            return True
 
         if "__ERROR__" in stripped:
             msg = stripped.split("__ERROR__", 1)[-1].strip().lstrip("|").strip()
             self.current_message = f"Error: {msg}" if msg else "Error occurred"
             self.has_error = True
-            return self.current_fraction, self.current_message
+            return True
+
+        if "__CACHE__" in stripped:
+            data = stripped.split("__CACHE__", 1)[-1].strip()
+            kind, _, name = data.partition("|")
+            if kind == "hit":
+                self.cache_hits.append(name)
+            elif kind == "miss":
+                self.cache_misses.append(name)
+            return True
 
         if "__PROGRESS__" in stripped:
             try:
@@ -240,7 +351,7 @@ class ProgressEngine:
                 # Never go past 0.98 (reserve final 2% for __DONE__)
                 new_f = min(0.98, pct / 100.0)
                 self._set_fraction(new_f, msg or self.current_message)
-                return self.current_fraction, self.current_message
+                return True
             except Exception:
                 pass
 
@@ -250,51 +361,75 @@ class ProgressEngine:
                 data = data.strip().lstrip("|").strip()
                 parts = data.split("|", 2)
                 phase = parts[0].strip().lower()
-                pct_in_ph = float(parts[1].strip()) if len(parts) > 1 else 0.0
+                pct_str = parts[1].strip() if len(parts) > 1 else "0"
+                if "/" in pct_str:
+                    # Byte counts, e.g. from the download helper.
+                    curr, tot = map(int, pct_str.split("/"))
+                    pct_in_ph = (curr / max(1, tot)) * 100.0
+                else:
+                    pct_in_ph = float(pct_str)
                 msg = parts[2].strip() if len(parts) > 2 else ""
                 new_f = self._fraction_from_phase_pct(phase, pct_in_ph)
                 self.current_phase = phase
                 self._set_fraction(new_f, msg or self.current_message)
-                return self.current_fraction, self.current_message
+                return True
             except Exception:
                 pass
 
-        m = RE_DPKG_PMSTATUS.match(stripped)
-        if m:
-            kind = m.group(1)
-            pct = float(m.group(3))
-            desc = m.group(4).strip()
-            phase = "download" if kind == "dlstatus" else "install"
-            new_f = self._fraction_from_phase_pct(phase, pct)
-            self.current_phase = phase
-            self._set_fraction(new_f, desc)
-            return self.current_fraction, self.current_message
+        return False
 
-        # aria2c  [#abc 14MiB/187MiB(7%) ...]
-        m = RE_ARIA2C.search(stripped)
-        if m and "MiB" in stripped:
-            pct = float(m.group(1))
-            new_f = self._fraction_from_phase_pct("download", pct)
-            self._set_fraction(new_f, f"Downloading... ({int(pct)}%)")
-            return self.current_fraction, self.current_message
-
-        # wget  "     14K  14%  123KB/s"
-        m = RE_WGET.search(stripped)
-        if m and ("KB/s" in stripped or "MB/s" in stripped):
-            pct = float(m.group(1))
-            new_f = self._fraction_from_phase_pct("download", pct)
-            self._set_fraction(new_f, f"Downloading... ({int(pct)}%)")
-            return self.current_fraction, self.current_message
+    def _apply_structured(self, m):
+        """Layer 2 — apply a :data:`RE_STRUCTURED` match."""
+        kind = next(k for k in STRUCTURED_KINDS if m.group(k) is not None)
 
-        for pattern, phase_hint, bump in KEYWORD_RULES:
-            if pattern.search(stripped):
-                self._apply_heuristic_bump(phase_hint, bump)
-                # Use line text as message if it's informative enough
-                if len(stripped) > 10:
-                    self.current_message = stripped[:80]
-                break
-
-        return self.current_fraction, self.current_message
+        if kind == "kind_pmstatus":
+            pct = float(m.group("pm_pct"))
+            phase = "download" if m.group("pm_kind") == "dlstatus" else "install"
+            self.current_phase = phase
+            self._set_fraction(
+                self._fraction_from_phase_pct(phase, pct),
+                m.group("pm_desc").strip(),
+            )
+        elif kind == "kind_aria2c_tty":
+            pct = m.group("aria_pct")
+            msg = (
+                f"Downloading... {m.group('aria_done')}/{m.group('aria_total')} "
+                f"({pct}%)"
+            )
+            if m.group("aria_speed"):
+                msg += f" at {m.group('aria_speed')}/s"
+            self.current_phase = "download"
+            self._set_fraction(
+                self._fraction_from_phase_pct("download", float(pct)), msg
+            )
+        elif kind == "kind_wget_tty":
+            pct = m.group("wbar_pct")
+            self.current_phase = "download"
+            self._set_fraction(
+                self._fraction_from_phase_pct("download", float(pct)),
+                f"Downloading... {m.group('wbar_done')} ({pct}%) "
+                f"at {m.group('wbar_speed')}",
+            )
+        elif kind == "kind_apt_progress":
+            pct = m.group("aptp_pct")
+            self.current_phase = "install"
+            self._set_fraction(
+                self._fraction_from_phase_pct("install", float(pct)),
+                f"Installing packages... ({pct}%)",
+            )
+        elif kind == "kind_apt_fetch":
+            pct = m.group("aptf_pct")
+            self.current_phase = "download"
+            self._set_fraction(
+                self._fraction_from_phase_pct("download", float(pct)),
+                f"Fetching packages... ({pct}%)",
+            )
+        else:
+            pct = float(m.group("aria2_pct" if kind == "kind_aria2c" else "wget_pct"))
+            self._set_fraction(
+                self._fraction_from_phase_pct("download", pct),
+                f"Downloading... ({int(pct)}%)",
+            )
 
     def script_downloaded(self):
         """Call after install.sh downloaded successfully."""
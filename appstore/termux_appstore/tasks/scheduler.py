@@ -0,0 +1,233 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Job scheduler for install, update and uninstall operations.
+
+Jobs are queued in submission order and run on worker threads, up to
+``max_workers`` at a time.  Each job names the resources it needs for
+its whole run (``"app:<folder_name>"`` for script jobs); two jobs that
+share a resource never run together, and a blocked job does not hold
+up the ones behind it.  Finer-grained exclusion — one script at a time
+inside apt/dpkg/pacman or a distro — is handled by the package-manager
+locks in :mod:`termux_appstore.backend.locks`, so downloads of queued
+installs overlap.
+
+No GTK imports — listeners are called from worker threads and must
+marshal to the main loop themselves.
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    """A unit of work owned by a :class:`JobScheduler`.
+
+    The job body receives the ``Job`` and reports through
+    :meth:`update`; it checks :attr:`cancel_requested` to stop early.
+    It returns ``True`` on success, ``False`` (optionally after setting
+    :attr:`error`) on failure.
+
+    Attributes:
+        id: Unique integer id.
+        title: Human-readable title, e.g. ``"Installing Firefox"``.
+        resources: ``frozenset`` of resource names held while running.
+        state: One of ``queued``, ``running``, ``done``, ``failed``,
+            ``cancelled``.
+        fraction: Progress in ``[0, 1]``.
+        message: Latest status line.
+        error: Failure reason, if any.
+        log_lines: Full output transcript, for the log viewer.
+        result: Free-form value set by the job body.
+    """
+
+    def __init__(self, title, func, resources=()):
+        self.id = next(_job_ids)
+        self.title = title
+        self.resources = frozenset(resources)
+        self.state = QUEUED
+        self.fraction = 0.0
+        self.message = "Waiting..."
+        self.error = ""
+        self.log_lines = []
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._func = func
+        self._cancel = threading.Event()
+        self._scheduler = None
+
+    @property
+    def cancel_requested(self):
+        """``True`` once :meth:`JobScheduler.cancel` was called."""
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def update(self, fraction=None, message=None):
+        """Report progress from the job body."""
+        if fraction is not None:
+            self.fraction = max(0.0, min(1.0, fraction))
+        if message is not None:
+            self.message = message
+        if self._scheduler is not None:
+            self._scheduler._notify(self)
+
+
+class JobScheduler:
+    """Run :class:`Job` objects concurrently with resource exclusion.
+
+    Args:
+        max_workers: Maximum number of jobs running at once.
+        on_change: Optional ``(job) -> None`` listener, called from the
+            thread that changed the job.
+    """
+
+    def __init__(self, max_workers=3, on_change=None):
+        self.max_workers = max(1, int(max_workers))
+        self._listeners = [on_change] if on_change else []
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._held = set()
+        self._running = 0
+        self._shutdown = False
+
+    def add_listener(self, callback):
+        """Register another ``(job) -> None`` change listener."""
+        self._listeners.append(callback)
+
+    def submit(self, title, func, resources=()):
+        """Queue ``func(job)`` and return the new :class:`Job`."""
+        job = Job(title, func, resources)
+        job._scheduler = self
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("scheduler is shut down")
+            self._jobs.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        """Cancel *job*: drop it if queued, signal it if running."""
+        with self._lock:
+            if job.finished:
+                return
+            job._cancel.set()
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.message = "Cancelled"
+                job.finished_at = time.time()
+            else:
+                job.message = "Cancelling..."
+        self._notify(job)
+        self._dispatch()
+
+    def jobs(self):
+        """Return a snapshot list of all known jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs)
+
+    def find(self, resource):
+        """Return the unfinished job holding or waiting on *resource*."""
+        with self._lock:
+            for job in self._jobs:
+                if not job.finished and resource in job.resources:
+                    return job
+        return None
+
+    @property
+    def busy(self):
+        """``True`` while any job is queued or running."""
+        with self._lock:
+            return any(not job.finished for job in self._jobs)
+
+    def clear_finished(self):
+        """Forget finished jobs."""
+        with self._lock:
+            self._jobs = [job for job in self._jobs if not job.finished]
+
+    def shutdown(self):
+        """Cancel everything and stop starting new jobs."""
+        with self._lock:
+            self._shutdown = True
+            pending = [job for job in self._jobs if not job.finished]
+        for job in pending:
+            self.cancel(job)
+
+    # Internals
+
+    def _dispatch(self):
+        """Start every queued job whose resources are free."""
+        to_start = []
+        with self._lock:
+            if self._shutdown:
+                return
+            for job in self._jobs:
+                if self._running >= self.max_workers:
+                    break
+                if job.state != QUEUED or job.resources & self._held:
+                    continue
+                job.state = RUNNING
+                job.started_at = time.time()
+                job.message = "Starting..."
+                self._held |= job.resources
+                self._running += 1
+                to_start.append(job)
+
+        for job in to_start:
+            self._notify(job)
+            threading.Thread(
+                target=self._run,
+                args=(job,),
+                name=f"appstore-job-{job.id}",
+                daemon=True,
+            ).start()
+
+    def _run(self, job):
+        try:
+            ok = job._func(job)
+        except Exception as e:
+            logger.error("Job '%s' crashed: %s", job.title, e)
+            job.error = str(e)
+            ok = False
+
+        with self._lock:
+            if job.cancel_requested:
+                job.state = CANCELLED
+                job.message = "Cancelled"
+            elif ok:
+                job.state = DONE
+                job.fraction = 1.0
+            else:
+                job.state = FAILED
+                if job.error:
+                    job.message = job.error
+            job.finished_at = time.time()
+            self._held -= job.resources
+            self._running -= 1
+
+        self._notify(job)
+        self._dispatch()
+
+    def _notify(self, job):
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error("Job listener error: %s", e)
@@ -2,291 +2,441 @@
 """Script execution engine with real-time progress tracking.
 
 Handles download → detect → run → progress → cleanup lifecycle
-for install/uninstall/update scripts.
+for install/uninstall/update scripts.  Nothing here touches GTK: the
+progress dialog glue lives in :mod:`termux_appstore.tasks.task_manager`
+and the command-line front end drives :func:`execute_script` directly.
 """
 
+import codecs
+import fcntl
+import logging
 import os
+import pty
+import selectors
 import signal
 import stat
+import struct
 import subprocess
-import threading
+import sys
+import termios
 import time
 
-import gi
-
-gi.require_version("Gtk", "3.0")
-from gi.repository import GLib, Gtk  # type: ignore # noqa: E402
+from termux_appstore.backend import commands, downloader
+from termux_appstore.backend.artifact_cache import prune_artifact_cache
+from termux_appstore.backend.script_runner import (
+    download_script,
+    prepare_script,
+    script_sha256,
+)
+from termux_appstore.constants import (
+    APPSTORE_ARTIFACT_CACHE_DIR,
+    APPSTORE_LOCK_DIR,
+    DEFAULT_SETTINGS,
+)
+from termux_appstore.tasks.progress import ProgressEngine
+
+logger = logging.getLogger(__name__)
+
+# Output pump tuning: bytes per read, how often the loop wakes up to check
+# for cancellation, and how often the progress heartbeat runs.
+READ_CHUNK = 64 * 1024
+POLL_INTERVAL = 0.2
+HEARTBEAT_INTERVAL = 0.5
+
+# Fixed window size for the PTY backend.  Wide enough that aria2c, wget
+# and apt keep their progress bars on a single line.
+PTY_ROWS = 24
+PTY_COLUMNS = 120
+
+
+def _terminate(process, grace=3.0):
+    """Stop *process* and its process group: SIGTERM, then SIGKILL."""
+    try:
+        pgid = os.getpgid(process.pid)
+    except Exception:
+        return
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            os.killpg(pgid, signal.SIGKILL)
+            process.wait(timeout=1)
+    except Exception as e:
+        logger.error("Error stopping process: %s", e)
 
-from termux_appstore.backend.script_runner import download_script
-from termux_appstore.tasks.progress import PHASE_LABELS, ProgressEngine
-from termux_appstore.tasks.task_manager import update_terminal
 
+def _spawn_script(script_file, env, use_pty):
+    """Start ``bash script_file`` in its own session.
 
-def _show_failure(progress_dialog, action_label, log_lines, exit_code, reason):
-    """Switch the progress dialog into a persistent error state on the main
-    thread, showing the full accumulated log with a working Save button.
+    With *use_pty* the child's stdout/stderr are attached to a
+    pseudo-terminal of :data:`PTY_COLUMNS` x :data:`PTY_ROWS`, so tools
+    that check ``isatty()`` draw their live progress bars.  Otherwise
+    output goes through a plain pipe.
 
-    The dialog is NOT destroyed — the user reads/saves the log and closes it.
+    Returns:
+        tuple: ``(process, fd)`` where *fd* is a non-blocking descriptor
+        carrying the merged output.
     """
-    full_log = "\n".join(log_lines)
+    if not use_pty:
+        process = commands.spawn(
+            ["bash", script_file],
+            commands.SCRIPT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            preexec_fn=os.setsid,
+            env=env,
+        )
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, False)
+        return process, fd
+
+    master_fd, slave_fd = pty.openpty()
+    try:
+        fcntl.ioctl(
+            slave_fd,
+            termios.TIOCSWINSZ,
+            struct.pack("HHHH", PTY_ROWS, PTY_COLUMNS, 0, 0),
+        )
+        pty_env = {
+            **env,
+            "TERM": "xterm-256color",
+            "COLUMNS": str(PTY_COLUMNS),
+            "LINES": str(PTY_ROWS),
+        }
+        process = commands.spawn(
+            ["bash", script_file],
+            commands.SCRIPT,
+            stdin=subprocess.DEVNULL,
+            stdout=slave_fd,
+            stderr=slave_fd,
+            preexec_fn=os.setsid,
+            env=pty_env,
+        )
+    except Exception:
+        os.close(master_fd)
+        raise
+    finally:
+        os.close(slave_fd)
+
+    os.set_blocking(master_fd, False)
+    return process, master_fd
 
-    def _apply():
-        setter = getattr(progress_dialog, "appstore_set_error", None)
-        if setter:
-            setter(action_label, full_log, exit_code, reason)
-        return False
 
-    GLib.idle_add(_apply)
+def _pump_output(fd, is_cancelled, on_lines, on_tick, deadline=None):
+    """Multiplex reads from *fd* with cancellation, timeout and heartbeat.
 
+    Reads large byte chunks, decodes them incrementally and splits them
+    into lines in bulk.  Progress bars (wget, aria2c, apt) redraw their
+    line with ``\\r``: each redraw is reported as soon as it is complete,
+    so progress can follow it, but only the last one counts as the line.
 
-def run_script_with_progress(
+    Args:
+        fd: Non-blocking file descriptor carrying the child's output.
+        is_cancelled: Callable returning ``True`` once the user cancels.
+        on_lines: Callback ``(items: list[tuple]) -> None`` for each
+            batch of output.  Each item is ``(text, new, final)``:
+            *new* is ``True`` the first time *text* is reported, and
+            *final* marks the last redraw of a complete line.
+        on_tick: Callback ``() -> None`` run every
+            :data:`HEARTBEAT_INTERVAL` seconds.
+        deadline: Optional ``time.monotonic()`` value after which the
+            pump gives up.
+
+    Returns:
+        str: ``"eof"``, ``"cancelled"`` or ``"timeout"``.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    # Redraws of the pending line already reported
+    redrawn = 0
+    next_tick = time.monotonic() + HEARTBEAT_INTERVAL
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        while True:
+            if is_cancelled():
+                return "cancelled"
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return "timeout"
+
+            wait = min(POLL_INTERVAL, max(0.0, next_tick - now))
+            if selector.select(wait):
+                try:
+                    data = os.read(fd, READ_CHUNK)
+                except BlockingIOError:
+                    data = None
+                except OSError:
+                    # A pty master reports EIO once the child side closes.
+                    data = b""
+
+                if data == b"":
+                    tail = pending + decoder.decode(b"", True)
+                    items, _ = _split_redraws([tail], redrawn)
+                    if items:
+                        on_lines(items)
+                    return "eof"
+
+                if data:
+                    text = pending + decoder.decode(data)
+                    lines = text.replace("\r\n", "\n").split("\n")
+                    pending = lines.pop()
+                    items, redrawn = _split_redraws(lines, redrawn, pending)
+                    if items:
+                        on_lines(items)
+
+            if time.monotonic() >= next_tick:
+                on_tick()
+                next_tick = time.monotonic() + HEARTBEAT_INTERVAL
+
+
+def _split_redraws(lines, redrawn, pending=""):
+    """Split complete *lines* and the *pending* partial line on ``\\r``.
+
+    Args:
+        lines: Complete lines; the first one continues the previous
+            pending line, whose first *redrawn* redraws were reported.
+        redrawn: See *lines*.
+        pending: Text after the last line break.
+
+    Returns:
+        tuple: ``(items, redrawn)``; see :func:`_pump_output` for the
+        items, and *redrawn* counts the reported redraws of *pending*.
+    """
+    items = []
+    for line in lines:
+        segments = line.split("\r")
+        last = len(segments) - 1
+        while last > 0 and not segments[last]:
+            last -= 1
+        items.extend((s, True, False) for s in segments[redrawn:last] if s)
+        if segments[last]:
+            items.append((segments[last], last >= redrawn, True))
+        redrawn = 0
+    segments = pending.split("\r")
+    items.extend((s, True, False) for s in segments[redrawn:-1] if s)
+    return items, len(segments) - 1
+
+
+def _operation_for(action_label):
+    label = action_label.lower()
+    if "uninstall" in label:
+        return "uninstall"
+    if "updat" in label:
+        return "update"
+    return "install"
+
+
+def _report_cache_use(engine, result, output, cache_max_mb):
+    """Copy the engine's artifact-cache hits/misses into *result*."""
+    hits, misses = engine.cache_hits, engine.cache_misses
+    result["cache_hits"] = list(hits)
+    result["cache_misses"] = list(misses)
+    if not hits and not misses:
+        return
+    summary = f"Artifact cache: {len(hits)} hit(s), {len(misses)} miss(es)"
+    logger.info("%s", summary)
+    output(f"[appstore] {summary}\n")
+    if misses:
+        prune_artifact_cache(cache_max_mb * 1024 * 1024)
+
+
+def execute_script(
     *,
     app,
     url,
     action_label,
-    on_success,
-    progress_bar,
-    status_label,
-    terminal_view,
-    progress_dialog,
-    refresh_view_cb=None,
+    is_cancelled,
+    on_progress=None,
+    on_output=None,
+    on_pulse=None,
+    timeout=None,
+    use_pty=False,
+    script=None,
+    cache_max_mb=DEFAULT_SETTINGS["artifact_cache_max_mb"],
 ):
-    """Download and execute an install/uninstall script with real-time
-    progress tracking.
+    """Download and run an install/uninstall script in the calling thread.
 
-    This function spawns a daemon thread that:
-
-    1. Downloads the script via ``download_script()``.
-    2. Instantiates a :class:`ProgressEngine` and auto-detects the
-       script type.
-    3. Runs the script with ``PROGRESS_ENABLED=1`` in the env.
-    4. Routes every output line through the engine's 4-layer parser.
-    5. Filters internal protocol tokens from the terminal view.
-    6. Registers a GTK heartbeat timer for drift / activity mode.
+    This is the widget-free core shared by
+    :func:`~termux_appstore.tasks.task_manager.run_script_with_progress`,
+    the job scheduler and the command-line front end.  Callbacks
+    are invoked from the calling thread; callers marshal them to the
+    main loop themselves.
 
     Args:
-        app:              App metadata dict.
-        url:              Remote URL of the install/uninstall script.
-        action_label:     Human label — ``"Installing"`` / ``"Uninstalling"``.
-        on_success:       Callback invoked on the main thread on success.
-        progress_bar:     ``Gtk.ProgressBar`` widget.
-        status_label:     ``Gtk.Label`` for status text.
-        terminal_view:    ``Gtk.TextView`` for terminal output.
-        progress_dialog:  ``Gtk.Dialog`` hosting the progress UI.
-        refresh_view_cb:  Optional callable that refreshes the current view.
+        app:          App metadata dict.
+        url:          Remote URL of the install/uninstall script.
+        action_label: Human label — ``"Installing"`` / ``"Uninstalling"``.
+        is_cancelled: Callable returning ``True`` once the user cancels.
+        on_progress:  Optional ``(fraction, message) -> None``.
+        on_output:    Optional ``(text) -> None`` for visible output,
+                      with protocol tokens filtered out.
+        on_pulse:     Optional ``() -> None`` called instead of
+                      *on_progress* while the script has been silent
+                      for a long time (activity mode).
+        timeout:      Optional limit in seconds for the script run.
+        use_pty:      Run the script under a PTY so download and
+                      package tools report real progress.
+        script:       Optional script text to run instead of downloading
+                      *url* (e.g. a generated batch update).
+        cache_max_mb: Size cap of the artifact cache, enforced after
+                      the script added to it.
+
+    Returns:
+        dict: ``{"outcome", "exit_code", "reason", "log_lines",
+        "cache_hits", "cache_misses"}`` where *outcome* is one of
+        ``"success"``, ``"failed"``, ``"timeout"``, ``"cancelled"``,
+        ``"download_failed"`` or ``"error"``, and the cache lists name
+        the artifacts served from / added to the artifact cache.
     """
-    cancelled = False
     process = None
+    out_fd = None
     script_file = None
     log_lines = []
-
-    def on_cancel(*_args):
-        nonlocal cancelled
-        cancelled = True
-        if process:
-            try:
-                pgid = os.getpgid(process.pid)
-                os.killpg(pgid, signal.SIGTERM)
-                try:
-                    process.wait(timeout=3)
-                except subprocess.TimeoutExpired:
-                    os.killpg(pgid, signal.SIGKILL)
-                    process.wait(timeout=1)
-            except Exception as e:
-                print(f"Error stopping process: {e}")
-        GLib.timeout_add(
-            500, lambda: progress_dialog.destroy() if progress_dialog else None
+    result = {
+        "outcome": "error",
+        "exit_code": None,
+        "reason": "",
+        "log_lines": log_lines,
+        "cache_hits": [],
+        "cache_misses": [],
+    }
+
+    def _progress(fraction, message):
+        if on_progress is not None:
+            on_progress(fraction, message)
+
+    def _output(text):
+        if on_output is not None:
+            on_output(text)
+
+    try:
+        engine = ProgressEngine(
+            operation=_operation_for(action_label),
+            app_type=app.get("app_type", "native"),
+            tty=use_pty,
         )
-        return True
-
-    progress_dialog.connect("response", on_cancel)
-
-    def update_progress(fraction, text):
-        if not progress_dialog or not progress_dialog.get_window():
-            return False
-        status_label.set_text(text)
-        progress_bar.set_fraction(fraction)
-        progress_bar.set_text(f"{int(fraction * 100)}%")
+        _progress(engine.current_fraction, engine.current_message)
+        if script is not None:
+            script_file = prepare_script(script)
+        else:
+            _output(f"Downloading {action_label.lower()} script...\n")
+            script_file = download_script(url, script_sha256(app, url))
+        if not script_file or is_cancelled():
+            result["outcome"] = "cancelled" if script_file else "download_failed"
+            return result
 
-        cancel_btn = progress_dialog.get_widget_for_response(Gtk.ResponseType.CANCEL)
-        if cancel_btn:
-            cancel_btn.set_sensitive(fraction > 0.8)
-        return False
-
-    def update_phase_label(phase):
-        """Update status label prefix with human-readable phase."""
-        label = PHASE_LABELS.get(phase, "")
-        if label:
-            return label
-        return ""
+        try:
+            with open(script_file) as f:
+                engine.detect_script_type(f.read())
+        except Exception:
+            pass
 
-    # ── Worker thread ─────────────────────────────────────────────────
-    def worker():
-        nonlocal script_file, process
+        engine.script_downloaded()
+        _progress(engine.current_fraction, engine.current_message)
 
-        try:
-            op = "install"
-            if "uninstall" in action_label.lower():
-                op = "uninstall"
-            elif "updat" in action_label.lower():
-                op = "update"
-
-            engine = ProgressEngine(
-                operation=op,
-                app_type=app.get("app_type", "native"),
-            )
+        os.chmod(script_file, os.stat(script_file).st_mode | stat.S_IEXEC)
 
-            GLib.idle_add(
-                update_progress,
-                engine.current_fraction,
-                engine.current_message,
+        def heartbeat_cb():
+            engine.heartbeat()
+            elapsed = time.time() - engine._last_token_time
+            if elapsed > 10.0 and not engine.is_done and on_pulse is not None:
+                on_pulse()
+            else:
+                _progress(engine.current_fraction, engine.current_message)
+
+        def on_lines(items):
+            visible = []
+            for line, new, final in items:
+                if new:
+                    engine.process_line(line)
+                if not final:
+                    continue
+                # Keep the full transcript in memory so it survives
+                # dialog destruction and can be shown/saved on failure.
+                log_lines.append(line)
+                if not ProgressEngine.is_progress_token(line):
+                    visible.append(line)
+
+            _progress(engine.current_fraction, engine.current_message)
+            if visible:
+                _output("\n".join(visible) + "\n")
+
+        script_env = {
+            **os.environ,
+            "PROGRESS_ENABLED": "1",
+            # Package-manager calls in inbuild_functions take these locks
+            # so concurrent scripts only serialize where they must.
+            "APPSTORE_LOCK_DIR": APPSTORE_LOCK_DIR,
+            # download_file reuses and stores verified artifacts here.
+            "APPSTORE_CACHE_DIR": APPSTORE_ARTIFACT_CACHE_DIR,
+            # ...and fetches the rest with the resumable downloader.
+            "APPSTORE_PYTHON": sys.executable,
+            "APPSTORE_FETCH_HELPER": downloader.__file__,
+        }
+
+        process, out_fd = _spawn_script(script_file, script_env, use_pty)
+
+        deadline = time.monotonic() + timeout if timeout else None
+        outcome = _pump_output(out_fd, is_cancelled, on_lines, heartbeat_cb, deadline)
+        _report_cache_use(engine, result, _output, cache_max_mb)
+
+        if outcome == "cancelled":
+            _terminate(process)
+            result["outcome"] = "cancelled"
+            return result
+
+        if outcome == "timeout":
+            _terminate(process)
+            log_lines.append(
+                f"[appstore] {action_label} timed out after {int(timeout)}s"
             )
-
-            GLib.idle_add(
-                lambda: update_terminal(
-                    terminal_view,
-                    f"Downloading {action_label.lower()} script...\n",
-                )
+            result.update(
+                outcome="timeout",
+                exit_code=process.returncode,
+                reason=f"Timed out after {int(timeout)} seconds",
             )
-            script_file = download_script(url)
-            if not script_file or cancelled:
-                if script_file and os.path.exists(script_file):
-                    os.remove(script_file)
-                GLib.idle_add(progress_dialog.destroy)
-                return
-
+            return result
+
+        exit_code = process.wait()
+        result["exit_code"] = exit_code
+
+        if is_cancelled():
+            result["outcome"] = "cancelled"
+            return result
+
+        # Success requires ALL of: clean exit, an explicit __DONE__ token,
+        # no __ERROR__ token, and not cancelled. Exit code alone is not
+        # trusted — a script can exit 0 after a tolerated sub-failure.
+        if exit_code == 0 and engine.is_done and not engine.has_error:
+            result["outcome"] = "success"
+        else:
+            result["outcome"] = "failed"
+            result["reason"] = engine.current_message if engine.has_error else ""
+        return result
+
+    except Exception as e:
+        logger.error("%s error: %s", action_label, e)
+        log_lines.append(f"\n[appstore] Unexpected error: {e}")
+        result.update(outcome="error", reason=str(e))
+        return result
+
+    finally:
+        if process:
             try:
-                with open(script_file) as f:
-                    engine.detect_script_type(f.read())
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            except Exception:
+                pass
+        if use_pty and out_fd is not None:
+            try:
+                os.close(out_fd)
+            except OSError:
+                pass
+        if script_file and os.path.exists(script_file):
+            try:
+                os.remove(script_file)
             except Exception:
                 pass
-
-            engine.script_downloaded()
-
-            GLib.idle_add(
-                update_progress,
-                engine.current_fraction,
-                engine.current_message,
-            )
-
-            os.chmod(script_file, os.stat(script_file).st_mode | stat.S_IEXEC)
-
-            def heartbeat_cb():
-                if cancelled or engine.is_done:
-                    return False  # Stop timer
-                engine.heartbeat()
-                elapsed = time.time() - engine._last_token_time
-                if elapsed > 10.0 and not engine.is_done:
-                    # Activity mode — pulse so user knows it's not frozen
-                    GLib.idle_add(progress_bar.pulse)
-                else:
-                    GLib.idle_add(
-                        update_progress,
-                        engine.current_fraction,
-                        engine.current_message,
-                    )
-                return not engine.is_done
-
-            GLib.timeout_add(500, heartbeat_cb)
-
-            script_env = {**os.environ, "PROGRESS_ENABLED": "1"}
-
-            process = subprocess.Popen(
-                ["bash", script_file],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1,
-                preexec_fn=os.setsid,
-                env=script_env,
-            )
-
-            while True:
-                if cancelled:
-                    GLib.idle_add(progress_dialog.destroy)
-                    return
-
-                line = process.stdout.readline() if process.stdout else ""
-                if not line and process.poll() is not None:
-                    break
-
-                line_stripped = line.rstrip("\n")
-                if not line_stripped:
-                    continue
-
-                # Keep the full transcript in memory so it survives dialog
-                # destruction and can be shown/saved on failure.
-                log_lines.append(line_stripped)
-
-                fraction, message = engine.process_line(line_stripped)
-
-                GLib.idle_add(update_progress, fraction, message)
-
-                if ProgressEngine.is_progress_token(line_stripped):
-                    continue  # Don't show in terminal
-
-                GLib.idle_add(lambda ln=line: update_terminal(terminal_view, ln))
-
-            exit_code = process.wait()
-
-            # Success requires ALL of: clean exit, an explicit __DONE__ token,
-            # no __ERROR__ token, and not cancelled. Exit code alone is not
-            # trusted — a script can exit 0 after a tolerated sub-failure.
-            succeeded = (
-                exit_code == 0
-                and engine.is_done
-                and not engine.has_error
-                and not cancelled
-            )
-
-            if cancelled:
-                GLib.idle_add(progress_dialog.destroy)
-                return
-
-            if succeeded:
-                GLib.idle_add(
-                    update_progress,
-                    0.95,
-                    f"Finalizing {action_label.lower()}...",
-                )
-                GLib.idle_add(on_success)
-
-                if refresh_view_cb:
-                    GLib.idle_add(refresh_view_cb)
-
-                GLib.idle_add(update_progress, 1.0, f"{action_label} complete!")
-                time.sleep(2)
-                GLib.idle_add(progress_dialog.destroy)
-            else:
-                reason = engine.current_message if engine.has_error else ""
-                _show_failure(
-                    progress_dialog,
-                    action_label,
-                    log_lines,
-                    exit_code,
-                    reason,
-                )
-                # Do NOT destroy — leave the dialog open so the user can read
-                # and save the full log.
-
-        except Exception as e:
-            print(f"{action_label} error: {e}")
-            log_lines.append(f"\n[appstore] Unexpected error: {e}")
-            _show_failure(progress_dialog, action_label, log_lines, None, str(e))
-            # Leave the dialog open with the accumulated log.
-
-        finally:
-            if process:
-                try:
-                    os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                except Exception:
-                    pass
-                process = None
-            if script_file and os.path.exists(script_file):
-                try:
-                    os.remove(script_file)
-                except Exception:
-                    pass
-
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
@@ -2,11 +2,14 @@
 """Progress dialog and task management.
 
 Provides ``create_progress_dialog`` — a rich progress/terminal dialog
-for install, uninstall, and update operations — plus the
-``update_terminal`` helper used across the app.
+for install, uninstall, and update operations — the
+``update_terminal`` helper used across the app, and
+``run_script_with_progress``, which drives a script run from that dialog.
 """
 
 import os
+import threading
+import time
 from datetime import datetime
 
 import gi
@@ -14,6 +17,8 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import GLib, Gtk  # type: ignore # noqa: E402
 
+from termux_appstore.tasks.log_sink import LogSink
+from termux_appstore.tasks.script_executor import execute_script
 from termux_appstore.terminal.ansi_parser import AnsiColorParser
 from termux_appstore.terminal.command_runner import create_terminal_widget
 from termux_appstore.terminal.emulator import TerminalEmulator
@@ -26,7 +31,7 @@ def update_terminal(terminal_view, text, log_state=None):
         terminal_view: A ``Gtk.TextView`` that may have a
             ``terminal_emulator`` attribute attached.
         text: The text to append.
-        log_state: Optional dict ``{"active": bool, "file": file_obj,
+        log_state: Optional dict ``{"active": bool, "sink": LogSink,
             "path": str}`` for continuous logging.  Pass ``None`` to
             skip logging.
     """
@@ -42,20 +47,17 @@ def update_terminal(terminal_view, text, log_state=None):
     if log_state is None:
         log_state = getattr(terminal_view, "log_state", None)
 
-    if log_state and log_state.get("active") and log_state.get("file"):
-        try:
-            clean_text = AnsiColorParser().strip_ansi(text)
-            log_state["file"].write(clean_text)
-            log_state["file"].flush()
-        except Exception as e:
+    if log_state and log_state.get("active") and log_state.get("sink"):
+        sink = log_state["sink"]
+        if not sink.write(text):
             try:
                 terminal_view.terminal_emulator.append_text(
-                    f"\nError writing to log file: {e}\nLogging disabled.\n"
+                    f"\nError writing to log file: {sink.error}\nLogging disabled.\n"
                 )
-                log_state["file"].close()
+                sink.close()
             except Exception:
                 pass
-            log_state["file"] = None
+            log_state["sink"] = None
             log_state["active"] = False
             log_state["path"] = None
 
@@ -79,7 +81,7 @@ def create_progress_dialog(
         terminal_emulator, log_state)``
     """
     # Mutable log state shared across closures
-    log_state = {"active": False, "file": None, "path": None}
+    log_state = {"active": False, "sink": None, "path": None}
 
     dialog = Gtk.Dialog(
         title=title, parent=parent, modal=True, destroy_with_parent=True
@@ -201,13 +203,12 @@ def create_progress_dialog(
     terminal_button.connect("clicked", _toggle_terminal)
 
     def _on_response(dlg, response_id):
-        if log_state["active"] and log_state["file"]:
+        if log_state["active"] and log_state["sink"]:
             try:
-                log_state["file"].write("\n--- Operation completed or cancelled ---\n")
-                log_state["file"].close()
+                log_state["sink"].close("\n--- Operation completed or cancelled ---\n")
             except Exception:
                 pass
-            log_state["file"] = None
+            log_state["sink"] = None
             log_state["active"] = False
             log_state["path"] = None
 
@@ -235,12 +236,9 @@ def create_progress_dialog(
                 buf = terminal_view.get_buffer()
                 start_iter, end_iter = buf.get_bounds()
                 existing_text = buf.get_text(start_iter, end_iter, False)
-                clean_text = AnsiColorParser().strip_ansi(existing_text)
 
-                log_state["file"] = open(log_state["path"], "w")
-                if clean_text:
-                    log_state["file"].write(clean_text)
-                    log_state["file"].flush()
+                log_state["sink"] = LogSink(log_state["path"])
+                log_state["sink"].write(existing_text)
 
                 log_state["active"] = True
 
@@ -254,7 +252,7 @@ def create_progress_dialog(
                 terminal_emulator.append_text(
                     f"\n--- Error setting up continuous logging: {e} ---\n"
                 )
-                log_state["file"] = None
+                log_state["sink"] = None
                 log_state["active"] = False
         file_dialog.destroy()
 
@@ -359,3 +357,136 @@ def parse_progress_line(line):
                 "message": parts[2] if len(parts) > 2 else "",
             }
     return None
+
+
+def _show_failure(progress_dialog, action_label, log_lines, exit_code, reason):
+    """Switch the progress dialog into a persistent error state on the main
+    thread, showing the full accumulated log with a working Save button.
+
+    The dialog is NOT destroyed — the user reads/saves the log and closes it.
+    """
+    full_log = "\n".join(log_lines)
+
+    def _apply():
+        setter = getattr(progress_dialog, "appstore_set_error", None)
+        if setter:
+            setter(action_label, full_log, exit_code, reason)
+        return False
+
+    GLib.idle_add(_apply)
+
+
+def run_script_with_progress(
+    *,
+    app,
+    url,
+    action_label,
+    on_success,
+    progress_bar,
+    status_label,
+    terminal_view,
+    progress_dialog,
+    refresh_view_cb=None,
+    timeout=None,
+    use_pty=False,
+):
+    """Download and execute an install/uninstall script with real-time
+    progress tracking in a progress dialog.
+
+    Spawns a daemon thread that runs :func:`execute_script` and routes
+    its progress and output to the dialog widgets:
+
+    1. Downloads the script via ``download_script()``.
+    2. Instantiates a :class:`ProgressEngine` and auto-detects the
+       script type.
+    3. Runs the script with ``PROGRESS_ENABLED=1`` in the env.
+    4. Pumps the script's output through a selector loop that also
+       handles cancellation, the optional timeout and the heartbeat
+       (drift / activity mode).
+    5. Routes every output line through the engine's 4-layer parser.
+    6. Filters internal protocol tokens from the terminal view.
+
+    Args:
+        app:              App metadata dict.
+        url:              Remote URL of the install/uninstall script.
+        action_label:     Human label — ``"Installing"`` / ``"Uninstalling"``.
+        on_success:       Callback invoked on the main thread on success.
+        progress_bar:     ``Gtk.ProgressBar`` widget.
+        status_label:     ``Gtk.Label`` for status text.
+        terminal_view:    ``Gtk.TextView`` for terminal output.
+        progress_dialog:  ``Gtk.Dialog`` hosting the progress UI.
+        refresh_view_cb:  Optional callable that refreshes the current view.
+        timeout:          Optional limit in seconds for the script run.
+        use_pty:          Run the script under a PTY so download and
+                          package tools report real progress.
+    """
+    cancelled = False
+
+    def on_cancel(*_args):
+        nonlocal cancelled
+        # The worker's pump loop notices the flag within POLL_INTERVAL and
+        # stops the script (SIGTERM, then SIGKILL).
+        cancelled = True
+        GLib.timeout_add(
+            500, lambda: progress_dialog.destroy() if progress_dialog else None
+        )
+        return True
+
+    progress_dialog.connect("response", on_cancel)
+
+    def update_progress(fraction, text):
+        if not progress_dialog or not progress_dialog.get_window():
+            return False
+        status_label.set_text(text)
+        progress_bar.set_fraction(fraction)
+        progress_bar.set_text(f"{int(fraction * 100)}%")
+
+        cancel_btn = progress_dialog.get_widget_for_response(Gtk.ResponseType.CANCEL)
+        if cancel_btn:
+            cancel_btn.set_sensitive(fraction > 0.8)
+        return False
+
+    # ── Worker thread ─────────────────────────────────────────────────
+    def worker():
+        result = execute_script(
+            app=app,
+            url=url,
+            action_label=action_label,
+            is_cancelled=lambda: cancelled,
+            on_progress=lambda f, m: GLib.idle_add(update_progress, f, m),
+            on_output=lambda t: GLib.idle_add(update_terminal, terminal_view, t),
+            on_pulse=lambda: GLib.idle_add(progress_bar.pulse),
+            timeout=timeout,
+            use_pty=use_pty,
+        )
+        outcome = result["outcome"]
+
+        if outcome in ("cancelled", "download_failed"):
+            GLib.idle_add(progress_dialog.destroy)
+        elif outcome == "success":
+            GLib.idle_add(
+                update_progress,
+                0.95,
+                f"Finalizing {action_label.lower()}...",
+            )
+            GLib.idle_add(on_success)
+
+            if refresh_view_cb:
+                GLib.idle_add(refresh_view_cb)
+
+            GLib.idle_add(update_progress, 1.0, f"{action_label} complete!")
+            time.sleep(2)
+            GLib.idle_add(progress_dialog.destroy)
+        else:
+            # Do NOT destroy — leave the dialog open so the user can read
+            # and save the full log.
+            _show_failure(
+                progress_dialog,
+                action_label,
+                result["log_lines"],
+                result["exit_code"],
+                result["reason"],
+            )
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
@@ -6,15 +6,15 @@ Provides ``CommandRunner`` for pty-based command execution,
 ``CommandOutputWindow`` for displaying command output in a popup.
 """
 
+import codecs
 import fcntl
+import logging
 import os
 import pty
 import signal
 import struct
-import subprocess
 import termios
 import threading
-import time
 
 import gi
 
@@ -22,9 +22,12 @@ gi.require_version("Gtk", "3.0")
 gi.require_version("Gdk", "3.0")
 from gi.repository import Gdk, GLib, Gtk  # type: ignore # noqa: E402
 
+from termux_appstore.backend import commands
 from termux_appstore.constants import TERMUX_PREFIX
 from termux_appstore.terminal.emulator import TerminalEmulator
 
+logger = logging.getLogger(__name__)
+
 
 def find_terminal_css_path():
     """Find the terminal CSS file path with fallback options."""
@@ -42,7 +45,7 @@ def find_terminal_css_path():
     for path in possible_paths:
         resolved = os.path.normpath(path)
         if os.path.isfile(resolved):
-            print(f"Found terminal CSS at: {resolved}")
+            logger.debug("Found terminal CSS at: %s", resolved)
             return resolved
 
     default_path = os.path.normpath(
@@ -53,7 +56,7 @@ def find_terminal_css_path():
             "terminal_style.css",
         )
     )
-    print(f"Terminal CSS not found, using default path: {default_path}")
+    logger.warning("Terminal CSS not found, using default path: %s", default_path)
     return default_path
 
 
@@ -66,10 +69,10 @@ def apply_terminal_css(widget):
 
     try:
         css_provider.load_from_path(TERMINAL_CSS_PATH)
-        print(f"Successfully loaded terminal CSS from {TERMINAL_CSS_PATH}")
+        logger.debug("Successfully loaded terminal CSS from %s", TERMINAL_CSS_PATH)
     except Exception as e:
-        print(f"Could not load terminal CSS from {TERMINAL_CSS_PATH}: {e}")
-        print("Using fallback inline CSS")
+        logger.error("Could not load terminal CSS from %s: %s", TERMINAL_CSS_PATH, e)
+        logger.warning("Using fallback inline CSS")
         css_provider.load_from_data(b"""
         .terminal-view {
             background-color: #282c34;
@@ -121,6 +124,12 @@ def create_terminal_widget():
 class CommandRunner:
     """Run shell commands and display output in a terminal."""
 
+    # Reads start small and double while the pty keeps filling them, so
+    # chatty commands are drained in a few large reads per wakeup.
+    READ_SIZE_MIN = 4096
+    READ_SIZE_MAX = 64 * 1024
+    MAX_READS_PER_WAKEUP = 8
+
     def __init__(self, terminal):
         self.terminal = terminal
         self.process = None
@@ -129,7 +138,13 @@ class CommandRunner:
         self.slave_fd = None
         self.io_watch_id = None
         self.final_output_received = False
-        self.output_buffer = bytearray()
+        self._read_size = self.READ_SIZE_MIN
+        self._decoder = self._new_decoder()
+
+    @staticmethod
+    def _new_decoder():
+        """Return a UTF-8 decoder that keeps split multibyte sequences."""
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
 
     def run_command(self, command, on_complete=None):
         """Run a shell command and display its output in the terminal.
@@ -149,7 +164,8 @@ class CommandRunner:
 
         self.is_running = True
         self.final_output_received = False
-        self.output_buffer = bytearray()
+        self._read_size = self.READ_SIZE_MIN
+        self._decoder = self._new_decoder()
         self.terminal.append_text(f"Running: {command}\n\n")
 
         try:
@@ -170,8 +186,9 @@ class CommandRunner:
             env["APT_FORCE_CLI_PROMPT"] = "1"
             env["PYTHONUTF8"] = "1"
 
-            self.process = subprocess.Popen(
+            self.process = commands.spawn(
                 ["bash", "-c", command],
+                commands.APP,
                 stdin=self.slave_fd,
                 stdout=self.slave_fd,
                 stderr=self.slave_fd,
@@ -195,8 +212,6 @@ class CommandRunner:
                 if self.process is None:
                     return
                 return_code = self.process.wait()
-                time.sleep(0.2)
-                self._flush_output_buffer()
                 self.final_output_received = True
                 GLib.idle_add(self._command_completed, return_code, on_complete)
 
@@ -225,47 +240,55 @@ class CommandRunner:
         return False
 
     def _on_pty_output(self, fd, condition):
-        """Handle output from the pty."""
+        """Handle output from the pty (runs on the main loop)."""
         if condition & GLib.IOCondition.IN:
-            try:
-                data = os.read(fd, 4096)
-                if data:
-                    self.output_buffer.extend(data)
-                    self._process_output_buffer()
-                    return True
-            except OSError:
-                pass
+            data, eof = self._read_available(fd)
+            if data:
+                self._append_decoded(data)
+            if not eof:
+                return True
 
         self._cleanup_io_watch()
         return False
 
-    def _process_output_buffer(self):
-        """Decode and display the output buffer."""
-        try:
-            text = self.output_buffer.decode("utf-8", errors="replace")
-            GLib.idle_add(self._update_terminal, text)
-            self.output_buffer = bytearray()
-        except UnicodeDecodeError:
-            return
-
-    def _flush_output_buffer(self):
-        """Flush any remaining data in the output buffer."""
-        if self.output_buffer:
-            try:
-                text = self.output_buffer.decode("utf-8", errors="replace")
-                GLib.idle_add(self._update_terminal, text)
-                self.output_buffer = bytearray()
-            except Exception:
-                pass
+    def _read_available(self, fd, max_reads=MAX_READS_PER_WAKEUP):
+        """Read whatever the pty has buffered, up to *max_reads* reads.
 
-    def _update_terminal(self, text):
-        """Update the terminal with new text (called from main thread)."""
-        self.terminal.append_text(text)
-        return False
+        Returns:
+            tuple: ``(data: bytes, eof: bool)``
+        """
+        chunks = []
+        eof = False
+        for _ in range(max_reads):
+            try:
+                data = os.read(fd, self._read_size)
+            except BlockingIOError:
+                break
+            except OSError:
+                eof = True
+                break
+            if not data:
+                eof = True
+                break
+            chunks.append(data)
+            if len(data) < self._read_size:
+                self._read_size = max(self.READ_SIZE_MIN, self._read_size // 2)
+                break
+            self._read_size = min(self.READ_SIZE_MAX, self._read_size * 2)
+        return b"".join(chunks), eof
+
+    def _append_decoded(self, data, final=False):
+        """Decode *data* incrementally and append it to the terminal."""
+        text = self._decoder.decode(data, final)
+        if text:
+            self.terminal.append_text(text)
 
     def _command_completed(self, return_code, on_complete):
         """Handle command completion (called from main thread)."""
         if self.final_output_received:
+            if self.master_fd is not None:
+                data, _ = self._read_available(self.master_fd, max_reads=64)
+                self._append_decoded(data, final=True)
             self.terminal.append_text(
                 "\n\nCommand completed with return code: " + str(return_code) + "\n"
             )
@@ -377,7 +400,7 @@ class TerminalWindow(Gtk.Window):
                 Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION,
             )
         except Exception as e:
-            print(f"Error loading CSS: {e}")
+            logger.error("Error loading CSS: %s", e)
 
     def on_command_enter(self, widget):
         """Handle command entry."""
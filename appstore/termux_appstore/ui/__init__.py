@@ -9,6 +9,7 @@ Usage::
         build_sidebar,
         build_app_card,
         SearchBar,
+        JobQueueView,
         show_about_dialog,
         show_settings_dialog,
         show_repos_dialog,
@@ -22,6 +23,7 @@ from termux_appstore.ui.dialogs import (
     show_settings_dialog,
 )
 from termux_appstore.ui.header import build_header_bar, build_menu_popover
+from termux_appstore.ui.queue_view import JobQueueView
 from termux_appstore.ui.search import SearchBar
 from termux_appstore.ui.sidebar import build_sidebar
 
@@ -31,6 +33,7 @@ __all__ = [
     "build_sidebar",
     "build_app_card",
     "SearchBar",
+    "JobQueueView",
     "show_about_dialog",
     "show_settings_dialog",
     "show_repos_dialog",
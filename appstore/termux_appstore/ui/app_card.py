@@ -6,6 +6,7 @@ description, version, and action buttons (Install / Open / Update /
 Uninstall).
 """
 
+import logging
 import os
 
 import gi
@@ -16,24 +17,7 @@ from gi.repository import GdkPixbuf, GLib, Gtk  # type: ignore # noqa: E402
 
 from termux_appstore.constants import APPSTORE_LOGO_DIR
 
-
-def _format_version(version):
-    """Clean a version string for display.
-
-    Returns:
-        str: Cleaned version, or ``"Unavailable"``.
-    """
-    if not version or not isinstance(version, str):
-        return "Unavailable"
-
-    if version in ("termux_local_version", "distro_local_version"):
-        return "Unavailable"
-
-    version = version.split(",")[0].strip()
-    version = version.split()[0].strip()
-    if version.startswith("v"):
-        version = version[1:]
-    return version or "Unavailable"
+logger = logging.getLogger(__name__)
 
 
 def _load_logo(app):
@@ -42,7 +26,7 @@ def _load_logo(app):
     Returns:
         Gtk.Image | None
     """
-    folder = app.get("folder_name", "")
+    folder = app.folder_name or ""
     png_path = os.path.join(APPSTORE_LOGO_DIR, folder, "logo.png")
     svg_path = os.path.join(APPSTORE_LOGO_DIR, folder, "logo.svg")
 
@@ -62,9 +46,9 @@ def _load_logo(app):
             image.set_margin_end(12)
             return image
     except GLib.Error as e:
-        print(f"Error loading logo for {app.get('app_name', '?')}: {e}")
+        logger.error("Error loading logo for %s: %s", app.app_name, e)
     except Exception as e:
-        print(f"Unexpected error loading logo for {app.get('app_name', '?')}: {e}")
+        logger.error("Unexpected error loading logo for %s: %s", app.app_name, e)
 
     return None
 
@@ -81,7 +65,7 @@ def build_app_card(
     """Build a single app card widget.
 
     Args:
-        app: App metadata dict from ``apps.json``.
+        app: An :class:`~termux_appstore.backend.app_record.AppRecord`.
         is_installed: Whether the app is currently installed.
         has_update: Whether a pending update exists for this app.
         on_install: Callback ``(button, app) -> None``.
@@ -111,14 +95,14 @@ def build_app_card(
         top_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
 
         name_label = Gtk.Label()
-        name_label.set_markup(f"<b>{GLib.markup_escape_text(app['app_name'])}</b>")
+        name_label.set_markup(f"<b>{GLib.markup_escape_text(app.app_name)}</b>")
         name_label.set_halign(Gtk.Align.START)
         top_row.pack_start(name_label, False, False, 0)
 
         top_row.pack_start(Gtk.Label(), True, True, 0)
 
         source_label = Gtk.Label()
-        source_type = app.get("app_type", "unknown").capitalize()
+        source_type = (app.app_type or "unknown").capitalize()
         source_label.set_markup(f"Source: {GLib.markup_escape_text(source_type)}")
         source_label.get_style_context().add_class("metadata-label")
         source_label.set_size_request(120, -1)
@@ -128,7 +112,7 @@ def build_app_card(
 
         info_box.pack_start(top_row, False, False, 0)
 
-        desc_text = app.get("description", "")
+        desc_text = app.description or ""
         if len(desc_text) > 100:
             desc_text = desc_text[:100] + "..."
         desc_label = Gtk.Label(label=GLib.markup_escape_text(desc_text))
@@ -142,22 +126,20 @@ def build_app_card(
         button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
 
         version_label = Gtk.Label()
-        version_label.set_text(
-            GLib.markup_escape_text(_format_version(app.get("version", "")))
-        )
+        version_label.set_text(GLib.markup_escape_text(app.display_version))
         version_label.get_style_context().add_class("metadata-label")
         version_label.set_size_request(120, -1)
         version_label.set_halign(Gtk.Align.CENTER)
         version_label.set_margin_end(6)
 
         if is_installed:
-            if has_update and app.get("install_url") and on_update:
+            if has_update and app.install_url and on_update:
                 update_button = Gtk.Button(label="Update")
                 update_button.get_style_context().add_class("update-button")
                 update_button.connect("clicked", on_update, app)
                 update_button.set_size_request(120, -1)
                 button_box.pack_start(update_button, False, False, 0)
-            elif app.get("run_cmd") and app["run_cmd"].strip() and on_open:
+            elif app.run_cmd and app.run_cmd.strip() and on_open:
                 open_button = Gtk.Button(label="Open")
                 open_button.get_style_context().add_class("open-button")
                 open_button.connect("clicked", on_open, app)
@@ -188,8 +170,5 @@ def build_app_card(
         return app_card
 
     except Exception as e:
-        print(f"Error building app card for {app.get('app_name', '?')}: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error building app card for %s: %s", app.app_name, e)
         return None
@@ -5,6 +5,7 @@ Standalone dialogs for Settings, About, and Manage Repos that accept
 callbacks for state changes rather than referencing the window directly.
 """
 
+import logging
 import shutil
 import subprocess
 import threading
@@ -15,9 +16,12 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import GLib, Gtk  # type: ignore # noqa: E402
 
+from termux_appstore.backend import commands
 from termux_appstore.backend.distro import check_package_installed
 from termux_appstore.constants import APP_NAME, APP_VERSION
 
+logger = logging.getLogger(__name__)
+
 
 def show_about_dialog(parent):
     """Show the standard About dialog.
@@ -67,6 +71,7 @@ def show_settings_dialog(parent, get_setting, set_setting):
 
     _SETTINGS = [
         ("use_terminal_for_progress", "Use terminal for progress", False),
+        ("run_scripts_in_pty", "Show live download progress", True),
         ("enable_auto_refresh", "Enable auto-refresh", True),
         ("show_command_output", "Show command output in terminal", False),
         ("enable_fuzzy_search", "Enable fuzzy search", False),
@@ -94,7 +99,7 @@ def show_settings_dialog(parent, get_setting, set_setting):
             "state-set",
             lambda sw, state, k=key: (
                 set_setting(k, state),
-                print(f"{k} changed to: {state}"),
+                logger.debug("%s changed to: %s", k, state),
             ),
         )
 
@@ -199,8 +204,9 @@ def show_repos_dialog(parent, create_progress_dialog, update_terminal):
                 GLib.idle_add(
                     lambda: update_terminal(terminal_view, f"Running: {cmd}\n\n")
                 )
-                process = subprocess.Popen(
+                process = commands.spawn(
                     ["bash", "-c", cmd],
+                    commands.PACKAGE,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     universal_newlines=True,
@@ -2,7 +2,7 @@
 """Header bar and tab button widgets.
 
 Creates the ``Gtk.HeaderBar`` with Explore / Installed / Updates tabs,
-a search toggle button, and a hamburger menu.
+a search toggle button, a task-queue button, and a hamburger menu.
 """
 
 import gi
@@ -46,7 +46,7 @@ def build_header_bar(on_section_clicked, on_menu_clicked, on_search_toggled):
 
     Returns:
         dict: ``{"header", "explore_button", "installed_button",
-        "updates_button", "search_button", "tabs_box"}``
+        "updates_button", "search_button", "queue_button", "tabs_box"}``
     """
     header = Gtk.HeaderBar()
     header.set_show_close_button(True)
@@ -79,6 +79,14 @@ def build_header_bar(on_section_clicked, on_menu_clicked, on_search_toggled):
     menu_button.connect("clicked", on_menu_clicked)
     header.pack_end(menu_button)
 
+    queue_button = Gtk.Button()
+    queue_button.set_image(
+        Gtk.Image.new_from_icon_name("view-list-bullet-symbolic", Gtk.IconSize.BUTTON)
+    )
+    queue_button.get_style_context().add_class("menu-button")
+    queue_button.set_tooltip_text("Tasks")
+    header.pack_end(queue_button)
+
     search_button = Gtk.Button()
     search_button.set_image(
         Gtk.Image.new_from_icon_name("system-search-symbolic", Gtk.IconSize.BUTTON)
@@ -94,6 +102,7 @@ def build_header_bar(on_section_clicked, on_menu_clicked, on_search_toggled):
         "installed_button": installed_btn,
         "updates_button": updates_btn,
         "search_button": search_button,
+        "queue_button": queue_button,
         "tabs_box": tabs_box,
     }
 
@@ -0,0 +1,186 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Task queue popover.
+
+Shows every queued, running and finished job of a
+:class:`~termux_appstore.tasks.scheduler.JobScheduler` with its own
+progress bar, status line, cancel button and log button.  Scheduler
+callbacks arrive on worker threads; they only mark the view dirty and
+a single idle callback redraws it on the main loop.
+"""
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import GLib, Gtk, Pango  # type: ignore # noqa: E402
+
+_STATE_LABELS = {
+    "queued": "Queued",
+    "running": "",
+    "done": "Done",
+    "failed": "Failed",
+    "cancelled": "Cancelled",
+}
+
+
+class JobQueueView:
+    """Popover listing scheduler jobs, anchored on a header button.
+
+    Args:
+        button: The ``Gtk.Button`` that toggles the popover.  Its
+            tooltip and style reflect whether jobs are active.
+        scheduler: The :class:`JobScheduler` to display.
+        on_show_log: Callback ``(job) -> None`` for the log button.
+    """
+
+    def __init__(self, button, scheduler, on_show_log):
+        self._button = button
+        self._scheduler = scheduler
+        self._on_show_log = on_show_log
+        self._rows = {}
+        self._refresh_pending = False
+
+        self.popover = Gtk.Popover(relative_to=button)
+        self.popover.set_position(Gtk.PositionType.BOTTOM)
+
+        outer = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        outer.set_margin_top(10)
+        outer.set_margin_bottom(10)
+        outer.set_margin_start(10)
+        outer.set_margin_end(10)
+
+        title = Gtk.Label(label="<b>Tasks</b>")
+        title.set_use_markup(True)
+        title.set_halign(Gtk.Align.START)
+        outer.pack_start(title, False, False, 0)
+
+        scroll = Gtk.ScrolledWindow()
+        scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroll.set_propagate_natural_height(True)
+        scroll.set_max_content_height(400)
+        scroll.set_size_request(360, -1)
+        outer.pack_start(scroll, True, True, 0)
+
+        self._list = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        scroll.add(self._list)
+
+        self._empty_label = Gtk.Label(label="No tasks")
+        self._empty_label.get_style_context().add_class("dim-label")
+        self._list.pack_start(self._empty_label, False, False, 0)
+
+        clear_button = Gtk.Button(label="Clear finished")
+        clear_button.set_halign(Gtk.Align.END)
+        clear_button.connect("clicked", self._on_clear_clicked)
+        outer.pack_start(clear_button, False, False, 0)
+
+        outer.show_all()
+        self.popover.add(outer)
+
+        button.connect("clicked", lambda b: self.popover.popup())
+        scheduler.add_listener(self._on_job_changed)
+        self._refresh()
+
+    def show(self):
+        """Pop the queue up."""
+        self.popover.popup()
+
+    # Scheduler thread → main loop
+
+    def _on_job_changed(self, job):
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        GLib.idle_add(self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = False
+        jobs = self._scheduler.jobs()
+        live_ids = {job.id for job in jobs}
+
+        for job_id in list(self._rows):
+            if job_id not in live_ids:
+                self._rows.pop(job_id)["box"].destroy()
+
+        for job in jobs:
+            row = self._rows.get(job.id)
+            if row is None:
+                row = self._build_row(job)
+                self._rows[job.id] = row
+            self._update_row(row, job)
+
+        self._empty_label.set_visible(not jobs)
+
+        active = sum(1 for job in jobs if not job.finished)
+        ctx = self._button.get_style_context()
+        if active:
+            ctx.add_class("suggested-action")
+            self._button.set_tooltip_text(f"{active} task(s) in progress")
+        else:
+            ctx.remove_class("suggested-action")
+            self._button.set_tooltip_text("Tasks")
+        return False
+
+    # Rows
+
+    def _build_row(self, job):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+
+        top = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        title = Gtk.Label(label=job.title)
+        title.set_halign(Gtk.Align.START)
+        title.set_ellipsize(Pango.EllipsizeMode.END)
+        top.pack_start(title, True, True, 0)
+
+        log_button = Gtk.Button.new_from_icon_name(
+            "utilities-terminal-symbolic", Gtk.IconSize.BUTTON
+        )
+        log_button.set_tooltip_text("Show log")
+        log_button.set_relief(Gtk.ReliefStyle.NONE)
+        log_button.connect("clicked", lambda b: self._on_show_log(job))
+        top.pack_end(log_button, False, False, 0)
+
+        cancel_button = Gtk.Button.new_from_icon_name(
+            "process-stop-symbolic", Gtk.IconSize.BUTTON
+        )
+        cancel_button.set_tooltip_text("Cancel")
+        cancel_button.set_relief(Gtk.ReliefStyle.NONE)
+        cancel_button.connect("clicked", lambda b: self._scheduler.cancel(job))
+        top.pack_end(cancel_button, False, False, 0)
+
+        box.pack_start(top, False, False, 0)
+
+        progress = Gtk.ProgressBar()
+        progress.set_show_text(True)
+        progress.get_style_context().add_class("custom-progress")
+        box.pack_start(progress, False, False, 0)
+
+        status = Gtk.Label()
+        status.set_halign(Gtk.Align.START)
+        status.set_ellipsize(Pango.EllipsizeMode.END)
+        status.get_style_context().add_class("dim-label")
+        box.pack_start(status, False, False, 0)
+
+        box.show_all()
+        self._list.pack_start(box, False, False, 0)
+        return {
+            "box": box,
+            "progress": progress,
+            "status": status,
+            "cancel": cancel_button,
+        }
+
+    def _update_row(self, row, job):
+        row["progress"].set_fraction(job.fraction)
+        state_label = _STATE_LABELS.get(job.state, "")
+        row["progress"].set_text(state_label or f"{int(job.fraction * 100)}%")
+        row["status"].set_text(job.message or "")
+        row["cancel"].set_visible(not job.finished)
+
+        ctx = row["status"].get_style_context()
+        if job.state == "failed":
+            ctx.add_class("error")
+        else:
+            ctx.remove_class("error")
+
+    def _on_clear_clicked(self, _button):
+        self._scheduler.clear_finished()
+        self._refresh()
@@ -4,6 +4,7 @@
 Pure helper functions that don't depend on GTK or any UI layer.
 """
 
+import logging
 import os
 import platform
 import socket
@@ -11,6 +12,7 @@ import urllib.request
 
 from termux_appstore.constants import ARCH_COMPATIBILITY
 
+logger = logging.getLogger(__name__)
 
 
 def get_current_arch():
@@ -71,13 +73,14 @@ def validate_logo_size(logo_path):
             if 20 <= width <= 180 and 20 <= height <= 180:
                 return True
             else:
-                print(
-                    f"Logo for {os.path.basename(logo_path)} is not within "
-                    f"the required size range (20x20 to 180x180)."
+                logger.debug(
+                    "Logo for %s is not within "
+                    "the required size range (20x20 to 180x180).",
+                    os.path.basename(logo_path),
                 )
                 return False
     except Exception as e:
-        print(f"Error validating logo size for {logo_path}: {e}")
+        logger.error("Error validating logo size for %s: %s", logo_path, e)
         return False
 
 
@@ -98,19 +101,19 @@ def check_internet_connection():
     for host in ("8.8.8.8", "1.1.1.1"):
         try:
             socket.create_connection((host, 53), timeout=3)
-            print(f"Internet connection check successful: Connected to {host}")
+            logger.debug("Internet connection check successful: Connected to %s", host)
             return True
         except (socket.timeout, socket.error, OSError) as e:
-            print(f"Connection to {host} failed: {e}")
+            logger.debug("Connection to %s failed: %s", host, e)
 
     for url in ("https://www.google.com", "https://github.com"):
         try:
             urllib.request.urlopen(url, timeout=3)
-            print(f"Internet connection check successful: Connected to {url}")
+            logger.debug("Internet connection check successful: Connected to %s", url)
             return True
         except Exception as e:
-            print(f"Connection to {url} failed: {e}")
+            logger.debug("Connection to %s failed: %s", url, e)
 
-    print("All connection attempts failed, no internet connectivity detected")
+    logger.warning("All connection attempts failed, no internet connectivity detected")
     return False
 
@@ -5,32 +5,57 @@ This is the integration layer that wires together the backend, UI,
 terminal, and task modules into a working application window.
 """
 
+import logging
 import os
-import queue
-import subprocess
 import threading
 
 import gi
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("Gdk", "3.0")
-from gi.repository import Gdk, GLib, Gtk  # type: ignore # noqa: E402
-
-from termux_appstore.backend.app_data import load_app_metadata
+from gi.repository import Gdk, Gio, GLib, Gtk  # type: ignore # noqa: E402
+
+from termux_appstore.backend import commands
+from termux_appstore.backend.app_data import diff_apps, load_app_metadata, search_apps
+from termux_appstore.backend.batch_update import (
+    DISTRO,
+    NATIVE,
+    build_batch_script,
+    plan_batch_update,
+    repo_package,
+)
+from termux_appstore.backend.desktop_config import (
+    TERMUX_DESKTOP_CONFIG,
+    read_config,
+    subscribe,
+)
 from termux_appstore.backend.distro import DistroConfig
 from termux_appstore.backend.installed_apps import InstalledApps
-from termux_appstore.backend.refresh import migrate_old_data, refresh_data
+from termux_appstore.backend.package_watch import PackageWatch
+from termux_appstore.backend.refresh import (
+    migrate_old_data,
+    refresh_data,
+    should_auto_refresh,
+)
+from termux_appstore.backend.script_runner import (
+    cached_script,
+    prefetch_scripts,
+    script_sha256,
+)
 from termux_appstore.backend.settings import Settings
+from termux_appstore.backend.store import get_store
 from termux_appstore.backend.updates import UpdateTracker
 from termux_appstore.constants import (
     APP_NAME,
     APPSTORE_DIR,
     APPSTORE_JSON,
     APPSTORE_LOGO_DIR,
-    APPSTORE_OLD_JSON_DIR,
+    PACKAGE_WATCH_DELAY_MS,
+    PREFETCH_VISIBLE_APPS,
     TERMUX_PREFIX,
 )
-from termux_appstore.tasks.script_executor import run_script_with_progress
+from termux_appstore.tasks.scheduler import JobScheduler
+from termux_appstore.tasks.script_executor import execute_script
 from termux_appstore.tasks.task_manager import (
     create_progress_dialog,
     update_terminal,
@@ -43,11 +68,12 @@ from termux_appstore.ui.dialogs import (
     show_settings_dialog,
 )
 from termux_appstore.ui.header import build_header_bar, build_menu_popover
+from termux_appstore.ui.queue_view import JobQueueView
 from termux_appstore.ui.search import SearchBar
 from termux_appstore.ui.sidebar import build_sidebar
 from termux_appstore.utils import get_current_arch
 
-from termux_appstore.fuzzysearch import find_near_matches
+logger = logging.getLogger(__name__)
 
 
 class AppStoreWindow(Gtk.ApplicationWindow):
@@ -84,9 +110,23 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         self.selected_distro = self.distro_config.selected_distro
         self.distro_enabled = self.distro_config.distro_enabled
 
-        self.task_queue = queue.Queue()
-        self.task_running = False
-        self.task_thread = None
+        self.scheduler = None
+        self.queue_view = None
+
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_targets = None
+
+        self._cards = {}
+        self._package_watch = None
+        self._package_monitors = []
+        self._package_watch_source = None
+        self._config_monitor = None
+        self._config_watch_source = None
+        # Other threads may be the first to read a changed config.
+        subscribe(lambda old, new: GLib.idle_add(self._on_distro_changed, old, new))
+        # Install state set by the user while a background refresh runs;
+        # re-applied over the refresh's result when it finishes
+        self._refresh_overrides = None
 
         self.set_default_size(1000, 650)
         self.set_position(Gtk.WindowPosition.CENTER)
@@ -110,7 +150,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             self.show_all()
             self._setup_directories()
         except Exception as e:
-            print(f"Error during initialization: {e}")
+            logger.error("Error during initialization: %s", e)
             self._show_error(f"Failed to initialize app store: {e}")
             raise
 
@@ -132,7 +172,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
                 screen, css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
             )
         except Exception as e:
-            print(f"Warning: CSS error: {e}")
+            logger.warning("CSS error: %s", e)
 
     def _build_ui(self):
         """Build the complete UI from extracted modules."""
@@ -146,6 +186,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         self.installed_button = hdr["installed_button"]
         self.updates_button = hdr["updates_button"]
         self.search_button = hdr["search_button"]
+        self.queue_button = hdr["queue_button"]
         self.header_tabs_box = hdr["tabs_box"]
 
         self.main_stack = Gtk.Stack()
@@ -185,19 +226,144 @@ class AppStoreWindow(Gtk.ApplicationWindow):
     def _setup_directories(self):
         os.makedirs(APPSTORE_DIR, exist_ok=True)
         os.makedirs(APPSTORE_LOGO_DIR, exist_ok=True)
-        os.makedirs(APPSTORE_OLD_JSON_DIR, exist_ok=True)
 
         if not os.path.exists(APPSTORE_JSON):
-            print("First time setup: Initializing app store...")
+            logger.info("First time setup: Initializing app store...")
             self._start_refresh()
         else:
+            # Show the cached catalog right away and bring it up to date
+            # behind it.
             self._load_and_display()
+            if should_auto_refresh():
+                self._start_background_refresh()
 
     def _load_and_display(self):
         """Load metadata and set up the app list UI."""
         self.apps_data, self.categories = load_app_metadata()
 
         self._setup_app_list_ui()
+        self._start_package_watch()
+        self._start_config_watch()
+
+    # Installed state from the package databases
+
+    def _start_package_watch(self):
+        """Follow installs and removals made outside the store."""
+        if self._package_watch is not None:
+            return
+        self._package_watch = PackageWatch(self.distro_config)
+        for path, is_dir in self._package_watch.paths():
+            gfile = Gio.File.new_for_path(path)
+            try:
+                if is_dir:
+                    monitor = gfile.monitor_directory(Gio.FileMonitorFlags.NONE, None)
+                else:
+                    monitor = gfile.monitor_file(Gio.FileMonitorFlags.NONE, None)
+            except GLib.Error as e:
+                logger.warning("Cannot watch %s: %s", path, e.message)
+                continue
+            monitor.connect("changed", self._on_package_db_changed)
+            self._package_monitors.append(monitor)
+            logger.debug("Watching package database %s", path)
+        # Catch up with changes made while the store was closed.
+        self._check_package_changes()
+
+    def _stop_package_watch(self):
+        for monitor in self._package_monitors:
+            monitor.cancel()
+        self._package_monitors = []
+        if self._package_watch_source is not None:
+            GLib.source_remove(self._package_watch_source)
+            self._package_watch_source = None
+        self._package_watch = None
+
+    def _on_package_db_changed(self, monitor, file, other_file, event_type):
+        if self._package_watch_source is not None:
+            GLib.source_remove(self._package_watch_source)
+        self._package_watch_source = GLib.timeout_add(
+            PACKAGE_WATCH_DELAY_MS, self._check_package_changes
+        )
+
+    def _check_package_changes(self):
+        self._package_watch_source = None
+        apps = list(self.apps_data)
+        installed = list(self.installed_apps)
+
+        def _worker():
+            changes = self._package_watch.changes(apps, installed)
+            if changes:
+                GLib.idle_add(self._apply_package_changes, changes)
+
+        threading.Thread(target=_worker, daemon=True).start()
+        return False
+
+    def _apply_package_changes(self, changes):
+        """Record apps installed or removed outside the store."""
+        by_folder = {a.folder_name: a for a in self.apps_data}
+        changed = []
+        for folder, installed in changes.items():
+            app = by_folder.get(folder)
+            if app is None or (folder in self.installed_apps) == installed:
+                continue
+            state = "installed" if installed else "removed"
+            logger.info("%s was %s outside the store", folder, state)
+            self._mark_installed(app, installed)
+            changed.append(app)
+
+        if not changed:
+            return False
+        if getattr(self, "current_section", "explore") == "explore":
+            for app in changed:
+                self._replace_app_card(app)
+        else:
+            # The installed and updates lists gain or lose entries.
+            self._refresh_current_view()
+        return False
+
+    # The termux-desktop configuration
+
+    def _start_config_watch(self):
+        """Follow distro changes made with termux-desktop."""
+        if self._config_monitor is not None:
+            return
+        gfile = Gio.File.new_for_path(TERMUX_DESKTOP_CONFIG)
+        try:
+            self._config_monitor = gfile.monitor_file(Gio.FileMonitorFlags.NONE, None)
+        except GLib.Error as e:
+            logger.warning("Cannot watch %s: %s", TERMUX_DESKTOP_CONFIG, e.message)
+            return
+        self._config_monitor.connect("changed", self._on_config_file_changed)
+
+    def _on_config_file_changed(self, monitor, file, other_file, event_type):
+        if self._config_watch_source is not None:
+            GLib.source_remove(self._config_watch_source)
+        self._config_watch_source = GLib.timeout_add(
+            PACKAGE_WATCH_DELAY_MS, self._check_config
+        )
+
+    def _check_config(self):
+        self._config_watch_source = None
+        # Notifies _on_distro_changed when the distro settings changed
+        read_config()
+        return False
+
+    def _on_distro_changed(self, old, new):
+        """Switch the catalog and package watch over to the new distro.
+
+        Only what depends on the distro is redone: the catalog is
+        filtered again from the local ``apps.json`` and the distro's
+        package database is watched instead of the old one's.
+        """
+        self.distro_config.load()
+        self.selected_distro = self.distro_config.selected_distro
+        self.distro_enabled = self.distro_config.distro_enabled
+        if self._package_watch is not None:
+            self._stop_package_watch()
+            self._start_package_watch()
+        # Otherwise the refresh finishing applies the new catalog.
+        if not self.is_refreshing:
+            self._apply_catalog(*load_app_metadata(), "Distro change")
+        return False
 
     def _setup_app_list_ui(self):
         """Build sidebar + right panel from extracted modules."""
@@ -223,10 +389,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             self.main_box.pack_start(warning, False, False, 0)
             warning.show_all()
 
-        termux_desktop_config = os.path.join(
-            TERMUX_PREFIX, "etc", "termux-desktop", "configuration.conf"
-        )
-        if not os.path.exists(termux_desktop_config):
+        if not read_config().exists:
             warning = Gtk.InfoBar()
             warning.set_message_type(Gtk.MessageType.WARNING)
             warning.set_show_close_button(True)
@@ -277,6 +440,15 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         self.update_button.hide()
         self.right_panel.pack_start(self.update_button, False, False, 0)
 
+        self.update_all_button = Gtk.Button(label="Update All")
+        self.update_all_button.get_style_context().add_class("suggested-action")
+        self.update_all_button.connect("clicked", self.on_update_all_clicked)
+        self.update_all_button.set_margin_start(10)
+        self.update_all_button.set_margin_end(10)
+        self.update_all_button.set_margin_bottom(10)
+        self.update_all_button.set_no_show_all(True)
+        self.right_panel.pack_start(self.update_all_button, False, False, 0)
+
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         scrolled.set_vexpand(True)
@@ -300,12 +472,13 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             filtered = list(self.apps_data)
 
             if category and category != "All Apps":
-                filtered = [a for a in filtered if category in a.get("categories", [])]
+                filtered = [a for a in filtered if category in a.categories]
 
             search_text = self.search_bar.text if hasattr(self, "search_bar") else ""
             if search_text:
                 filtered = self._apply_search_filter(filtered, search_text)
 
+            self._prefetch_scripts(filtered)
             if filtered:
                 for app in filtered:
                     GLib.idle_add(lambda a=app: self._add_app_card(a))
@@ -314,17 +487,16 @@ class AppStoreWindow(Gtk.ApplicationWindow):
 
             GLib.idle_add(self.app_list_box.show_all)
         except Exception as e:
-            print(f"Error in show_apps: {e}")
+            logger.error("Error in show_apps: %s", e)
 
     def show_installed_apps(self):
         """Show only installed apps."""
         self._clear_app_list()
-        installed = [
-            a for a in self.apps_data if a.get("folder_name") in self.installed_apps
-        ]
+        installed = [a for a in self.apps_data if a.folder_name in self.installed_apps]
         search_text = self.search_bar.text if hasattr(self, "search_bar") else ""
         if search_text:
             installed = self._apply_search_filter(installed, search_text)
+        self._prefetch_scripts(installed)
         for app in installed:
             GLib.idle_add(lambda a=app: self._add_app_card(a))
         if not installed:
@@ -334,22 +506,55 @@ class AppStoreWindow(Gtk.ApplicationWindow):
     def show_update_apps(self):
         """Show apps with pending updates."""
         self._clear_app_list()
-        updates = [
-            a for a in self.apps_data if a.get("folder_name") in self.pending_updates
-        ]
+        updates = [a for a in self.apps_data if a.folder_name in self.pending_updates]
         search_text = self.search_bar.text if hasattr(self, "search_bar") else ""
         if search_text:
             updates = self._apply_search_filter(updates, search_text)
+        self.update_all_button.set_visible(bool(self.pending_updates))
+        self._prefetch_scripts(updates)
         for app in updates:
             GLib.idle_add(lambda a=app: self._add_app_card(a))
         if not updates:
             GLib.idle_add(self._show_no_apps_message, search_text)
         GLib.idle_add(self.app_list_box.show_all)
 
+    def _prefetch_scripts(self, apps):
+        """Warm the script cache for the first screenful of *apps*.
+
+        Installed apps get their uninstall script too.  Only the most
+        recent request is kept while a prefetch is already running.
+        """
+        targets = []
+        for app in apps[:PREFETCH_VISIBLE_APPS]:
+            kinds = ["install"]
+            if app.folder_name in self.installed_apps:
+                kinds.append("uninstall")
+            for kind in kinds:
+                url = app.get(f"{kind}_url")
+                targets.append((url, script_sha256(app, url)))
+
+        with self._prefetch_lock:
+            running = self._prefetch_targets is not None
+            self._prefetch_targets = targets
+        if running:
+            return
+
+        def _worker():
+            while True:
+                with self._prefetch_lock:
+                    batch = self._prefetch_targets
+                    if not batch:
+                        self._prefetch_targets = None
+                        return
+                    self._prefetch_targets = []
+                prefetch_scripts(batch)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
     def _add_app_card(self, app):
         """Add a single app card using the extracted widget factory."""
-        is_installed = app.get("folder_name") in self.installed_apps
-        has_update = app.get("folder_name") in self.pending_updates
+        is_installed = app.folder_name in self.installed_apps
+        has_update = app.folder_name in self.pending_updates
 
         card = build_app_card(
             app,
@@ -362,13 +567,28 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         )
         if card:
             self.app_list_box.pack_start(card, False, True, 0)
+            self._cards[app.folder_name] = card
 
     def _clear_app_list(self):
+        self._cards = {}
         if not hasattr(self, "app_list_box"):
             return
         for child in self.app_list_box.get_children():
             self.app_list_box.remove(child)
 
+    def _replace_app_card(self, app):
+        """Rebuild the visible card of *app* in place, if it is shown."""
+        old = self._cards.get(app.folder_name)
+        if old is None or old.get_parent() is not self.app_list_box:
+            return
+        position = self.app_list_box.get_children().index(old)
+        self.app_list_box.remove(old)
+        self._add_app_card(app)
+        card = self._cards.get(app.folder_name)
+        if card is not None and card is not old:
+            self.app_list_box.reorder_child(card, position)
+            card.show_all()
+
     def _show_no_apps_message(self, search_text):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         box.set_valign(Gtk.Align.CENTER)
@@ -388,56 +608,10 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             box.pack_start(lbl, False, False, 0)
         self.app_list_box.pack_start(box, True, True, 0)
 
-    def _get_fuzzy_score(self, search_text, text):
-        if not search_text or not text:
-            return 0
-        search_len = len(search_text)
-        if search_len <= 2:
-            max_dist = 0
-        else:
-            max_dist = min(3, search_len // 3)
-
-        try:
-            matches = find_near_matches(search_text, text, max_l_dist=max_dist)
-            if not matches:
-                return 0
-            best_dist = min(m.dist for m in matches)
-            return max(0, 100 - int((best_dist / search_len) * 100))
-        except Exception:
-            return 0
-
     def _apply_search_filter(self, apps, search_text):
-        if self.get_setting("enable_fuzzy_search", False):
-            threshold = 60
-            scored = []
-            for app in apps:
-                ns = self._get_fuzzy_score(search_text, app["app_name"].lower())
-                ds = self._get_fuzzy_score(
-                    search_text, app.get("description", "").lower()
-                )
-                cs = max(
-                    (
-                        self._get_fuzzy_score(search_text, c.lower())
-                        for c in app.get("categories", [])
-                    ),
-                    default=0,
-                )
-                best = max(ns, ds, cs)
-                if best >= threshold:
-                    scored.append((app, best))
-            scored.sort(key=lambda x: x[1], reverse=True)
-            return [a for a, _ in scored]
-
-        name_matches = [a for a in apps if search_text in a["app_name"].lower()]
-        if name_matches:
-            return name_matches
-        desc = [a for a in apps if search_text in a.get("description", "").lower()]
-        cat = [
-            a
-            for a in apps
-            if any(search_text in c.lower() for c in a.get("categories", []))
-        ]
-        return list({a["app_name"]: a for a in desc + cat}.values())
+        return search_apps(
+            apps, search_text, fuzzy=self.get_setting("enable_fuzzy_search", False)
+        )
 
     def on_section_clicked(self, button, section):
         self.current_section = section
@@ -467,6 +641,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             if hasattr(self, "sidebar"):
                 self.sidebar.show()
             self.update_button.hide()
+            self.update_all_button.hide()
             sel_cat = None
             if hasattr(self, "category_buttons"):
                 for cb in self.category_buttons:
@@ -480,6 +655,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             if hasattr(self, "sidebar"):
                 self.sidebar.hide()
             self.update_button.hide()
+            self.update_all_button.hide()
             self.show_installed_apps()
         elif section == "updates":
             if hasattr(self, "sidebar"):
@@ -554,14 +730,14 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             modal=True,
             message_type=Gtk.MessageType.QUESTION,
             buttons=Gtk.ButtonsType.YES_NO,
-            text=f"Install {app['app_name']}?",
+            text=f"Install {app.app_name}?",
         )
         response = dlg.run()
         dlg.destroy()
         if response != Gtk.ResponseType.YES:
             return
 
-        self._run_script_thread(
+        self._submit_script_job(
             app,
             url_key="install_url",
             action_label="Installing",
@@ -575,7 +751,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             modal=True,
             message_type=Gtk.MessageType.QUESTION,
             buttons=Gtk.ButtonsType.YES_NO,
-            text=f"Uninstall {app['app_name']}?",
+            text=f"Uninstall {app.app_name}?",
         )
         response = dlg.run()
         dlg.destroy()
@@ -587,7 +763,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             self._show_error("No uninstall script available for this app!")
             return
 
-        self._run_script_thread(
+        self._submit_script_job(
             app,
             url_key="uninstall_url",
             fallback_url_key="uninstall_script",
@@ -597,16 +773,16 @@ class AppStoreWindow(Gtk.ApplicationWindow):
 
     def on_open_clicked(self, button, app):
         """Handle open button."""
-        run_cmd = app.get("run_cmd", "")
+        run_cmd = app.run_cmd or ""
         if not run_cmd:
             self._show_error("No run command specified for this app")
             return
-        if app.get("app_type") == "distro":
+        if app.is_distro:
             run_cmd = f"pdrun {run_cmd}"
         if self.get_setting("show_command_output", False):
-            show_command_output(run_cmd, app.get("app_name", "App"), self)
+            show_command_output(run_cmd, (app.app_name or "App"), self)
         else:
-            subprocess.Popen(["bash", "-c", run_cmd])
+            commands.spawn(["bash", "-c", run_cmd], commands.APP)
 
     def on_update_clicked(self, button, app):
         """Handle update button — re-runs install script and clears pending update."""
@@ -615,27 +791,132 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             modal=True,
             message_type=Gtk.MessageType.QUESTION,
             buttons=Gtk.ButtonsType.YES_NO,
-            text=f"Update {app['app_name']}?",
+            text=f"Update {app.app_name}?",
         )
         response = dlg.run()
         dlg.destroy()
         if response != Gtk.ResponseType.YES:
             return
 
-        def _on_update_success():
-            self._mark_installed(app, True)
-            folder = app["folder_name"]
-            if folder in self.pending_updates:
-                del self.pending_updates[folder]
-                self.update_tracker.pending = self.pending_updates
-
-        self._run_script_thread(
+        self._submit_script_job(
             app,
             url_key="install_url",
             action_label="Updating",
-            on_success=_on_update_success,
+            on_success=lambda: self._clear_pending_update(app),
         )
 
+    def _clear_pending_update(self, app):
+        """Record a successful update of *app*."""
+        self._mark_installed(app, True)
+        folder = app.folder_name
+        if folder in self.pending_updates:
+            del self.pending_updates[folder]
+            self.update_tracker.pending = self.pending_updates
+
+    def on_update_all_clicked(self, button):
+        """Update every app with a pending update.
+
+        Apps whose update is a plain repo-package install are merged into
+        one package-manager run per package manager; the remaining apps
+        run their own install scripts one after another.
+        """
+        apps = [
+            a
+            for a in self.apps_data
+            if a.folder_name in self.pending_updates
+            and self.scheduler.find(f"app:{a.folder_name}") is None
+        ]
+        if not apps:
+            self.queue_view.show()
+            return
+
+        dlg = Gtk.MessageDialog(
+            transient_for=self,
+            modal=True,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.YES_NO,
+            text=f"Update {len(apps)} apps?",
+        )
+        response = dlg.run()
+        dlg.destroy()
+        if response != Gtk.ResponseType.YES:
+            return
+
+        distro = self.selected_distro if self.distro_enabled else None
+
+        def _plan(job):
+            entries = []
+            for i, app in enumerate(apps):
+                if job.cancel_requested:
+                    return False
+                text = None
+                if repo_package(app, distro) is None and app.install_url:
+                    job.update(i / len(apps), f"Checking {app.app_name}...")
+                    text = self._fetch_script_text(app)
+                entries.append((app, text))
+            GLib.idle_add(
+                self._submit_update_batches, plan_batch_update(entries, distro)
+            )
+            return True
+
+        self.scheduler.submit(
+            "Preparing updates",
+            _plan,
+            resources=[f"app:{a.folder_name}" for a in apps],
+        )
+        self.queue_view.show()
+
+    @staticmethod
+    def _fetch_script_text(app):
+        """Return the text of *app*'s install script, or ``None``."""
+        url = app.install_url
+        path = cached_script(url, script_sha256(app, url))
+        if not path:
+            return None
+        try:
+            with open(path) as f:
+                return f.read()
+        except OSError as e:
+            logger.error("Error reading script %s: %s", path, e)
+            return None
+
+    def _submit_update_batches(self, plan):
+        """Queue the jobs of a :func:`plan_batch_update` plan."""
+        labels = {NATIVE: "Termux", DISTRO: self.selected_distro}
+        for kind in (NATIVE, DISTRO):
+            group = plan[kind]
+            if not group:
+                continue
+            packages = [pkg for _, pkgs in group for pkg in pkgs]
+
+            def _on_success(group=group):
+                for app, _ in group:
+                    self._clear_pending_update(app)
+
+            self.scheduler.submit(
+                f"Updating {len(group)} {labels[kind]} apps",
+                self._script_job(
+                    {"app_type": kind},
+                    "Updating",
+                    _on_success,
+                    script=build_batch_script(kind, packages),
+                ),
+                resources=[f"app:{app.folder_name}" for app, _ in group],
+            )
+
+        for app in plan["custom"]:
+            self._submit_script_job(
+                app,
+                url_key="install_url",
+                action_label="Updating",
+                on_success=lambda a=app: self._clear_pending_update(a),
+                extra_resources=("update-all",),
+                # The plan job still holds this app's resource
+                skip_queued=False,
+            )
+        self.queue_view.show()
+        return False
+
     def on_update_system(self, button):
         """Handle 'Check for Updates' button — delegates to update_check pipeline."""
         from termux_appstore.tasks.update_check import run_update_pipeline
@@ -703,6 +984,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             GLib.idle_add(lambda m=msg: self._show_error(m))
 
         distro_cfg = getattr(self, "distro_config", None)
+        repo_ttl = int(self.get_setting("repo_sync_ttl_minutes", 60)) * 60
 
         def _update_thread():
             try:
@@ -712,6 +994,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
                     distro_config=distro_cfg,
                     on_progress=_on_progress,
                     on_error=_on_error,
+                    repo_ttl=repo_ttl,
                 )
                 if result is not None:
                     self.apps_data = result["apps_data"]
@@ -719,10 +1002,7 @@ class AppStoreWindow(Gtk.ApplicationWindow):
                     self.pending_updates = result["pending_updates"]
                     GLib.idle_add(self.show_update_apps)
             except Exception as e:
-                print(f"Update check failed: {e}")
-                import traceback
-
-                traceback.print_exc()
+                logger.exception("Update check failed: %s", e)
                 _on_error(f"Update check failed: {e}")
             finally:
                 GLib.idle_add(lambda: self._update_system_complete(button))
@@ -743,13 +1023,31 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         button.add(Gtk.Label(label="Check for Updates"))
         button.show_all()
 
-    def _run_script_thread(
-        self, app, url_key, action_label, on_success, fallback_url_key=None
+    def _submit_script_job(
+        self,
+        app,
+        url_key,
+        action_label,
+        on_success,
+        fallback_url_key=None,
+        extra_resources=(),
+        skip_queued=True,
     ):
-        """Download and execute an install/uninstall script.
-
-        Delegates to :func:`~termux_appstore.tasks.script_executor.run_script_with_progress`
-        which handles progress tracking, terminal output, and cleanup.
+        """Queue an install/uninstall/update script on the job scheduler.
+
+        The job runs :func:`~termux_appstore.tasks.script_executor.execute_script`
+        on a scheduler worker; progress shows up in the task queue.  Jobs
+        for the same app never overlap, package-manager work inside the
+        scripts is serialized by the shared locks, and everything else
+        (script and artifact downloads) runs in parallel.
+
+        Args:
+            extra_resources: Additional scheduler resources the job holds,
+                e.g. to run a group of jobs one at a time.
+            skip_queued: Do nothing when a job for this app is already
+                queued or running.  Callers that submit from inside a
+                job holding the app's resource pass ``False``; the new
+                job then waits for that one to finish.
         """
 
         url = app.get(url_key) or (
@@ -759,44 +1057,130 @@ class AppStoreWindow(Gtk.ApplicationWindow):
             self._show_error(f"No {url_key} available for this app!")
             return
 
-        progress_dialog, status_label, progress_bar, terminal_view = (
-            self._create_progress_dialog(
-                title=f"{action_label}...", allow_cancel=True, use_terminal=True
-            )
+        resource = f"app:{app.folder_name}"
+        if skip_queued and self.scheduler.find(resource) is not None:
+            self.queue_view.show()
+            return
+
+        self.scheduler.submit(
+            f"{action_label} {app.app_name}",
+            self._script_job(app, action_label, on_success, url=url),
+            resources=(resource, *extra_resources),
         )
+        self.queue_view.show()
 
-        def _refresh_current_view():
-            """Refresh the app list for whichever section is active."""
-            section = getattr(self, "current_section", "explore")
-            if section == "installed":
-                self.show_installed_apps()
-            elif section == "updates":
-                self.show_update_apps()
-            else:
-                cat = self._get_selected_category()
-                self.show_apps(cat)
-
-        run_script_with_progress(
-            app=app,
-            url=url,
-            action_label=action_label,
-            on_success=on_success,
-            progress_bar=progress_bar,
-            status_label=status_label,
-            terminal_view=terminal_view,
-            progress_dialog=progress_dialog,
-            refresh_view_cb=_refresh_current_view,
+    def _script_job(self, app, action_label, on_success, url=None, script=None):
+        """Return a scheduler job body that runs one script.
+
+        Args:
+            app: App metadata passed to ``execute_script``.
+            action_label: ``"Installing"``, ``"Updating"``, ...
+            on_success: Called on the main loop when the script succeeds.
+            url: Script URL to download.
+            script: Script text to run instead of downloading *url*.
+        """
+        use_pty = bool(self.get_setting("run_scripts_in_pty", True))
+        cache_max_mb = int(self.get_setting("artifact_cache_max_mb", 2048))
+
+        def _job(job):
+            result = execute_script(
+                app=app,
+                url=url,
+                script=script,
+                action_label=action_label,
+                is_cancelled=lambda: job.cancel_requested,
+                on_progress=job.update,
+                on_output=lambda text: job.log_lines.extend(text.splitlines()),
+                use_pty=use_pty,
+                cache_max_mb=cache_max_mb,
+            )
+            job.result = result
+            outcome = result["outcome"]
+
+            if outcome == "success":
+                GLib.idle_add(on_success)
+                GLib.idle_add(self._refresh_current_view)
+                job.update(1.0, f"{action_label} complete")
+                return True
+            if outcome == "cancelled":
+                return False
+            if outcome == "download_failed":
+                job.error = "Could not download the script"
+                return False
+
+            job.log_lines = result["log_lines"]
+            code = result["exit_code"]
+            job.error = result["reason"] or (
+                f"{action_label} failed"
+                + ("" if code is None else f" (exit code {code})")
+            )
+            GLib.idle_add(self._show_job_log, job)
+            return False
+
+        return _job
+
+    def _refresh_current_view(self):
+        """Refresh the app list for whichever section is active."""
+        section = getattr(self, "current_section", "explore")
+        if section == "installed":
+            self.show_installed_apps()
+        elif section == "updates":
+            self.show_update_apps()
+        else:
+            cat = self._get_selected_category()
+            self.show_apps(cat)
+        return False
+
+    def _show_job_log(self, job):
+        """Open a log window for *job*; follows the output while it runs."""
+        dialog, status_label, progress_bar, terminal_view, _, _ = (
+            create_progress_dialog(self, job.title, True, True)
         )
+        close_btn = dialog.get_widget_for_response(Gtk.ResponseType.CANCEL)
+        if close_btn:
+            close_btn.set_label("Close")
+            close_btn.get_style_context().remove_class("destructive-action")
+        dialog.connect("response", lambda d, r: d.destroy())
+
+        if job.state == "failed" and job.result:
+            dialog.appstore_set_error(
+                job.title,
+                "\n".join(job.log_lines),
+                job.result["exit_code"],
+                job.error,
+            )
+            return False
+
+        shown = 0
+
+        def _follow():
+            nonlocal shown
+            if not dialog.get_window():
+                return False
+            lines = job.log_lines[shown:]
+            if lines:
+                shown += len(lines)
+                update_terminal(terminal_view, "\n".join(lines) + "\n")
+            status_label.set_text(job.message)
+            progress_bar.set_fraction(job.fraction)
+            progress_bar.set_text(f"{int(job.fraction * 100)}%")
+            return not job.finished
+
+        if _follow():
+            GLib.timeout_add(500, _follow)
+        return False
 
     def _mark_installed(self, app, installed):
         """Update installed status for *app* and persist."""
-        folder = app["folder_name"]
+        folder = app.folder_name
         self.installed_tracker.update_status(folder, installed)
         self.installed_apps = self.installed_tracker.apps
 
         if not installed and folder in self.pending_updates:
             del self.pending_updates[folder]
             self.update_tracker.pending = self.pending_updates
+        if self._refresh_overrides is not None:
+            self._refresh_overrides[folder] = installed
 
     def _create_progress_dialog(
         self, title="Installing...", allow_cancel=True, use_terminal=None
@@ -841,7 +1225,111 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         self._load_and_display()
 
         self.main_stack.set_visible_child_name("content")
-        print("Refresh complete — UI updated")
+        logger.info("Refresh complete — UI updated")
+
+    def _start_background_refresh(self):
+        """Refresh the data while the cached catalog stays on screen."""
+        self.is_refreshing = True
+        self._refresh_overrides = {}
+        migrate_old_data()
+        logger.info("Refreshing app data in the background...")
+
+        def _refresh_thread():
+            success = refresh_data(self.installed_tracker, self.update_tracker)
+            GLib.idle_add(self._on_background_refresh_complete, success)
+
+        thread = threading.Thread(target=_refresh_thread, daemon=True)
+        thread.start()
+
+    def _on_background_refresh_complete(self, success):
+        """Apply what a background refresh changed to the live UI."""
+        self.is_refreshing = False
+        overrides, self._refresh_overrides = self._refresh_overrides, None
+        for folder, installed in overrides.items():
+            self.installed_tracker.update_status(folder, installed)
+            if not installed:
+                self.update_tracker.remove(folder)
+        if overrides:
+            self.update_tracker.save()
+        if not success:
+            # apps.json is unchanged, but the distro may not be.
+            logger.warning("Background refresh failed; keeping the cached catalog")
+
+        self._apply_catalog(*load_app_metadata(), "Background refresh")
+        return False
+
+    def _apply_catalog(self, apps_data, categories, reason):
+        """Show a newly loaded catalog, redrawing only what changed."""
+        added, removed, changed = diff_apps(self.apps_data, apps_data)
+        installed = set(self.installed_tracker.apps)
+        pending = self.update_tracker.pending
+        # Cards also show installed and update state
+        for app in apps_data:
+            folder = app.folder_name
+            if folder in changed or folder in added:
+                continue
+            if (folder in installed) != (folder in self.installed_apps) or (
+                pending.get(folder) != self.pending_updates.get(folder)
+            ):
+                changed.append(folder)
+        old_categories = {app.folder_name: app.categories for app in self.apps_data}
+        # An app that changed category may leave or join the filtered list
+        recategorized = any(
+            app.categories != old_categories.get(app.folder_name)
+            for app in apps_data
+            if app.folder_name in changed
+        )
+
+        self.apps_data = apps_data
+        self.installed_apps = self.installed_tracker.apps
+        self.pending_updates = pending
+        logger.info(
+            "%s: %s new, %s removed, %s changed",
+            reason,
+            len(added),
+            len(removed),
+            len(changed),
+        )
+
+        # New, removed or recategorized apps move the list around; rebuild
+        # it.  Otherwise only the changed cards are swapped.
+        rebuild = bool(added or removed) or recategorized
+        if categories != self.categories:
+            self.categories = categories
+            self._rebuild_sidebar()
+            rebuild = True
+        if getattr(self, "current_section", "explore") != "explore":
+            rebuild = rebuild or bool(changed)
+        if rebuild:
+            self._refresh_current_view()
+            return
+        by_folder = {app.folder_name: app for app in apps_data}
+        for folder in changed:
+            self._replace_app_card(by_folder[folder])
+
+    def _rebuild_sidebar(self):
+        """Replace the category sidebar, keeping the selection if it still exists."""
+        if not hasattr(self, "sidebar"):
+            return
+        selected = self._get_selected_category()
+        visible = self.sidebar.get_visible()
+        position = self.content_box.get_children().index(self.sidebar)
+        self.content_box.remove(self.sidebar)
+
+        sb = build_sidebar(self.categories, self._on_category_clicked)
+        self.sidebar = sb["sidebar"]
+        self.category_buttons = sb["category_buttons"]
+        self.content_box.pack_start(self.sidebar, False, True, 0)
+        self.content_box.reorder_child(self.sidebar, position)
+        if selected in self.categories:
+            for btn in self.category_buttons:
+                if btn.get_label() == selected:
+                    for other in self.category_buttons:
+                        other.get_style_context().remove_class("selected")
+                    btn.get_style_context().add_class("selected")
+        self.sidebar.show_all()
+        if not visible:
+            self.sidebar.hide()
 
     def _on_refresh_error(self, message):
         """Called on main thread when refresh fails."""
@@ -851,33 +1339,25 @@ class AppStoreWindow(Gtk.ApplicationWindow):
         self._show_error(f"Refresh failed: {message}")
 
     def _start_task_processor(self):
-        self.task_running = True
-        self.task_thread = threading.Thread(target=self._process_tasks, daemon=True)
-        self.task_thread.start()
-
-    def _process_tasks(self):
-        while self.task_running:
-            try:
-                task = self.task_queue.get(timeout=1.0)
-                if task:
-                    task()
-                self.task_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Error processing task: {e}")
+        self.scheduler = JobScheduler(
+            max_workers=self.get_setting("max_parallel_jobs", 3)
+        )
+        self.queue_view = JobQueueView(
+            self.queue_button, self.scheduler, self._show_job_log
+        )
 
     def _stop_task_processor(self):
-        self.task_running = False
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
 
     def on_delete_event(self, widget, event):
         try:
             self._stop_task_processor()
-            self.installed_tracker.save()
             self.update_tracker.save()
+            get_store().writes.flush()
             self.get_application().quit()
         except Exception as e:
-            print(f"Error during cleanup: {e}")
+            logger.error("Error during cleanup: %s", e)
         return False
 
     def _show_error(self, message):
@@ -0,0 +1,93 @@
+"""The refresh pipeline against a fake catalog server.
+
+Downloads, package checks and repo syncs are replaced so the pipeline
+runs offline; everything else (checkpoints, the state database, the
+catalog-versions snapshot) is the real thing, under a throwaway home
+directory.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# The paths in termux_appstore.constants are fixed when it is imported,
+# and _buildconf only exists in a meson build.
+_HOME = tempfile.mkdtemp(prefix="appstore-test-")
+_buildconf = types.ModuleType("termux_appstore._buildconf")
+_buildconf.PREFIX = os.path.join(_HOME, "usr")
+_buildconf.APP_VERSION = "0"
+_buildconf.APP_NAME = "Termux AppStore"
+_buildconf.APP_ID = "com.termux.appstore"
+sys.modules.setdefault("termux_appstore._buildconf", _buildconf)
+_real_home = os.environ.get("HOME")
+os.environ["HOME"] = _HOME
+try:
+    from termux_appstore.backend import refresh  # noqa: E402
+    from termux_appstore.backend.store import get_store  # noqa: E402
+    from termux_appstore.constants import APPSTORE_JSON  # noqa: E402
+finally:
+    if _real_home is None:
+        del os.environ["HOME"]
+    else:
+        os.environ["HOME"] = _real_home
+
+
+def _catalog(version):
+    return [
+        {
+            "folder_name": "foo",
+            "app_name": "Foo",
+            "app_type": "native",
+            "version": version,
+        }
+    ]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Serve a catalog whose ``foo`` version the test can bump."""
+    served = {"version": "1.0"}
+
+    def fetch(url, dest, validators):
+        if url != refresh.GITHUB_APPS_JSON:
+            return False, validators
+        with open(dest, "w") as f:
+            json.dump(_catalog(served["version"]), f)
+        return True, {}
+
+    monkeypatch.setattr(refresh, "_fetch", fetch)
+    monkeypatch.setattr(refresh, "_check_native_packages", lambda apps, inst: None)
+    monkeypatch.setattr(
+        refresh,
+        "_stage_repos",
+        lambda ctx, previous: {"distro": None, "repos_updated": 0},
+    )
+
+    # Start from a finished update check that saw foo 1.0.
+    os.makedirs(os.path.dirname(APPSTORE_JSON), exist_ok=True)
+    with open(APPSTORE_JSON, "w") as f:
+        json.dump(_catalog("1.0"), f)
+    get_store().replace_catalog_versions(_catalog("1.0"))
+    return served
+
+
+def test_refreshes_keep_update_for_next_check(server):
+    server["version"] = "2.0"
+    for _ in range(2):
+        ctx = refresh.run_refresh_pipeline(["foo"])
+        assert "new_updates" not in ctx
+        assert get_store().catalog_versions() == {"foo": "1.0"}
+
+    ctx = refresh.run_refresh_pipeline(["foo"], check_updates=True)
+    assert ctx["new_updates"] == {"foo": "2.0"}
+    assert get_store().catalog_versions() == {"foo": "2.0"}
+
+    ctx = refresh.run_refresh_pipeline(["foo"], check_updates=True)
+    assert ctx["new_updates"] == {}
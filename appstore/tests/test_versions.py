@@ -0,0 +1,303 @@
+"""Version ordering — reference vectors and randomized properties.
+
+The reference vectors come from the upstream test suites of dpkg
+(``lib/dpkg/t/t-version.c``), rpm (``tests/rpmvercmp.at``) and pacman
+(``test/util/vercmptest.sh``).  The property tests draw seeded random
+versions and check what every comparator must satisfy; when ``dpkg`` is
+installed the Debian comparator is also checked against it directly.
+"""
+
+import functools
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from termux_appstore.backend import versions  # noqa: E402
+from termux_appstore.backend.versions import (  # noqa: E402
+    DPKG,
+    GENERIC,
+    RPM,
+    VERCMP,
+    compare_versions,
+    dpkg_compare,
+    generic_compare,
+    is_newer,
+    rpm_compare,
+    vercmp,
+    version_scheme,
+)
+
+SEED = 20240613
+COMPARATORS = {
+    DPKG: dpkg_compare,
+    RPM: rpm_compare,
+    VERCMP: vercmp,
+    GENERIC: generic_compare,
+}
+
+DPKG_CASES = [
+    ("1.0", "1.0", 0),
+    ("1.0", "2.0", -1),
+    ("1.2.3", "1.10", -1),
+    ("1:1.0", "2.0", 1),
+    ("2:1.0", "1:9.9", 1),
+    ("0:1.0", "1.0", 0),
+    ("1.0-1", "1.0-2", -1),
+    ("1.0-10", "1.0-9", 1),
+    ("1.0", "1.0-0", 0),
+    ("1.0~rc1", "1.0", -1),
+    ("1.0~~", "1.0~", -1),
+    ("1.0~~a", "1.0~", -1),
+    ("1.0~", "1.0", -1),
+    ("1.0", "1.0a", -1),
+    ("1.0a", "1.0+", -1),
+    ("1.0+dfsg-1", "1.0-1", 1),
+    ("2.30-20ubuntu1", "2.30-3", 1),
+    ("1.2.3-1.1", "1.2.3-1", 1),
+    ("0.9.8zh-1", "0.9.8-1", 1),
+    ("7.6p2-4", "7.6-0", 1),
+    ("1.18.36:5.4", "1.18.36:5.5", -1),
+]
+
+RPM_CASES = [
+    ("1.0", "1.0", 0),
+    ("2.0", "2.0.1", -1),
+    ("2.0.1a", "2.0.1", 1),
+    ("5.5p1", "5.5p10", -1),
+    ("10xyz", "10.1xyz", -1),
+    ("xyz10", "xyz10.1", -1),
+    ("xyz.4", "8", -1),
+    ("xyz.4", "2", -1),
+    ("6.0.rc1", "6.0", 1),
+    ("10b2", "10a1", 1),
+    ("1.0a", "1.0aa", -1),
+    ("10.0001", "10.1", 0),
+    ("10.0001", "10.0039", -1),
+    ("4.999.9", "5.0", -1),
+    ("20101121", "20101122", -1),
+    ("2.0", "2_0", 0),
+    ("a+", "a_", 0),
+    ("+a", "_a", 0),
+    ("_+", "_", 0),
+    ("1.0~rc1", "1.0", -1),
+    ("1.0~rc1", "1.0~rc2", -1),
+    ("1.0~rc1~git123", "1.0~rc1", -1),
+    ("1.0^", "1.0", 1),
+    ("1.0^git1", "1.0", 1),
+    ("1.0^git1", "1.0^git2", -1),
+    ("1.0^git1", "1.01", -1),
+    ("1.0^20160101", "1.0.1", -1),
+    ("1.0^20160102", "1.0^20160101^git1", 1),
+    ("1.0~rc1^git1", "1.0~rc1", 1),
+    ("1.0^git1", "1.0^git1~pre", 1),
+    ("1:1.0-1", "2.0-1", 1),
+    ("1.0-1", "1.0-2", -1),
+    ("1.0", "1.0-2", 0),
+]
+
+VERCMP_CASES = [
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5", 1),
+    ("1.5.0-1", "1.5.0-2", -1),
+    ("1.5-2", "1.5.1-1", -1),
+    ("1.5", "1.5-1", 0),
+    ("1.1-1", "1.0", 1),
+    ("1.5b-1", "1.5-1", -1),
+    ("1.5b", "1.5.1", -1),
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0b", "1.0beta", -1),
+    ("1.0beta", "1.0rc", -1),
+    ("1.0rc", "1.0", -1),
+    ("1.5.a", "1.5", 1),
+    ("1.5.b", "1.5.a", 1),
+    ("1.5.1", "1.5.b", 1),
+    ("1.5.b-1", "1.5.b", 0),
+    ("1.5-1", "1.5.b", -1),
+    ("2.0", "2_0", 0),
+    ("2.0_a", "2_0.a", 0),
+    ("2.0a", "2.0.a", -1),
+    ("2___a", "2_a", 1),
+    ("1:1.0", "0:1.0-1", 1),
+    ("1:1.0-1", "0:1.1-1", 1),
+    ("0:1.0", "1.0", 0),
+    ("0:1.1", "1.0", 1),
+    ("1:1.0", "1.1", 1),
+]
+
+GENERIC_CASES = [
+    ("1.9.0", "1.10.0", -1),
+    ("v1.2", "1.2", 0),
+    ("1.2", "1.2.0", 0),
+    ("1.0.0+build.7", "1.0.0", 0),
+    ("1.0.dev1", "1.0a1", -1),
+    ("1.0a1", "1.0b1", -1),
+    ("1.0b1", "1.0rc1", -1),
+    ("1.0rc1", "1.0", -1),
+    ("1.0", "1.0.post1", -1),
+    ("2024.01.05", "2024.1.12", -1),
+]
+
+# semver.org, section 11
+SEMVER_ORDER = [
+    "1.0.0-alpha",
+    "1.0.0-alpha.1",
+    "1.0.0-alpha.beta",
+    "1.0.0-beta",
+    "1.0.0-beta.2",
+    "1.0.0-beta.11",
+    "1.0.0-rc.1",
+    "1.0.0",
+]
+
+
+def _check(compare, a, b, expected):
+    assert compare(a, b) == expected, f"{a} vs {b}"
+    assert compare(b, a) == -expected, f"{b} vs {a}"
+
+
+@pytest.mark.parametrize("a,b,expected", DPKG_CASES)
+def test_dpkg_reference(a, b, expected):
+    _check(dpkg_compare, a, b, expected)
+
+
+@pytest.mark.parametrize("a,b,expected", RPM_CASES)
+def test_rpm_reference(a, b, expected):
+    _check(rpm_compare, a, b, expected)
+
+
+@pytest.mark.parametrize("a,b,expected", VERCMP_CASES)
+def test_vercmp_reference(a, b, expected):
+    _check(vercmp, a, b, expected)
+
+
+@pytest.mark.parametrize("a,b,expected", GENERIC_CASES)
+def test_generic_reference(a, b, expected):
+    _check(generic_compare, a, b, expected)
+
+
+def test_semver_precedence():
+    shuffled = SEMVER_ORDER[:]
+    random.Random(SEED).shuffle(shuffled)
+    ordered = sorted(shuffled, key=functools.cmp_to_key(generic_compare))
+    assert ordered == SEMVER_ORDER
+
+
+# Randomized properties
+
+
+def _random_version(rng, scheme):
+    """A well-formed version string for *scheme*."""
+    parts = [
+        str(rng.choice([0, 1, 2, 9, 10, 11, 100])) for _ in range(rng.randint(1, 4))
+    ]
+    version = ".".join(parts)
+    if rng.random() < 0.3:
+        version += rng.choice(["a", "b", "rc1", "beta2", "p1"])
+    if scheme in (DPKG, RPM) and rng.random() < 0.2:
+        version += "~" + rng.choice(["rc1", "beta", "1"])
+    if scheme == GENERIC and rng.random() < 0.2:
+        version += rng.choice(["-alpha.1", "-rc.2", ".post1", ".dev3", "+g1234"])
+    if scheme != GENERIC:
+        if rng.random() < 0.5:
+            version += f"-{rng.randint(0, 12)}"
+        if rng.random() < 0.2:
+            version = f"{rng.randint(0, 3)}:{version}"
+    return version
+
+
+def _samples(scheme, count=120):
+    rng = random.Random(f"{SEED}-{scheme}")
+    return [_random_version(rng, scheme) for _ in range(count)]
+
+
+@pytest.mark.parametrize("scheme", sorted(COMPARATORS))
+def test_reflexive_and_antisymmetric(scheme):
+    compare = COMPARATORS[scheme]
+    samples = _samples(scheme)
+    for a in samples:
+        assert compare(a, a) == 0
+        for b in samples[:40]:
+            assert compare(a, b) == -compare(b, a), f"{a} vs {b}"
+
+
+@pytest.mark.parametrize("scheme", sorted(COMPARATORS))
+def test_sorting_is_consistent(scheme):
+    # A total order: after sorting, every earlier item is <= every later one.
+    compare = COMPARATORS[scheme]
+    ordered = sorted(_samples(scheme, 80), key=functools.cmp_to_key(compare))
+    for i, a in enumerate(ordered):
+        for b in ordered[i + 1 :]:
+            assert compare(a, b) <= 0, f"{a} sorted before {b}"
+
+
+@pytest.mark.parametrize("scheme", sorted(COMPARATORS))
+def test_bumping_a_component_is_newer(scheme):
+    rng = random.Random(f"{SEED}-bump-{scheme}")
+    compare = COMPARATORS[scheme]
+    for _ in range(200):
+        parts = [rng.randint(0, 150) for _ in range(rng.randint(1, 5))]
+        bumped = parts[:]
+        index = rng.randrange(len(parts))
+        bumped[index] += rng.randint(1, 1000)
+        old = ".".join(map(str, parts))
+        new = ".".join(map(str, bumped))
+        assert compare(old, new) == -1, f"{old} vs {new}"
+
+
+@pytest.mark.parametrize("scheme", [DPKG, RPM, VERCMP])
+def test_epoch_dominates(scheme):
+    compare = COMPARATORS[scheme]
+    for a in _samples(scheme, 60):
+        for b in _samples(scheme, 10):
+            low = f"1:{a.split(':')[-1]}"
+            high = f"2:{b.split(':')[-1]}"
+            assert compare(low, high) == -1, f"{low} vs {high}"
+
+
+@pytest.mark.skipif(shutil.which("dpkg") is None, reason="dpkg not installed")
+def test_dpkg_matches_dpkg_binary():
+    samples = _samples(DPKG, 40)
+    rng = random.Random(SEED)
+    for _ in range(60):
+        a, b = rng.choice(samples), rng.choice(samples)
+        for op, expected in (("lt", -1), ("eq", 0), ("gt", 1)):
+            result = subprocess.run(["dpkg", "--compare-versions", a, op, b])
+            if result.returncode == 0:
+                assert dpkg_compare(a, b) == expected, f"{a} {op} {b}"
+                break
+
+
+# Public API
+
+
+def test_compare_versions_is_memoized():
+    compare_versions.cache_clear()
+    assert compare_versions("1.9", "1.10", DPKG) == -1
+    assert compare_versions("1.9", "1.10", DPKG) == -1
+    assert compare_versions.cache_info().hits == 1
+
+
+def test_is_newer():
+    assert is_newer("1.9.0", "1.10.0")
+    assert not is_newer("1.10.0", "1.9.0")
+    assert not is_newer("1:2.3-4", "2.3-4", DPKG)
+    assert not is_newer("1.0", "1.0")
+
+
+def test_version_scheme(monkeypatch):
+    monkeypatch.setattr(versions, "_termux_scheme", lambda: DPKG)
+    assert version_scheme({"version_source": "termux_local_version"}) == DPKG
+    assert version_scheme({"version": "distro_local_version"}, "fedora") == RPM
+    assert (
+        version_scheme({"version_source": "distro_local_version"}, "archlinux")
+        == VERCMP
+    )
+    assert version_scheme({"version_source": "distro_local_version"}, None) == GENERIC
+    assert version_scheme({"version": "1.2.3"}, "ubuntu") == GENERIC